@@ -0,0 +1,99 @@
+"""
+Продвинутый Python — Итоговый проект
+-------------------------------------
+Модуль: bench_api.py
+Назначение: замер пропускной способности API на прогретом кэше —
+            запросов в секунду для /products/, /category/… и /brand/….
+
+Приложение вызывается в этом же процессе через httpx.ASGITransport,
+поэтому в замер входят маршрутизация FastAPI, кэш и сериализация, но
+не сеть. Перед замером каждый адрес запрашивается один раз (прогрев),
+дальше все ответы берутся из кэша. С --encoding gzip httpx распаковывает
+ответ в том же процессе — это время тоже попадает в замер, а «Байт
+JSON» — размер распакованного тела.
+
+Запуск (из папки final/):
+    python bench_api.py                              # SQLite во временной папке
+    python bench_api.py --requests 5000 --concurrent 32
+    python bench_api.py --encoding gzip              # с Accept-Encoding: gzip
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import os
+import tempfile
+import time
+from pathlib import Path
+
+
+async def _run(args: argparse.Namespace) -> None:
+    # Импорты после настройки DATABASE_URL: engine создаётся при импорте
+    import httpx
+
+    from database import Base, SessionLocal, engine
+    from dummyjson_stub import make_products
+    from loader import _save_products
+    from main import app
+
+    Base.metadata.create_all(bind=engine)
+    products = make_products(args.products)
+    with SessionLocal() as db:
+        _save_products(db, products)
+
+    sample = products[0]
+    paths = {
+        "/products/?limit=100":          "/products/?limit=100",
+        "/category/{name}":              f"/category/{sample['category']}",
+        "/brand/{name}":                 f"/brand/{sample['brand']}",
+    }
+    headers = {"Accept-Encoding": args.encoding}
+
+    print("=" * 72)
+    print(f"Прогретый кэш, {args.requests:,} запросов на адрес, "
+          f"{args.concurrent} одновременно, Accept-Encoding: {args.encoding}")
+    print("=" * 72)
+    print(f"{'Адрес':<24} | {'Запросов/с':>11} | {'мс/запрос':>10} | {'Байт JSON':>12}")
+    print("-" * 72)
+
+    transport = httpx.ASGITransport(app=app)
+    async with httpx.AsyncClient(transport=transport, base_url="http://test",
+                                 headers=headers) as client:
+        for label, path in paths.items():
+            warm = await client.get(path)
+            warm.raise_for_status()
+            size = len(warm.content)
+            remaining = args.requests
+
+            async def worker() -> None:
+                nonlocal remaining
+                while remaining > 0:
+                    remaining -= 1
+                    response = await client.get(path)
+                    assert response.status_code == 200, response.status_code
+
+            start = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrent)))
+            elapsed = time.perf_counter() - start
+            print(f"{label:<24} | {args.requests / elapsed:>11,.0f} | "
+                  f"{elapsed / args.requests * 1000:>10.3f} | {size:>12,}")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--products", type=int, default=3000)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrent", type=int, default=16)
+    parser.add_argument("--encoding", default="identity",
+                        help="значение Accept-Encoding (identity, gzip, br)")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        os.environ["DATABASE_URL"] = f"sqlite:///{Path(tmp) / 'bench.db'}"
+        asyncio.run(_run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,365 @@
+"""
+Продвинутый Python — Итоговый проект
+-------------------------------------
+Модуль: cache.py
+Назначение: общий кэш ответов API для всех роутеров — LRU-ограничение
+            по числу записей, TTL, инвалидация по тегам и защита от
+            «набега» (single-flight: одно вычисление на ключ).
+
+Использование в роутере:
+    value = await response_cache.get_or_set(
+        "brand:apple", build, tags=("brand:apple",))
+
+build — функция (обычная или async) без аргументов; пока она считается,
+остальные запросы с тем же ключом ждут её результат, а не идут в БД.
+Загрузчик после commit вызывает response_cache.invalidate(*теги) —
+записи с этими тегами удаляются сразу, не дожидаясь TTL.
+
+Хранилище выбирается переменной окружения CACHE_URL:
+    memory://                 — словарь в памяти процесса (по умолчанию)
+    sqlite:///cache.db        — файл SQLite, общий для нескольких
+                                воркеров uvicorn на одной машине
+Single-flight работает внутри процесса: разные воркеры при промахе
+посчитают значение каждый сам, но инвалидацию увидят все.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import inspect
+import os
+import pickle
+import sqlite3
+import threading
+import time
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Iterable, Protocol
+
+from dotenv import load_dotenv
+
+load_dotenv(Path(__file__).parent / ".env")
+
+
+# ===========================================================================
+# Хранилища
+# ===========================================================================
+
+
+class CacheBackend(Protocol):
+    """Что нужно от хранилища. Все методы потокобезопасны.
+
+    blocking — методы ходят на диск: Cache вызывает их из цикла событий
+    через asyncio.to_thread.
+    """
+
+    blocking: bool
+
+    def get(self, key: str) -> Any | None: ...
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str]) -> None: ...
+    def delete(self, key: str) -> None: ...
+    def invalidate(self, tags: Iterable[str]) -> int: ...
+    def clear(self) -> None: ...
+    def __len__(self) -> int: ...
+
+
+class MemoryBackend:
+    """LRU в памяти процесса: OrderedDict + индекс тег → ключи."""
+
+    blocking = False
+
+    def __init__(self, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._entries: OrderedDict[str, tuple[float, Any, frozenset[str]]] = OrderedDict()
+        self._tags: dict[str, set[str]] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires, value, _tags = entry
+            if time.monotonic() > expires:
+                self._drop(key)
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str]) -> None:
+        tags = frozenset(tags)
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+            self._entries[key] = (time.monotonic() + ttl, value, tags)
+            for tag in tags:
+                self._tags.setdefault(tag, set()).add(key)
+            while len(self._entries) > self.max_entries:
+                self._drop(next(iter(self._entries)))   # самая давняя
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            if key in self._entries:
+                self._drop(key)
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        with self._lock:
+            keys = set().union(*(self._tags.get(tag, ()) for tag in tags))
+            for key in keys:
+                self._drop(key)
+            return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._tags.clear()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def _drop(self, key: str) -> None:
+        """Удалить запись и её теги (под блокировкой)."""
+        _expires, _value, tags = self._entries.pop(key)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys is not None:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+
+class SQLiteBackend:
+    """LRU в файле SQLite — общий для всех процессов, открывших файл.
+
+    Значения хранятся через pickle, время — time.time() (monotonic у
+    разных процессов несравним). «Свежесть» для LRU — столбец used.
+
+    get только читает (в WAL чтение не ждёт блокировку записи): время
+    обращений копится в памяти и записывается пачкой в транзакции
+    следующего set, перед вытеснением лишних записей.
+    """
+
+    blocking = True
+
+    _DDL = (
+        "CREATE TABLE IF NOT EXISTS cache_entries ("
+        " key TEXT PRIMARY KEY, value BLOB NOT NULL,"
+        " expires REAL NOT NULL, used REAL NOT NULL)",
+        "CREATE INDEX IF NOT EXISTS cache_entries_used ON cache_entries (used)",
+        "CREATE TABLE IF NOT EXISTS cache_tags ("
+        " tag TEXT NOT NULL, key TEXT NOT NULL, PRIMARY KEY (tag, key))",
+        "CREATE INDEX IF NOT EXISTS cache_tags_key ON cache_tags (key)",
+    )
+
+    def __init__(self, path: str | Path, max_entries: int = 1024) -> None:
+        self.max_entries = max_entries
+        self._lock = threading.Lock()
+        self._touched: dict[str, float] = {}   # key → время последнего get
+        self._db = sqlite3.connect(str(path), timeout=30, isolation_level=None,
+                                   check_same_thread=False)
+        self._db.execute("PRAGMA journal_mode=WAL")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        for ddl in self._DDL:
+            self._db.execute(ddl)
+
+    def get(self, key: str) -> Any | None:
+        now = time.time()
+        with self._lock:
+            row = self._db.execute(
+                "SELECT value, expires FROM cache_entries WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                return None
+            if now > row[1]:
+                return None   # просроченную запись удалит set или invalidate
+            self._touched[key] = now
+        return pickle.loads(row[0])
+
+    def set(self, key: str, value: Any, ttl: float, tags: Iterable[str]) -> None:
+        now = time.time()
+        blob = pickle.dumps(value, protocol=pickle.HIGHEST_PROTOCOL)
+        with self._lock:
+            touched, self._touched = self._touched, {}
+            self._db.execute("BEGIN IMMEDIATE")
+            try:
+                self._db.executemany(
+                    "UPDATE cache_entries SET used = max(used, ?) WHERE key = ?",
+                    [(used, k) for k, used in touched.items()],
+                )
+                self._delete_keys([k for (k,) in self._db.execute(
+                    "SELECT key FROM cache_entries WHERE expires < ?", (now,))])
+                self._db.execute(
+                    "INSERT INTO cache_entries (key, value, expires, used) "
+                    "VALUES (?, ?, ?, ?) ON CONFLICT (key) DO UPDATE SET "
+                    "value = excluded.value, expires = excluded.expires, "
+                    "used = excluded.used",
+                    (key, blob, now + ttl, now),
+                )
+                self._db.execute("DELETE FROM cache_tags WHERE key = ?", (key,))
+                self._db.executemany(
+                    "INSERT INTO cache_tags (tag, key) VALUES (?, ?)",
+                    [(tag, key) for tag in set(tags)],
+                )
+                excess = self._db.execute(
+                    "SELECT key FROM cache_entries ORDER BY used LIMIT max(0, "
+                    "(SELECT count(*) FROM cache_entries) - ?)", (self.max_entries,)
+                ).fetchall()
+                self._delete_keys([k for (k,) in excess])
+                self._db.execute("COMMIT")
+            except BaseException:
+                self._db.execute("ROLLBACK")
+                raise
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._delete_keys([key])
+
+    def invalidate(self, tags: Iterable[str]) -> int:
+        tags = list(set(tags))
+        if not tags:
+            return 0
+        marks = ",".join("?" * len(tags))
+        with self._lock:
+            keys = [k for (k,) in self._db.execute(
+                f"SELECT DISTINCT key FROM cache_tags WHERE tag IN ({marks})", tags)]
+            self._delete_keys(keys)
+        return len(keys)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._db.execute("DELETE FROM cache_tags")
+            self._db.execute("DELETE FROM cache_entries")
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self._db.execute("SELECT count(*) FROM cache_entries").fetchone()[0]
+
+    def _delete_keys(self, keys: list[str]) -> None:
+        params = [(k,) for k in keys]
+        self._db.executemany("DELETE FROM cache_entries WHERE key = ?", params)
+        self._db.executemany("DELETE FROM cache_tags WHERE key = ?", params)
+
+
+def make_backend(url: str | None, max_entries: int = 1024) -> CacheBackend:
+    """Хранилище по CACHE_URL: memory:// (или пусто) либо sqlite:///путь."""
+    if not url or url == "memory://":
+        return MemoryBackend(max_entries)
+    if url.startswith("sqlite:///"):
+        return SQLiteBackend(url[len("sqlite:///"):], max_entries)
+    raise ValueError(f"Неизвестное хранилище кэша: {url!r} "
+                     "(ожидается memory:// или sqlite:///путь)")
+
+
+# ===========================================================================
+# Кэш
+# ===========================================================================
+
+
+class Cache:
+    """Кэш поверх хранилища: TTL по умолчанию, теги, single-flight.
+
+    Значение считается отдельной задачей, не принадлежащей ни одному
+    запросу: если запрос, начавший вычисление, отменён (клиент ушёл),
+    остальные ждущие всё равно получают результат.
+
+    Если пока значение считалось, пришла инвалидация одного из его тегов,
+    результат отдаётся ждущим запросам, но в кэш не кладётся — он мог
+    быть прочитан из БД до commit загрузчика. Инвалидация других тегов
+    на него не влияет. Загрузчик инвалидирует из рабочего потока, поэтому
+    номера поколений тегов растут под блокировкой, а после записи в кэш
+    они проверяются ещё раз.
+
+    Хранилище с blocking=True (SQLite) вызывается из get_or_set через
+    asyncio.to_thread, чтобы не держать цикл событий на дисковом I/O.
+    """
+
+    def __init__(self, backend: CacheBackend, ttl: float = 300.0) -> None:
+        self.backend = backend
+        self.ttl = ttl
+        self._inflight: dict[str, asyncio.Future] = {}
+        self._generation = 0                      # растёт при clear()
+        self._tag_generations: dict[str, int] = {}   # тег → число инвалидаций
+        self._generation_lock = threading.Lock()
+
+    def get(self, key: str) -> Any | None:
+        return self.backend.get(key)
+
+    def set(self, key: str, value: Any, *, tags: Iterable[str] = (),
+            ttl: float | None = None) -> None:
+        self.backend.set(key, value, self.ttl if ttl is None else ttl, tags)
+
+    async def get_or_set(
+        self,
+        key: str,
+        compute: Callable[[], Any | Awaitable[Any]],
+        *,
+        tags: Iterable[str] = (),
+        ttl: float | None = None,
+    ) -> Any:
+        """Значение из кэша, иначе compute() — не более одного на ключ сразу."""
+        value = await self._call(self.backend.get, key)
+        if value is not None:
+            return value
+
+        task = self._inflight.get(key)
+        if task is None:
+            tags = tuple(tags)
+            task = asyncio.ensure_future(
+                self._compute(key, compute, tags, ttl, self._generations(tags)))
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finished(key, t))
+        # shield: отмена этого запроса не отменяет общее вычисление
+        return await asyncio.shield(task)
+
+    async def _compute(self, key: str, compute: Callable[[], Any | Awaitable[Any]],
+                       tags: tuple[str, ...], ttl: float | None,
+                       generations: tuple[int, ...]) -> Any:
+        value = compute()
+        if inspect.isawaitable(value):
+            value = await value
+        if generations == self._generations(tags):
+            await self._call(self.backend.set, key, value,
+                             self.ttl if ttl is None else ttl, tags)
+            # Инвалидация из другого потока могла пройти между проверкой
+            # и записью — тогда запись убираем сами
+            if generations != self._generations(tags):
+                await self._call(self.backend.delete, key)
+        return value
+
+    async def _call(self, method: Callable[..., Any], *args: Any) -> Any:
+        """Вызов хранилища: дисковое — в потоке, в памяти — сразу."""
+        if self.backend.blocking:
+            return await asyncio.to_thread(method, *args)
+        return method(*args)
+
+    def _finished(self, key: str, task: asyncio.Future) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()   # ждущих может не остаться — не ругаться в лог
+
+    def _generations(self, tags: tuple[str, ...]) -> tuple[int, ...]:
+        return (self._generation, *(self._tag_generations.get(t, 0) for t in tags))
+
+    def invalidate(self, *tags: str) -> int:
+        """Удалить записи с любым из тегов. Можно вызывать из любого потока."""
+        with self._generation_lock:
+            for tag in tags:
+                self._tag_generations[tag] = self._tag_generations.get(tag, 0) + 1
+        return self.backend.invalidate(tags)
+
+    def clear(self) -> None:
+        with self._generation_lock:
+            self._generation += 1
+        self.backend.clear()
+
+    def __len__(self) -> int:
+        return len(self.backend)
+
+
+# Общий экземпляр для роутеров и загрузчика
+response_cache = Cache(
+    make_backend(os.getenv("CACHE_URL"),
+                 max_entries=int(os.getenv("CACHE_MAX_ENTRIES", "1024"))),
+    ttl=float(os.getenv("CACHE_TTL", "300")),
+)
@@ -0,0 +1,142 @@
+"""
+Продвинутый Python — Итоговый проект
+-------------------------------------
+Модуль: catalog_stats.py
+Назначение: материализованная статистика каталога для /statistics/.
+
+Два уровня:
+    stats_category_brand — агрегаты по паре (категория, бренд). Загрузчик
+        пересчитывает строки категорий пакета в той же транзакции, что и
+        запись товаров (update_group_stats): сканируются только товары
+        этих категорий, а не весь каталог.
+    stats_snapshot — готовые строки ответа: итог по каталогу и разбивки
+        по категориям и брендам. Собирается из stats_category_brand (сотни
+        строк, а не товары и отзывы) и заменяется целиком одной
+        транзакцией в конце DummyJSONLoader.load() (refresh_snapshot) —
+        читатели видят либо старую, либо новую статистику целиком.
+
+/statistics/ читает одну строку snapshot по первичному ключу.
+Функции синхронные (для скриптов и AsyncSession.run_sync) и не делают
+commit — транзакцией управляет вызывающий.
+"""
+
+from __future__ import annotations
+
+from collections import defaultdict
+from typing import Iterable
+
+from sqlalchemy import case, delete, func, select, true
+from sqlalchemy.orm import Session
+
+from database import dialect_insert
+from models import (Brand, Category, CategoryBrandStats, Product, Review,
+                    StatisticsSnapshot)
+
+# Товар считается заканчивающимся, если на складе меньше
+LOW_STOCK_THRESHOLD = 10
+
+# Имя группы для товаров без категории / бренда (id 0 в stats_category_brand)
+_NO_NAME = "(нет)"
+
+
+def update_group_stats(db: Session, category_ids: Iterable[int] | None = None) -> None:
+    """Пересчитать stats_category_brand для category_ids (None — для всех)."""
+    ids = None if category_ids is None else sorted(set(category_ids))
+    if ids is not None and not ids:
+        return
+
+    review_count = (
+        select(func.count(Review.id))
+        .where(Review.product_id == Product.id)
+        .scalar_subquery()
+    )
+    per_product = select(
+        func.coalesce(Product.category_id, 0).label("category_id"),
+        func.coalesce(Product.brand_id, 0).label("brand_id"),
+        Product.price,
+        Product.stock,
+        review_count.label("reviews"),
+    )
+    clear = delete(CategoryBrandStats)
+    if ids is not None:
+        per_product = per_product.where(Product.category_id.in_(ids))
+        clear = clear.where(CategoryBrandStats.category_id.in_(ids))
+    per_product = per_product.subquery()
+
+    grouped = select(
+        per_product.c.category_id,
+        per_product.c.brand_id,
+        func.count(),
+        func.sum(case((per_product.c.stock < LOW_STOCK_THRESHOLD, 1), else_=0)),
+        func.sum(per_product.c.price),
+        func.sum(per_product.c.reviews),
+    ).where(true()).group_by(per_product.c.category_id, per_product.c.brand_id)
+    # WHERE true — SQLite требует WHERE в INSERT … SELECT перед ON CONFLICT
+
+    # Upsert, а не просто INSERT: пакет той же категории из параллельной
+    # загрузки мог вставить строки после нашего DELETE
+    columns = ["category_id", "brand_id", "products", "low_stock", "price_sum", "reviews"]
+    stmt = dialect_insert(db)(CategoryBrandStats).from_select(columns, grouped)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["category_id", "brand_id"],
+        set_={col: stmt.excluded[col] for col in columns[2:]},
+    )
+    db.execute(clear)
+    db.execute(stmt)
+
+
+def refresh_snapshot(db: Session) -> None:
+    """Заменить stats_snapshot сводкой по текущим stats_category_brand."""
+    groups = db.execute(select(
+        CategoryBrandStats.category_id, CategoryBrandStats.brand_id,
+        CategoryBrandStats.products, CategoryBrandStats.low_stock,
+        CategoryBrandStats.price_sum, CategoryBrandStats.reviews,
+    )).all()
+    category_names = dict(db.execute(select(Category.id, Category.name)).all())
+    brand_names = dict(db.execute(select(Brand.id, Brand.name)).all())
+
+    # [товары, заканчиваются, сумма цен, отзывы, множество «других» групп]
+    def acc() -> list:
+        return [0, 0, 0.0, 0, set()]
+
+    total = acc()
+    by_category: dict[int, list] = defaultdict(acc)
+    by_brand: dict[int, list] = defaultdict(acc)
+    for category_id, brand_id, products, low_stock, price_sum, reviews in groups:
+        for target, other in ((total, None), (by_category[category_id], brand_id),
+                              (by_brand[brand_id], category_id)):
+            target[0] += products
+            target[1] += low_stock
+            target[2] += price_sum
+            target[3] += reviews
+            target[4].add(other)
+
+    def row(kind: str, name: str, values: list, brands: int, categories: int) -> dict:
+        products, low_stock, price_sum, reviews, _ = values
+        return {
+            "kind": kind, "name": name, "products": products, "low_stock": low_stock,
+            "avg_price": round(price_sum / products, 2) if products else None,
+            "reviews": reviews, "brands": brands, "categories": categories,
+        }
+
+    rows = [row("total", "", total, len(brand_names), len(category_names))]
+    rows += [row("category", category_names.get(cid, _NO_NAME), values,
+                 len(values[4]), 1) for cid, values in by_category.items()]
+    rows += [row("brand", brand_names.get(bid, _NO_NAME), values,
+                 1, len(values[4])) for bid, values in by_brand.items()]
+
+    # Upsert, а не просто INSERT: параллельный пересчёт (вторая загрузка
+    # или первые запросы /statistics/) мог вставить строки после DELETE
+    stmt = dialect_insert(db)(StatisticsSnapshot.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["kind", "name"],
+        set_={col: stmt.excluded[col] for col in rows[0] if col not in ("kind", "name")},
+    )
+    db.execute(delete(StatisticsSnapshot))
+    db.execute(stmt, rows)
+
+
+def rebuild_statistics(db: Session) -> None:
+    """Пересчитать всё с нуля (данные записаны не загрузчиком)."""
+    update_group_stats(db)
+    refresh_snapshot(db)
@@ -0,0 +1,42 @@
+"""
+Продвинутый Python — Итоговый проект
+-------------------------------------
+Модуль: conftest.py
+Назначение: настройка pytest для регрессионных тестов — SQLite во
+            временной папке вместо PostgreSQL и кэш ответов в памяти.
+
+Переменные окружения задаются до импорта database: engine создаётся
+при импорте модуля.
+
+Запуск (из папки final/):
+    python -m pytest -q
+"""
+
+from __future__ import annotations
+
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import pytest
+
+_TMP = tempfile.mkdtemp(prefix="final-tests-")
+os.environ["DATABASE_URL"] = f"sqlite:///{Path(_TMP) / 'test.db'}"
+os.environ.pop("ASYNC_DATABASE_URL", None)
+os.environ["CACHE_URL"] = "memory://"
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+
+@pytest.fixture
+def clean_db():
+    """Пустая схема и пустой кэш ответов перед каждым тестом."""
+    from cache import response_cache
+    from database import Base, engine
+    from models import create_schema
+
+    Base.metadata.drop_all(bind=engine)
+    with engine.begin() as conn:
+        create_schema(conn)
+    response_cache.clear()
+    yield engine
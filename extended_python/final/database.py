@@ -3,18 +3,31 @@
 -------------------------------------
 Модуль: database.py
 Назначение: настройка подключения к PostgreSQL через SQLAlchemy,
-            фабрика сессий и зависимость FastAPI get_db.
+            фабрики сессий и зависимости FastAPI.
+
+Два движка на одну БД:
+    async_engine / AsyncSessionLocal / get_async_db — для приложения:
+        роутеры и загрузчик не блокируют цикл событий на запросах к БД
+        (драйвер asyncpg, для SQLite — aiosqlite);
+    engine / SessionLocal / get_db — синхронный путь для скриптов
+        (замеры, проверки, создание таблиц из консоли).
+Соединения открываются при первом запросе, поэтому движок, которым
+процесс не пользуется, подключений не держит.
 """
 
 from __future__ import annotations
 
 import os
 from pathlib import Path
+from typing import Any, AsyncIterator, Awaitable, Callable, TypeVar
 
 from dotenv import load_dotenv
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import DeclarativeBase, Session, sessionmaker
 
+T = TypeVar("T")
+
 # Загружаем .env из папки этого файла
 load_dotenv(Path(__file__).parent / ".env")
 
@@ -29,20 +42,44 @@ _DB_HOST     = os.getenv("DB_HOST",     "localhost")
 _DB_PORT     = os.getenv("DB_PORT",     "5432")
 _DB_NAME     = os.getenv("DB_NAME",     "synergy")
 
-DATABASE_URL = (
+# DATABASE_URL целиком переопределяет параметры выше — например,
+# sqlite:///bench.db для замеров и скриптов без PostgreSQL.
+DATABASE_URL = os.getenv("DATABASE_URL") or (
     f"postgresql+psycopg2://{_DB_USER}:{_DB_PASSWORD}"
     f"@{_DB_HOST}:{_DB_PORT}/{_DB_NAME}"
 )
 
+# Асинхронный драйвер для той же БД
+_ASYNC_DRIVERS = {"postgresql": "asyncpg", "sqlite": "aiosqlite"}
+
+
+def _async_url(url: str) -> str:
+    parsed = make_url(url)
+    driver = _ASYNC_DRIVERS.get(parsed.get_backend_name())
+    if driver is None:
+        return url
+    parsed = parsed.set(drivername=f"{parsed.get_backend_name()}+{driver}")
+    return parsed.render_as_string(hide_password=False)
+
+
+# ASYNC_DATABASE_URL — если асинхронный адрес нужен другой
+ASYNC_DATABASE_URL = os.getenv("ASYNC_DATABASE_URL") or _async_url(DATABASE_URL)
+
 # ===========================================================================
 # Engine и фабрика сессий
 # ===========================================================================
 
+POOL_SIZE    = 10
+MAX_OVERFLOW = 20
+
+# Больше соединений пул не выдаст; писателей загрузчика не больше этого
+MAX_DB_CONNECTIONS = POOL_SIZE + MAX_OVERFLOW
+
 engine = create_engine(
     DATABASE_URL,
     pool_pre_ping=True,   # проверять соединение перед использованием
-    pool_size=10,
-    max_overflow=20,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
     echo=False,
 )
 
@@ -53,6 +90,20 @@ SessionLocal = sessionmaker(
     expire_on_commit=False,
 )
 
+async_engine = create_async_engine(
+    ASYNC_DATABASE_URL,
+    pool_pre_ping=True,
+    pool_size=POOL_SIZE,
+    max_overflow=MAX_OVERFLOW,
+    echo=False,
+)
+
+AsyncSessionLocal = async_sessionmaker(
+    bind=async_engine,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 
 # ===========================================================================
 # Базовый класс ORM-моделей
@@ -63,6 +114,15 @@ class Base(DeclarativeBase):
     """Базовый класс для всех SQLAlchemy-моделей проекта."""
 
 
+def dialect_insert(db: Session):
+    """insert() с поддержкой ON CONFLICT для диалекта текущей БД."""
+    if db.get_bind().dialect.name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    else:
+        from sqlalchemy.dialects.sqlite import insert
+    return insert
+
+
 # ===========================================================================
 # Зависимость FastAPI
 # ===========================================================================
@@ -75,3 +135,25 @@ def get_db():
         yield db
     finally:
         db.close()
+
+
+def run_in_session(func: Callable[..., T], *args: Any) -> T:
+    """Вызвать func(db, *args) в новой синхронной сессии и закрыть её."""
+    with SessionLocal() as db:
+        return func(db, *args)
+
+
+async def get_async_db() -> AsyncIterator[AsyncSession]:
+    """Асинхронная сессия БД — Depends(get_async_db) в роутерах."""
+    async with AsyncSessionLocal() as db:
+        yield db
+
+
+async def run_in_async_session(func: Callable[..., Awaitable[T]], *args: Any) -> T:
+    """Выполнить await func(db, *args) в новой асинхронной сессии.
+
+    Для эндпоинтов с кэшем: сессия открывается только при промахе, а
+    попадание обходится без зависимости FastAPI на каждый запрос.
+    """
+    async with AsyncSessionLocal() as db:
+        return await func(db, *args)
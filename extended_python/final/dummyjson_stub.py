@@ -0,0 +1,160 @@
+"""
+Продвинутый Python — Итоговый проект
+-------------------------------------
+Модуль: dummyjson_stub.py
+Назначение: локальная заглушка API DummyJSON (aiohttp.web) для тестов и
+            замеров загрузчика без выхода в интернет.
+
+Эндпоинты (как у dummyjson.com):
+    GET /products/category-list       — список категорий
+    GET /products/category/{name}     — {"products": [...]} одной категории
+
+Ответ категории снабжается ETag (хэш тела); на совпавший If-None-Match
+возвращается 304 без тела — как условные запросы у dummyjson.com. С
+etag=False (--no-etag) заголовка нет, и загрузчик сравнивает хэш тела.
+
+Запуск отдельным процессом:
+    python dummyjson_stub.py --port 8900 --products 2000 --latency 0.05
+    DUMMYJSON_URL=http://127.0.0.1:8900/products python -m uvicorn main:app
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import hashlib
+import json
+import random
+from typing import Any
+
+from aiohttp import web
+
+
+# ===========================================================================
+# Синтетические данные
+# ===========================================================================
+
+
+def make_products(n: int, n_brands: int = 300, n_categories: int = 30,
+                  reviews_per_product: int = 3, seed: int = 0) -> list[dict[str, Any]]:
+    """n товаров в формате ответа DummyJSON."""
+    rnd = random.Random(seed)
+    return [
+        {
+            "id":          i,
+            "title":       f"Product {i}",
+            "description": f"Synthetic product number {i}",
+            "price":       round(rnd.uniform(1, 2000), 2),
+            "stock":       rnd.randint(0, 200),
+            "rating":      round(rnd.uniform(1, 5), 2),
+            "thumbnail":   f"https://cdn.example.com/{i}.webp",
+            "brand":       f"Brand {rnd.randrange(n_brands)}",
+            "category":    f"category-{rnd.randrange(n_categories)}",
+            "reviews": [
+                {
+                    "rating":        rnd.randint(1, 5),
+                    "comment":       "Great!",
+                    "reviewerName":  f"User {rnd.randrange(10_000)}",
+                    "reviewerEmail": f"user{rnd.randrange(10_000)}@example.com",
+                }
+                for _ in range(reviews_per_product)
+            ],
+        }
+        for i in range(1, n + 1)
+    ]
+
+
+def group_by_category(products: list[dict[str, Any]]) -> dict[str, list[dict[str, Any]]]:
+    catalog: dict[str, list[dict[str, Any]]] = {}
+    for product in products:
+        catalog.setdefault(product["category"], []).append(product)
+    return catalog
+
+
+# ===========================================================================
+# Сервер-заглушка
+# ===========================================================================
+
+
+class DummyJSONStub:
+    """HTTP-заглушка DummyJSON поверх словаря {категория: [товары]}.
+
+    latency — искусственная задержка ответа на категорию, секунд.
+    Каталог можно менять между запросами (self.catalog).
+    not_modified — сколько запросов категорий получили 304.
+    """
+
+    def __init__(self, catalog: dict[str, list[dict[str, Any]]],
+                 latency: float = 0.0, etag: bool = True) -> None:
+        self.catalog      = catalog
+        self.latency      = latency
+        self.etag         = etag
+        self.requests     = 0
+        self.not_modified = 0
+        self._runner: web.AppRunner | None = None
+
+        self.app = web.Application()
+        self.app.router.add_get("/products/category-list", self._category_list)
+        self.app.router.add_get("/products/category/{name}", self._category)
+
+    async def _category_list(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        return web.json_response(list(self.catalog))
+
+    async def _category(self, request: web.Request) -> web.Response:
+        self.requests += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        products = self.catalog.get(request.match_info["name"])
+        if products is None:
+            raise web.HTTPNotFound()
+        body = json.dumps({"products": products, "total": len(products)}).encode()
+        if not self.etag:
+            return web.Response(body=body, content_type="application/json")
+        etag = f'W/"{hashlib.sha1(body).hexdigest()}"'
+        if request.headers.get("If-None-Match") == etag:
+            self.not_modified += 1
+            return web.Response(status=304, headers={"ETag": etag})
+        return web.Response(body=body, content_type="application/json",
+                            headers={"ETag": etag})
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """Запустить сервер; вернуть базовый URL для DummyJSONLoader.BASE_URL."""
+        self._runner = web.AppRunner(self.app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = self._runner.addresses[0][1]
+        return f"http://{host}:{port}/products"
+
+    async def stop(self) -> None:
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+# ===========================================================================
+# Точка входа
+# ===========================================================================
+
+
+async def _serve(args: argparse.Namespace) -> None:
+    stub = DummyJSONStub(group_by_category(make_products(args.products)),
+                         latency=args.latency, etag=not args.no_etag)
+    url = await stub.start(port=args.port)
+    print(f"Заглушка DummyJSON: {url} ({args.products} товаров)")
+    await asyncio.Event().wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--port", type=int, default=8900)
+    parser.add_argument("--products", type=int, default=2000)
+    parser.add_argument("--latency", type=float, default=0.0)
+    parser.add_argument("--no-etag", action="store_true",
+                        help="не отдавать ETag (загрузчик сравнит хэш тела)")
+    try:
+        asyncio.run(_serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
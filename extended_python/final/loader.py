@@ -7,17 +7,54 @@
 
 Алгоритм:
     1. Получить список всех категорий DummyJSON (/products/categories).
-    2. Разбить категории на пакеты (batch_size).
-    3. Параллельно (asyncio.gather) скачать товары каждого пакета (К2).
-    4. Разобрать каждый товар на сущности: Brand, Category, Product, Review.
-    5. Асинхронно (через run_in_executor) сохранить всё в PostgreSQL (К3).
+    2. Параллельно (asyncio.gather, не более batch_size запросов сразу)
+       скачать товары категорий (К2) и класть их в ограниченную очередь.
+    3. Писатели разбирают очередь: разбор товара на сущности Brand,
+       Category, Product, Review и сохранение в PostgreSQL через
+       AsyncSession (К3) — одновременно с загрузкой следующих категорий.
+
+Сохранение пакетное (_save_products): бренды и категории пакета —
+по одному INSERT … ON CONFLICT DO NOTHING и одному SELECT id, товары —
+одним executemany с ON CONFLICT DO UPDATE, отзывы заменяются через
+временные staging-таблицы. Число запросов не зависит от размера пакета.
+Прежний построчный путь оставлен как _save_products_orm (для сравнения,
+см. bench_ingest.py). Обе функции синхронные — ими же пользуются скрипты;
+загрузчик вызывает их через AsyncSession.run_sync: запросы идут через
+асинхронный драйвер, цикл событий на ожидании БД не блокируется.
+
+Справочники брендов и категорий кэшируются в DimensionCache (name → id):
+кэш заполняется одним запросом в начале load(), и запросы к справочникам
+делаются только для действительно новых имён.
+
+После каждого commit сбрасываются закэшированные ответы API, которых
+коснулась запись (_invalidate_responses): список товаров, список брендов
+и страницы категорий / брендов пакета.
+
+Инкрементальный режим (load(incremental=True), по умолчанию для
+POST /update): категория запрашивается с If-None-Match / If-Modified-Since
+из прошлой загрузки и пропускается при 304 или если тело ответа совпало
+с сохранённым хэшем (source_categories). В изменившейся категории
+перезаписываются только товары, хэш исходного JSON которых изменился
+(source_products), и отзывы только этих товаров. Состояние источника
+пишется в той же транзакции, что и товары, — при сбое категория будет
+загружена заново.
+
+Статистика для /statistics/ считается по ходу записи: вместе с товарами
+пакета в той же транзакции пересчитываются агрегаты его категорий
+(catalog_stats.update_group_stats), а в конце load() готовая сводка
+заменяется одной транзакцией (refresh_snapshot).
 """
 
 from __future__ import annotations
 
 import asyncio
+import hashlib
+import json
 import math
+import os
 import threading
+import time
+from dataclasses import asdict, dataclass
 from typing import Any
 
 try:
@@ -27,9 +64,14 @@ except ImportError as exc:  # pragma: no cover
         "Не найден пакет 'aiohttp'. Установите его командой: pip install aiohttp"
     ) from exc
 
+from sqlalchemy import literal, select, text, union_all
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
 from sqlalchemy.orm import Session
 
-from models import Brand, Category, Product, Review
+from cache import response_cache
+from catalog_stats import refresh_snapshot, update_group_stats
+from database import MAX_DB_CONNECTIONS, AsyncSessionLocal, dialect_insert
+from models import Brand, Category, Product, Review, SourceCategory, SourceProduct
 
 
 # ===========================================================================
@@ -48,6 +90,12 @@ def _split_into_batches(items: list[str], batch_size: int) -> list[list[str]]:
     return [items[i * batch_size : (i + 1) * batch_size] for i in range(n_batches)]
 
 
+def _payload_hash(raw: dict[str, Any]) -> str:
+    """Хэш исходного JSON товара, не зависящий от порядка ключей."""
+    payload = json.dumps(raw, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
 def _get_or_create_brand(db: Session, name: str) -> Brand:
     """Получить бренд из БД или создать новый (upsert по name)."""
     brand = db.query(Brand).filter(Brand.name == name).first()
@@ -68,13 +116,16 @@ def _get_or_create_category(db: Session, name: str) -> Category:
     return category
 
 
-def _save_products(db: Session, raw_products: list[dict[str, Any]]) -> int:
-    """Сохранить список сырых товаров DummyJSON в БД.
+def _save_products_orm(db: Session, raw_products: list[dict[str, Any]]) -> int:
+    """Сохранить список сырых товаров DummyJSON в БД (построчно через ORM).
 
     Разбирает каждый товар на Brand, Category, Product, Review.
     Возвращает количество сохранённых товаров.
+    Около пяти запросов на товар — используется для сравнения с
+    пакетным _save_products.
     """
     saved = 0
+    category_ids: set[int] = set()
     for raw in raw_products:
         product_id = raw.get("id")
         if product_id is None:
@@ -87,12 +138,15 @@ def _save_products(db: Session, raw_products: list[dict[str, Any]]) -> int:
         # --- Категория ---
         category_name = (raw.get("category") or "").strip() or "Unknown"
         category = _get_or_create_category(db, category_name)
+        category_ids.add(category.id)
 
         # --- Товар (upsert по id из DummyJSON) ---
         product = db.query(Product).filter(Product.id == product_id).first()
         if product is None:
             product = Product(id=product_id)
             db.add(product)
+        elif product.category_id is not None:
+            category_ids.add(product.category_id)   # товар мог сменить категорию
 
         product.title       = raw.get("title", "")
         product.description = raw.get("description")
@@ -119,10 +173,337 @@ def _save_products(db: Session, raw_products: list[dict[str, Any]]) -> int:
 
         saved += 1
 
+    update_group_stats(db, category_ids)
     db.commit()
+    _invalidate_responses(
+        {(raw.get("brand") or "").strip() or "Unknown" for raw in raw_products},
+        {(raw.get("category") or "").strip() or "Unknown" for raw in raw_products},
+    )
     return saved
 
 
+# ===========================================================================
+# Пакетное сохранение (upsert)
+# ===========================================================================
+
+# Временные таблицы живут в рамках соединения; строки чистятся после
+# каждого пакета, поэтому IF NOT EXISTS достаточно.
+_STAGING_DDL = (
+    "CREATE TEMPORARY TABLE IF NOT EXISTS staging_product_ids ("
+    " product_id INTEGER NOT NULL)",
+    "CREATE TEMPORARY TABLE IF NOT EXISTS staging_reviews ("
+    " product_id INTEGER NOT NULL, rating FLOAT, comment TEXT,"
+    " reviewer_name VARCHAR(255), reviewer_email VARCHAR(255))",
+)
+
+
+def _upsert_names(db: Session, model: type[Brand] | type[Category],
+                  names: set[str]) -> dict[str, int]:
+    """Вставить недостающие имена справочника и вернуть {name: id}.
+
+    Строки вставляются по возрастанию имени: параллельные писатели с
+    пересекающимися новыми именами берут блокировки в одном порядке и
+    не попадают во взаимную блокировку (deadlock в PostgreSQL).
+    """
+    if not names:
+        return {}
+    insert = dialect_insert(db)
+    db.execute(
+        insert(model.__table__).on_conflict_do_nothing(index_elements=["name"]),
+        [{"name": name} for name in sorted(names)],
+    )
+    rows = db.execute(select(model.name, model.id).where(model.name.in_(names)))
+    return dict(rows.all())
+
+
+# ===========================================================================
+# Кэш справочников (name → id)
+# ===========================================================================
+
+
+class DimensionCache:
+    """Кэш id брендов и категорий по имени, общий для писателей загрузчика.
+
+    Все писатели работают в потоке цикла событий (AsyncSession.run_sync),
+    поэтому блокировка не нужна. Новые id попадают в кэш только после
+    commit (remember), чтобы откат транзакции не оставил в кэше
+    несуществующих строк.
+    """
+
+    def __init__(self) -> None:
+        self._ids: dict[type, dict[str, int]] = {Brand: {}, Category: {}}
+
+    def preload(self, db: Session) -> None:
+        """Загрузить оба справочника одним запросом (UNION ALL)."""
+        query = union_all(
+            select(literal("brand"), Brand.name, Brand.id),
+            select(literal("category"), Category.name, Category.id),
+        )
+        ids: dict[type, dict[str, int]] = {Brand: {}, Category: {}}
+        for kind, name, id_ in db.execute(query):
+            ids[Brand if kind == "brand" else Category][name] = id_
+        self._ids = ids
+
+    def resolve(self, db: Session, model: type[Brand] | type[Category],
+                names: set[str]) -> tuple[dict[str, int], dict[str, int]]:
+        """id для names: (все найденные, новые — ещё не в кэше).
+
+        В БД идут только имена, которых нет в кэше.
+        """
+        known = self._ids[model]
+        found = {name: known[name] for name in names if name in known}
+        missing = names - found.keys()
+        new = _upsert_names(db, model, missing) if missing else {}
+        return {**found, **new}, new
+
+    def remember(self, model: type[Brand] | type[Category],
+                 ids: dict[str, int]) -> None:
+        """Добавить в кэш id, записанные зафиксированной транзакцией."""
+        self._ids[model].update(ids)
+
+    def __len__(self) -> int:
+        return sum(len(ids) for ids in self._ids.values())
+
+
+def _save_products(db: Session, raw_products: list[dict[str, Any]],
+                   cache: DimensionCache | None = None,
+                   source: dict[str, Any] | None = None,
+                   incremental: bool = False) -> int:
+    """Сохранить список сырых товаров DummyJSON в БД пакетно (_write_batch)
+    и сразу сбросить затронутые ответы API.
+
+    Возвращает количество записанных товаров.
+    """
+    saved, brand_names, category_names = _write_batch(
+        db, raw_products, cache, source, incremental)
+    if saved:
+        _invalidate_responses(brand_names, category_names)
+    return saved
+
+
+def _write_batch(db: Session, raw_products: list[dict[str, Any]],
+                 cache: DimensionCache | None = None,
+                 source: dict[str, Any] | None = None,
+                 incremental: bool = False) -> tuple[int, set[str], set[str]]:
+    """Записать пакет сырых товаров DummyJSON в БД и сделать commit.
+
+    Бренды и категории — одним upsert каждый (или из cache, если имя уже
+    известно), товары — одним executemany с ON CONFLICT DO UPDATE,
+    отзывы — через staging-таблицы. Хэши товаров пишутся в
+    source_products; с incremental=True записываются только товары, хэш
+    которых изменился. source — строка source_categories, сохраняется
+    в той же транзакции.
+    Возвращает (число записанных товаров, имена брендов и категорий,
+    страницы которых нужно сбросить в кэше ответов).
+    """
+    # Последняя версия товара с данным id (повтор id в одном INSERT
+    # PostgreSQL не допускает). Дальше всё пишется по возрастанию id —
+    # одинаковый порядок блокировок строк у параллельных писателей
+    by_id = {raw["id"]: raw for raw in raw_products if raw.get("id") is not None}
+    by_id = dict(sorted(by_id.items()))
+    hashes = {product_id: _payload_hash(raw) for product_id, raw in by_id.items()}
+    if incremental and by_id:
+        stored = dict(db.execute(
+            select(SourceProduct.product_id, SourceProduct.content_hash)
+            .where(SourceProduct.product_id.in_(by_id))
+        ).all())
+        by_id = {product_id: raw for product_id, raw in by_id.items()
+                 if stored.get(product_id) != hashes[product_id]}
+    if not by_id:
+        if source is not None:
+            _save_source(db, source)
+            db.commit()
+        return 0, set(), set()
+
+    def dim(raw: dict[str, Any], field: str) -> str:
+        return (raw.get(field) or "").strip() or "Unknown"
+
+    brand_names = {dim(r, "brand") for r in by_id.values()}
+    category_names = {dim(r, "category") for r in by_id.values()}
+
+    # Прежние категория и бренд товаров пакета: товар мог переехать, и
+    # статистику и кэш прежней категории / бренда тоже нужно обновить
+    previous = db.execute(
+        select(Product.category_id, Category.name, Brand.name)
+        .outerjoin(Product.category).outerjoin(Product.brand)
+        .where(Product.id.in_(by_id))
+    ).all()
+    previous_category_ids = {cid for cid, _, _ in previous if cid is not None}
+    previous_categories = {name for _, name, _ in previous if name is not None}
+    previous_brands = {name for _, _, name in previous if name is not None}
+
+    if cache is None:
+        brand_ids = _upsert_names(db, Brand, brand_names)
+        category_ids = _upsert_names(db, Category, category_names)
+        new_brands = new_categories = {}
+    else:
+        brand_ids, new_brands = cache.resolve(db, Brand, brand_names)
+        category_ids, new_categories = cache.resolve(db, Category, category_names)
+
+    # --- Товары ---
+    rows = [
+        {
+            "id":          product_id,
+            "title":       raw.get("title", ""),
+            "description": raw.get("description"),
+            "price":       float(raw.get("price", 0)),
+            "stock":       int(raw.get("stock", 0)),
+            "rating":      raw.get("rating"),
+            "thumbnail":   raw.get("thumbnail"),
+            "brand_id":    brand_ids[dim(raw, "brand")],
+            "category_id": category_ids[dim(raw, "category")],
+        }
+        for product_id, raw in by_id.items()
+    ]
+    # Core-таблица, а не ORM-сущность: без накладных расходов unit of work
+    stmt = dialect_insert(db)(Product.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["id"],
+        set_={col: stmt.excluded[col] for col in rows[0] if col != "id"},
+    )
+    db.execute(stmt, rows)
+
+    # --- Отзывы: staging → DELETE старых → INSERT … SELECT ---
+    for ddl in _STAGING_DDL:
+        db.execute(text(ddl))
+    db.execute(
+        text("INSERT INTO staging_product_ids (product_id) VALUES (:product_id)"),
+        [{"product_id": product_id} for product_id in by_id],
+    )
+    reviews = [
+        {
+            "product_id":     product_id,
+            "rating":         raw_review.get("rating"),
+            "comment":        raw_review.get("comment"),
+            "reviewer_name":  raw_review.get("reviewerName"),
+            "reviewer_email": raw_review.get("reviewerEmail"),
+        }
+        for product_id, raw in by_id.items()
+        for raw_review in raw.get("reviews", [])
+    ]
+    if reviews:
+        db.execute(
+            text("INSERT INTO staging_reviews (product_id, rating, comment, "
+                 "reviewer_name, reviewer_email) VALUES (:product_id, :rating, "
+                 ":comment, :reviewer_name, :reviewer_email)"),
+            reviews,
+        )
+    db.execute(text("DELETE FROM reviews WHERE product_id IN "
+                    "(SELECT product_id FROM staging_product_ids)"))
+    db.execute(text("INSERT INTO reviews (product_id, rating, comment, "
+                    "reviewer_name, reviewer_email) "
+                    "SELECT product_id, rating, comment, reviewer_name, "
+                    "reviewer_email FROM staging_reviews"))
+    db.execute(text("DELETE FROM staging_product_ids"))
+    db.execute(text("DELETE FROM staging_reviews"))
+
+    # --- Состояние источника ---
+    stmt = dialect_insert(db)(SourceProduct.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["product_id"],
+        set_={"content_hash": stmt.excluded.content_hash},
+    )
+    db.execute(stmt, [{"product_id": product_id, "content_hash": hashes[product_id]}
+                      for product_id in by_id])
+    if source is not None:
+        _save_source(db, source)
+
+    update_group_stats(db, {*category_ids.values(), *previous_category_ids})
+    db.commit()
+    if cache is not None:
+        cache.remember(Brand, new_brands)
+        cache.remember(Category, new_categories)
+    return len(by_id), brand_names | previous_brands, category_names | previous_categories
+
+
+def _save_source(db: Session, source: dict[str, Any]) -> None:
+    """Записать (upsert) строку source_categories."""
+    stmt = dialect_insert(db)(SourceCategory.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=["name"],
+        set_={col: stmt.excluded[col] for col in source if col != "name"},
+    )
+    db.execute(stmt, [source])
+
+
+def _known_sources(db: Session) -> dict[str, SourceCategory]:
+    """Состояние категорий после прошлой загрузки: {name: SourceCategory}."""
+    return {row.name: row for row in db.scalars(select(SourceCategory))}
+
+
+def _invalidate_responses(brand_names: set[str], category_names: set[str]) -> None:
+    """Сбросить кэш ответов API, затронутых записью пакета."""
+    response_cache.invalidate(
+        "products", "brands",
+        *(f"brand:{name.lower()}" for name in brand_names),
+        *(f"category:{name.lower()}" for name in category_names),
+    )
+
+
+async def _preload_in_session(session_factory: async_sessionmaker[AsyncSession],
+                              cache: DimensionCache,
+                              incremental: bool) -> dict[str, SourceCategory]:
+    async with session_factory() as db:
+        await db.run_sync(cache.preload)
+        return await db.run_sync(_known_sources) if incremental else {}
+
+
+async def _refresh_statistics(session_factory: async_sessionmaker[AsyncSession]) -> None:
+    async with session_factory() as db:
+        await db.run_sync(refresh_snapshot)
+        await db.commit()
+
+
+async def _save_in_session(session_factory: async_sessionmaker[AsyncSession],
+                           raw_products: list[dict[str, Any]],
+                           cache: DimensionCache | None = None,
+                           source: dict[str, Any] | None = None,
+                           incremental: bool = False) -> int:
+    """Сохранить товары в собственной сессии (одна на писателя).
+
+    Кэш ответов сбрасывается в отдельном потоке: у хранилища SQLite это
+    запись в файл, которая не должна занимать цикл событий.
+    """
+    async with session_factory() as db:
+        saved, brand_names, category_names = await db.run_sync(
+            _write_batch, raw_products, cache, source, incremental)
+    if saved:
+        await asyncio.to_thread(_invalidate_responses, brand_names, category_names)
+    return saved
+
+
+# ===========================================================================
+# Метрики загрузки
+# ===========================================================================
+
+
+@dataclass
+class LoadMetrics:
+    """Метрики одного прогона DummyJSONLoader.load.
+
+    fetch_seconds и save_seconds — суммы по всем запросам / сохранениям;
+    если они больше elapsed, значит работа действительно шла параллельно.
+    """
+
+    categories:    int   = 0
+    products:      int   = 0
+    fetch_seconds: float = 0.0
+    save_seconds:  float = 0.0
+    elapsed:       float = 0.0
+    max_queue:     int   = 0    # наибольшая длина очереди категорий
+    unchanged:     int   = 0    # категорий, пропущенных без записи (304 / тот же хэш)
+
+    @property
+    def products_per_second(self) -> float:
+        return self.products / self.elapsed if self.elapsed else 0.0
+
+    def as_dict(self) -> dict[str, float]:
+        return {
+            **asdict(self),
+            "products_per_second": round(self.products_per_second, 1),
+        }
+
+
 # ===========================================================================
 # DummyJSONLoader — асинхронная загрузка + сохранение в БД
 # ===========================================================================
@@ -135,12 +516,14 @@ class DummyJSONLoader:
 
     Ключевые методы:
     - ``fetch_all_categories``  — получить список всех категорий DummyJSON.
-    - ``load``                  — основной метод: скачать всё и сохранить в БД.
-    - ``_fetch_category``       — скачать товары одной категории асинхронно.
-    - ``_fetch_batch``          — параллельная загрузка пакета категорий (К2).
+    - ``load``                  — основной метод: конвейер загрузки и
+                                  сохранения в БД.
+    - ``_fetch_category_if_changed`` — скачать товары одной категории
+                                  асинхронно, если она изменилась (К2).
     """
 
-    BASE_URL = "https://dummyjson.com/products"
+    # DUMMYJSON_URL — например, адрес локальной заглушки (dummyjson_stub.py)
+    BASE_URL = os.getenv("DUMMYJSON_URL", "https://dummyjson.com/products")
 
     _instance: "DummyJSONLoader | None" = None
     _lock = threading.Lock()
@@ -152,12 +535,24 @@ class DummyJSONLoader:
                 cls._instance._initialized = False  # type: ignore[attr-defined]
         return cls._instance
 
-    def __init__(self, timeout: float = 30.0, batch_size: int = 5) -> None:
+    def __init__(
+        self,
+        timeout: float = 30.0,
+        batch_size: int = 5,
+        writers: int = 4,
+        queue_size: int = 8,
+    ) -> None:
         if getattr(self, "_initialized", False):
             return
+        if writers <= 0 or queue_size <= 0:
+            raise ValueError("writers и queue_size должны быть > 0")
 
         self._timeout    = aiohttp.ClientTimeout(total=timeout)
-        self._batch_size = batch_size
+        self._batch_size = batch_size    # одновременных загрузок категорий
+        self._writers    = min(writers, MAX_DB_CONNECTIONS)   # параллельных сохранений
+        self._queue_size = queue_size    # категорий в очереди между ними
+        # name → id брендов и категорий; заполняется в начале каждого load()
+        self._dimensions = DimensionCache()
         self._initialized = True
 
     # -----------------------------------------------------------------------
@@ -168,40 +563,100 @@ class DummyJSONLoader:
     def batch_size(self) -> int:
         return self._batch_size
 
+    @property
+    def writers(self) -> int:
+        return self._writers
+
     # -----------------------------------------------------------------------
     # Основной метод загрузки (К1, К2, К3)
     # -----------------------------------------------------------------------
 
-    async def load(self, db: Session) -> dict[str, int]:
+    async def load(
+        self,
+        session_factory: async_sessionmaker[AsyncSession] = AsyncSessionLocal,
+        incremental: bool = True,
+    ) -> tuple[dict[str, int], LoadMetrics]:
         """Скачать все товары с DummyJSON и асинхронно сохранить в БД (К3).
 
-        Алгоритм:
+        Конвейер «производитель — потребитель»:
         1. Получить список категорий.
-        2. Разбить на пакеты (batch_size).
-        3. Каждый пакет загрузить параллельно (asyncio.gather) (К2).
-        4. Сохранить результаты в БД через run_in_executor (К3).
-
-        Возвращает словарь {category: кол-во сохранённых товаров}.
+        2. Задачи загрузки (не более batch_size одновременно, К2) кладут
+           товары каждой категории в ограниченную очередь asyncio.Queue —
+           если писатели не успевают, загрузка ждёт.
+        3. writers писателей разбирают очередь и сохраняют категории через
+           AsyncSession (К3); каждое сохранение открывает свою сессию из
+           session_factory (сессию нельзя делить между задачами). Если
+           одновременных load() много, лишние сохранения ждут свободное
+           соединение в очереди асинхронного пула.
+           Сеть и запись в БД идут одновременно, барьеров между пакетами нет.
+        4. Справочники берутся из кэша, загруженного одним запросом.
+        5. Когда всё записано, сводная статистика заменяется одной
+           транзакцией (её агрегаты по категориям уже посчитаны при записи).
+
+        incremental=True — условные запросы по состоянию прошлой загрузки:
+        неизменившиеся категории не попадают в очередь, в остальных
+        пишутся только изменившиеся товары. incremental=False —
+        перезаписать всё (состояние источника при этом обновляется).
+
+        Возвращает ({category: кол-во записанных товаров}, метрики прогона).
+        Метрики не хранятся в загрузчике: он общий (Singleton), и
+        одновременные load() не должны видеть метрики друг друга.
         """
-        async with aiohttp.ClientSession(timeout=self._timeout) as session:
-            categories = await self.fetch_all_categories(session)
-            batches    = _split_into_batches(categories, self._batch_size)
-
-            result: dict[str, int] = {}
-            loop = asyncio.get_event_loop()
-
-            for batch in batches:
-                # Параллельная загрузка пакета (К2)
-                raw_by_category = await self._fetch_batch(session, batch)
+        started = time.perf_counter()
+        metrics = LoadMetrics()
+        known = await _preload_in_session(session_factory, self._dimensions,
+                                          incremental)
 
-                for category_name, raw_products in raw_by_category.items():
-                    # Асинхронное сохранение в БД через пул потоков (К3)
-                    saved = await loop.run_in_executor(
-                        None, _save_products, db, raw_products
-                    )
-                    result[category_name] = saved
+        result: dict[str, int] = {}
+        queue: asyncio.Queue[tuple[list[dict[str, Any]], dict[str, Any]] | None] = \
+            asyncio.Queue(maxsize=self._queue_size)
 
-        return result
+        async with aiohttp.ClientSession(timeout=self._timeout) as session:
+            categories = await self.fetch_all_categories(session)
+            metrics.categories = len(categories)
+            semaphore = asyncio.Semaphore(self._batch_size)
+
+            async def fetch(category: str) -> None:
+                async with semaphore:
+                    t0 = time.perf_counter()
+                    fetched = await self._fetch_category_if_changed(
+                        session, category, known.get(category))
+                    metrics.fetch_seconds += time.perf_counter() - t0
+                if fetched is None:
+                    metrics.unchanged += 1
+                    result[category] = 0
+                    return
+                await queue.put(fetched)
+                metrics.max_queue = max(metrics.max_queue, queue.qsize())
+
+            async def produce() -> None:
+                await asyncio.gather(*(fetch(c) for c in categories))
+                for _ in range(self._writers):
+                    await queue.put(None)   # сигнал писателям: данных больше нет
+
+            async def write() -> None:
+                while (item := await queue.get()) is not None:
+                    raw_products, source = item
+                    t0 = time.perf_counter()
+                    saved = await _save_in_session(
+                        session_factory, raw_products, self._dimensions,
+                        source, incremental)
+                    metrics.save_seconds += time.perf_counter() - t0
+                    metrics.products += saved
+                    result[source["name"]] = saved
+
+            tasks = [asyncio.ensure_future(produce()),
+                     *(asyncio.ensure_future(write()) for _ in range(self._writers))]
+            try:
+                await asyncio.gather(*tasks)
+            finally:
+                # Ошибка в одной задаче не должна оставить остальные висеть
+                for task in tasks:
+                    task.cancel()
+
+        await _refresh_statistics(session_factory)
+        metrics.elapsed = time.perf_counter() - started
+        return result, metrics
 
     # -----------------------------------------------------------------------
     # Асинхронные вспомогательные методы (К2)
@@ -222,32 +677,40 @@ class DummyJSONLoader:
                 f"Не удалось получить список категорий ({url})"
             ) from exc
 
-    async def _fetch_batch(
+    async def _fetch_category_if_changed(
         self,
         session: aiohttp.ClientSession,
-        categories: list[str],
-    ) -> dict[str, list[dict[str, Any]]]:
-        """Параллельная загрузка пакета категорий (К2).
+        category: str,
+        known: SourceCategory | None = None,
+    ) -> tuple[list[dict[str, Any]], dict[str, Any]] | None:
+        """Скачать товары категории, если она изменилась с прошлой загрузки.
 
-        Все категории в пакете запрашиваются одновременно через asyncio.gather.
-        Возвращает {category_name: [product_dict, ...]}.
+        known — состояние прошлой загрузки: его ETag / Last-Modified уходят
+        в условном запросе. None, если сервер ответил 304 или тело
+        совпало с known.content_hash; иначе (товары, строка source_categories).
         """
-        tasks = [self._fetch_category(session, cat) for cat in categories]
-        results: list[list[dict[str, Any]]] = await asyncio.gather(*tasks)
-        return dict(zip(categories, results))
-
-    async def _fetch_category(
-        self,
-        session: aiohttp.ClientSession,
-        category: str,
-    ) -> list[dict[str, Any]]:
-        """Скачать товары одной категории асинхронно."""
         url = f"{self.BASE_URL}/category/{category}"
+        headers = {}
+        if known is not None and known.etag:
+            headers["If-None-Match"] = known.etag
+        if known is not None and known.last_modified:
+            headers["If-Modified-Since"] = known.last_modified
         try:
-            async with session.get(url) as response:
+            async with session.get(url, headers=headers) as response:
+                if response.status == 304:
+                    return None
                 response.raise_for_status()
-                data = await response.json(content_type=None)
-                return data.get("products", [])
+                body = await response.read()
+                content_hash = hashlib.sha256(body).hexdigest()
+                if known is not None and known.content_hash == content_hash:
+                    return None
+                source = {
+                    "name":          category,
+                    "content_hash":  content_hash,
+                    "etag":          response.headers.get("ETag"),
+                    "last_modified": response.headers.get("Last-Modified"),
+                }
+                return json.loads(body).get("products", []), source
         except aiohttp.ClientError as exc:
             raise RuntimeError(
                 f"Не удалось загрузить категорию '{category}' ({url})"
@@ -10,7 +10,8 @@
 
 Обновление данных (загрузка с DummyJSON в БД):
     python main.py                              # запускает загрузку и поднимает сервер
-    curl -X POST http://localhost:8000/update   # обновить через API
+    curl -X POST http://localhost:8000/update   # обновить через API (только изменения)
+    curl -X POST "http://localhost:8000/update?full=true"   # перезаписать всё
 
 Настройки БД берутся из файла .env (в той же папке):
     DB_USER, DB_PASSWORD, DB_HOST, DB_PORT, DB_NAME
@@ -21,11 +22,11 @@ from __future__ import annotations
 from contextlib import asynccontextmanager
 
 import uvicorn
-from fastapi import Depends, FastAPI
-from sqlalchemy.orm import Session
+from fastapi import FastAPI, Query
 
-from database import Base, engine, get_db
+from database import async_engine
 from loader import DummyJSONLoader
+from models import create_schema
 from routers.brands import router as brands_router
 from routers.products import router as products_router
 from routers.statistics import router as statistics_router
@@ -38,9 +39,11 @@ from routers.statistics import router as statistics_router
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    """Создать таблицы (если не существуют) при старте приложения."""
-    Base.metadata.create_all(bind=engine)
+    """Создать таблицы и индексы (если не существуют) при старте приложения."""
+    async with async_engine.begin() as conn:
+        await conn.run_sync(create_schema)
     yield
+    await async_engine.dispose()
 
 
 # ===========================================================================
@@ -82,19 +85,26 @@ async def root() -> dict:
 
 
 @app.post("/update", tags=["Data"])
-async def update_data(db: Session = Depends(get_db)) -> dict:
+async def update_data(
+    full: bool = Query(False, description="Перезаписать всё, а не только изменившееся"),
+) -> dict:
     """Скачать все данные с DummyJSON и сохранить/обновить в БД (К1, К2, К3).
 
-    Использует асинхронный DummyJSONLoader с пакетной загрузкой.
-    Возвращает количество сохранённых товаров по каждой категории.
+    Использует асинхронный DummyJSONLoader: загрузка категорий и запись
+    в БД идут конвейером. По умолчанию обновление инкрементальное:
+    неизменившиеся категории пропускаются, пишутся только изменившиеся
+    товары. Возвращает количество записанных товаров по каждой категории
+    и метрики прогона (время, товаров в секунду, пропущено категорий).
     """
-    loader = DummyJSONLoader(batch_size=5)
-    result = await loader.load(db)
+    loader = DummyJSONLoader(batch_size=5, writers=4, queue_size=8)
+    # каждое сохранение открывает свою AsyncSession
+    result, metrics = await loader.load(incremental=not full)
     total  = sum(result.values())
     return {
         "status":      "ok",
         "total_saved": total,
         "by_category": result,
+        "metrics":     metrics.as_dict(),
     }
 
 
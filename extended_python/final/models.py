@@ -12,16 +12,44 @@
 
 Каждая таблица содержит только атрибуты, зависящие исключительно
 от её первичного ключа — требование 3NF выполнено.
+
+Сводные таблицы статистики (денормализованные, пересчитываются
+загрузчиком — см. catalog_stats.py):
+    stats_category_brand — агрегаты по паре (категория, бренд)
+    stats_snapshot       — готовые ответы /statistics/ (итог и разбивки)
+
+Состояние источника для инкрементального /update (см. loader.py):
+    source_categories — хэш, ETag и Last-Modified ответа по каждой категории
+    source_products   — хэш исходного JSON каждого товара
 """
 
 from __future__ import annotations
 
-from sqlalchemy import Float, ForeignKey, Integer, String, Text
+from sqlalchemy import Connection, Float, ForeignKey, Index, Integer, String, Text, func
 from sqlalchemy.orm import Mapped, mapped_column, relationship
+from sqlalchemy.schema import CreateIndex
 
 from database import Base
 
 
+# ===========================================================================
+# Создание схемы
+# ===========================================================================
+
+
+def create_schema(conn: Connection) -> None:
+    """Создать недостающие таблицы и индексы.
+
+    create_all создаёт индексы только вместе с новой таблицей — индексы,
+    добавленные в модели позже (например, по lower(name)), в уже
+    существующую БД добавляются здесь.
+    """
+    Base.metadata.create_all(conn)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            conn.execute(CreateIndex(index, if_not_exists=True))
+
+
 # ===========================================================================
 # Справочник брендов
 # ===========================================================================
@@ -49,6 +77,11 @@ class Brand(Base):
         return f"Brand(id={self.id}, name={self.name!r})"
 
 
+# Поиск по имени без учёта регистра (/brand/{name}): WHERE lower(name) = …
+# обычный индекс по name для такого условия не используется
+Index("idx_brands_name_lower", func.lower(Brand.name))
+
+
 # ===========================================================================
 # Справочник категорий
 # ===========================================================================
@@ -76,6 +109,9 @@ class Category(Base):
         return f"Category(id={self.id}, name={self.name!r})"
 
 
+Index("idx_categories_name_lower", func.lower(Category.name))
+
+
 # ===========================================================================
 # Товар (SKU)
 # ===========================================================================
@@ -159,3 +195,80 @@ class Review(Base):
 
     def __repr__(self) -> str:
         return f"Review(id={self.id}, product_id={self.product_id}, rating={self.rating})"
+
+
+# ===========================================================================
+# Сводная статистика (материализуется загрузчиком)
+# ===========================================================================
+
+
+class CategoryBrandStats(Base):
+    """Агрегаты товаров одной пары (категория, бренд).
+
+    Строки категории пересчитываются в той же транзакции, что и запись
+    её товаров, поэтому всегда соответствуют products / reviews.
+    Внешних ключей нет: 0 — товар без категории / бренда.
+    """
+
+    __tablename__ = "stats_category_brand"
+
+    category_id: Mapped[int]   = mapped_column(Integer, primary_key=True)
+    brand_id:    Mapped[int]   = mapped_column(Integer, primary_key=True)
+    products:    Mapped[int]   = mapped_column(Integer, nullable=False)
+    low_stock:   Mapped[int]   = mapped_column(Integer, nullable=False)
+    price_sum:   Mapped[float] = mapped_column(Float, nullable=False)
+    reviews:     Mapped[int]   = mapped_column(Integer, nullable=False)
+
+
+class StatisticsSnapshot(Base):
+    """Строка готовой статистики: итог по каталогу или по одной группе.
+
+    kind — "total" (name = ""), "category" или "brand".
+    Таблица целиком заменяется одной транзакцией в конце загрузки.
+    """
+
+    __tablename__ = "stats_snapshot"
+
+    kind:       Mapped[str]   = mapped_column(String(16), primary_key=True)
+    name:       Mapped[str]   = mapped_column(String(255), primary_key=True)
+    products:   Mapped[int]   = mapped_column(Integer, nullable=False)
+    low_stock:  Mapped[int]   = mapped_column(Integer, nullable=False)
+    avg_price:  Mapped[float] = mapped_column(Float, nullable=True)
+    reviews:    Mapped[int]   = mapped_column(Integer, nullable=False)
+    brands:     Mapped[int]   = mapped_column(Integer, nullable=False)
+    categories: Mapped[int]   = mapped_column(Integer, nullable=False)
+
+
+# ===========================================================================
+# Состояние источника (инкрементальное обновление)
+# ===========================================================================
+
+
+class SourceCategory(Base):
+    """Ответ DummyJSON по категории на момент последней записи.
+
+    Категория пропускается, если сервер ответил 304 на If-None-Match /
+    If-Modified-Since или тело ответа совпало с content_hash.
+    Пишется в той же транзакции, что и товары категории.
+    """
+
+    __tablename__ = "source_categories"
+
+    name:          Mapped[str] = mapped_column(String(255), primary_key=True)
+    content_hash:  Mapped[str] = mapped_column(String(64), nullable=False)
+    etag:          Mapped[str] = mapped_column(String(255), nullable=True)
+    last_modified: Mapped[str] = mapped_column(String(64), nullable=True)
+
+
+class SourceProduct(Base):
+    """Хэш исходного JSON товара (вместе с отзывами) при последней записи.
+
+    Товар и его отзывы перезаписываются, только если хэш изменился.
+    """
+
+    __tablename__ = "source_products"
+
+    product_id:   Mapped[int] = mapped_column(
+        Integer, ForeignKey("products.id", ondelete="CASCADE"), primary_key=True
+    )
+    content_hash: Mapped[str] = mapped_column(String(64), nullable=False)
@@ -0,0 +1,135 @@
+"""
+Продвинутый Python — Итоговый проект
+-------------------------------------
+Модуль: responses.py
+Назначение: готовые к отправке JSON-ответы для кэша — тело сериализуется
+            один раз, сжатые варианты (gzip, brotli) считаются тогда же.
+
+    encoded = encode_json(value)        # при промахе кэша
+    return send(request, encoded)       # при каждом запросе
+
+encode_json принимает списки / словари и Pydantic-модели. На попадании
+в кэш send только выбирает вариант по Accept-Encoding и сравнивает ETag
+— без валидации и сериализации FastAPI (response_model у эндпоинта
+остаётся для документации).
+
+orjson и brotli — необязательные зависимости: без orjson сериализует
+стандартный json, без brotli вариант br не считается.
+"""
+
+from __future__ import annotations
+
+import gzip
+import hashlib
+import json
+import re
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import Request, Response
+from pydantic import BaseModel
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover — работает и без orjson
+    orjson = None
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover — без варианта br
+    brotli = None
+
+
+# Меньшие тела не сжимаем: выигрыш меньше накладных расходов
+MIN_COMPRESS_SIZE = 500
+
+
+@dataclass(frozen=True, slots=True)
+class EncodedJSON:
+    """Тело ответа и его сжатые варианты (None — вариант не считался)."""
+    body: bytes
+    etag: str
+    gzip: bytes | None = None
+    br: bytes | None = None
+
+
+def _default(value: Any) -> Any:
+    if isinstance(value, BaseModel):
+        return value.model_dump()
+    raise TypeError(f"Тип {type(value).__name__} не сериализуется в JSON")
+
+
+def dumps(value: Any) -> bytes:
+    """JSON в байтах (UTF-8, без экранирования кириллицы)."""
+    if orjson is not None:
+        return orjson.dumps(value, default=_default)
+    return json.dumps(value, default=_default, ensure_ascii=False,
+                      separators=(",", ":")).encode()
+
+
+def encode_json(value: Any) -> EncodedJSON:
+    """Сериализовать value и посчитать сжатые варианты и ETag."""
+    body = dumps(value)
+    etag = 'W/"' + hashlib.sha1(body).hexdigest() + '"'
+    if len(body) < MIN_COMPRESS_SIZE:
+        return EncodedJSON(body, etag)
+    return EncodedJSON(
+        body, etag,
+        gzip=gzip.compress(body, compresslevel=6, mtime=0),
+        br=brotli.compress(body, quality=5) if brotli is not None else None,
+    )
+
+
+def _accepted(header: str) -> set[str]:
+    """Кодировки из Accept-Encoding, кроме явно запрещённых (q=0)."""
+    codings = set()
+    for part in header.lower().split(","):
+        coding, _, params = part.partition(";")
+        q = params.strip().removeprefix("q=")
+        try:
+            if q and float(q) == 0:
+                continue
+        except ValueError:
+            continue
+        codings.add(coding.strip())
+    return codings
+
+
+_ETAG = re.compile(r'\s*(?:W/)?("[^"]*")\s*(?:,|$)')
+
+
+def _etag_matches(header: str, etag: str) -> bool:
+    """Совпадает ли etag с If-None-Match: список тегов через запятую или *.
+
+    Сравнение слабое (RFC 9110, 13.1.2): префикс W/ не учитывается.
+    """
+    header = header.strip()
+    if header == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    pos = 0
+    while pos < len(header):
+        match = _ETAG.match(header, pos)
+        if match is None:
+            return False      # испорченный заголовок — как будто его нет
+        if match.group(1) == opaque:
+            return True
+        pos = match.end()
+    return False
+
+
+def send(request: Request, encoded: EncodedJSON,
+         headers: dict[str, str] | None = None) -> Response:
+    """Ответ из готового EncodedJSON: 304 по If-None-Match, иначе
+    самый компактный вариант, который принимает клиент."""
+    headers = {**(headers or {}), "ETag": encoded.etag, "Vary": "Accept-Encoding"}
+    if _etag_matches(request.headers.get("if-none-match", ""), encoded.etag):
+        return Response(status_code=304, headers=headers)
+
+    accepted = _accepted(request.headers.get("accept-encoding", ""))
+    body = encoded.body
+    if encoded.br is not None and "br" in accepted:
+        body, headers["Content-Encoding"] = encoded.br, "br"
+    elif encoded.gzip is not None and "gzip" in accepted:
+        body, headers["Content-Encoding"] = encoded.gzip, "gzip"
+    return Response(content=body, media_type="application/json", headers=headers)
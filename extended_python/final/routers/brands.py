@@ -9,101 +9,74 @@
 
 from __future__ import annotations
 
-import time
-from typing import Any
+from fastapi import APIRouter, HTTPException, Request, Response
+from sqlalchemy import exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, joinedload, selectinload
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
-
-from database import get_db
+from cache import response_cache
+from database import run_in_async_session
 from models import Brand, Product
+from responses import EncodedJSON, encode_json, send
 from schemas import BrandSchema, ProductSchema
 
 
 router = APIRouter(tags=["Brands"])
 
-# ===========================================================================
-# Простой in-memory кэш с TTL (общий паттерн из products.py)
-# ===========================================================================
-
-_cache: dict[str, tuple[float, Any]] = {}
-_TTL = 300.0  # секунд
-
-
-def _cache_get(key: str) -> Any | None:
-    entry = _cache.get(key)
-    if entry is None:
-        return None
-    ts, value = entry
-    if time.monotonic() - ts > _TTL:
-        del _cache[key]
-        return None
-    return value
-
-
-def _cache_set(key: str, value: Any) -> None:
-    _cache[key] = (time.monotonic(), value)
-
-
 # ===========================================================================
 # Эндпоинты
 # ===========================================================================
 
 
 @router.get("/brands/", response_model=list[BrandSchema])
-async def get_brands(db: Session = Depends(get_db)) -> list[BrandSchema]:
+async def get_brands(request: Request) -> Response:
     """Вернуть список всех брендов (К5).
 
-    Результат кэшируется на 5 минут.
+    Результат кэшируется с тегом brands.
     """
-    cached = _cache_get("all_brands")
-    if cached is not None:
-        return cached
+    async def build(db: AsyncSession) -> EncodedJSON:
+        brands = (await db.scalars(select(Brand).order_by(Brand.name))).all()
+        return encode_json([BrandSchema.model_validate(b) for b in brands])
 
-    brands = db.query(Brand).order_by(Brand.name).all()
-    result = [BrandSchema.model_validate(b) for b in brands]
-    _cache_set("all_brands", result)
-    return result
+    return send(request, await response_cache.get_or_set(
+        "brands", lambda: run_in_async_session(build), tags=("brands",)))
 
 
 @router.get("/brand/{brand_name}", response_model=list[ProductSchema])
 async def get_by_brand(
     brand_name: str,
-    db: Session = Depends(get_db),
-) -> list[ProductSchema]:
+    request: Request,
+) -> Response:
     """Вернуть все товары указанного бренда (К5).
 
-    Результат кэшируется на 5 минут.
+    Результат кэшируется с тегом brand:<имя>.
     """
-    cache_key = f"brand:{brand_name}"
-    cached = _cache_get(cache_key)
-    if cached is not None:
-        return cached
-
-    brand = (
-        db.query(Brand)
-        .filter(func.lower(Brand.name) == brand_name.lower())
-        .first()
-    )
-    if brand is None:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Бренд '{brand_name}' не найден.",
-        )
-
-    products = (
-        db.query(Product)
+    key = f"brand:{brand_name.lower()}"
+    encoded = await response_cache.get_or_set(
+        key, lambda: run_in_async_session(_brand_products, brand_name), tags=(key,))
+    return send(request, encoded)
+
+
+async def _brand_products(db: AsyncSession, brand_name: str) -> EncodedJSON:
+    # Имя и товары — одним запросом (JOIN brands по индексу lower(name)),
+    # отзывы — вторым (selectinload); проверка существования — только
+    # если товаров нет
+    by_name = func.lower(Brand.name) == brand_name.lower()
+    products = (await db.scalars(
+        select(Product)
+        .join(Product.brand)
+        .where(by_name)
         .options(
-            joinedload(Product.brand),
+            contains_eager(Product.brand),
             joinedload(Product.category),
-            joinedload(Product.reviews),
+            selectinload(Product.reviews),
         )
-        .filter(Product.brand_id == brand.id)
         .order_by(Product.id)
-        .all()
-    )
+    )).all()
+    if not products and not await db.scalar(select(exists().where(by_name))):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Бренд '{brand_name}' не найден.",
+        )
 
-    result = [ProductSchema.model_validate(p) for p in products]
-    _cache_set(cache_key, result)
-    return result
+    return encode_json([ProductSchema.model_validate(p) for p in products])
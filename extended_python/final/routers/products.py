@@ -3,49 +3,83 @@
 -------------------------------------
 Роутер: products.py
 Эндпоинты:
-    GET /products/                    — все SKU в базе (К5)
+    GET /products/                    — SKU в базе, постранично (К5)
     GET /category/{category_name}     — товары указанной категории (К4)
+
+/products/ — keyset-пагинация по id: ``?limit=50&after=<id последнего
+товара предыдущей страницы>``. Запрос всегда ``WHERE id > after ORDER BY
+id LIMIT n`` по первичному ключу, поэтому время ответа не зависит ни от
+номера страницы, ни от размера каталога. Ссылка на следующую страницу —
+в заголовке ``Link: <...>; rel="next"`` (на последней странице его нет),
+тело ответа по-прежнему список товаров.
+
+``?fields=id,title,price`` — только перечисленные поля: из БД читаются
+только нужные колонки, а brand / category / reviews присоединяются лишь
+если запрошены. Отзывы подгружаются отдельным запросом (selectinload,
+``WHERE product_id IN (…)``), а не JOIN: иначе каждая строка товара
+повторялась бы столько раз, сколько у него отзывов.
+
+Ответ снабжается ETag; при совпадении If-None-Match возвращается 304
+без тела.
 """
 
 from __future__ import annotations
 
-import time
 from typing import Any
 
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy import func
-from sqlalchemy.orm import Session, joinedload
+from fastapi import APIRouter, HTTPException, Query, Request, Response
+from sqlalchemy import exists, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import contains_eager, joinedload, load_only, selectinload
 
-from database import get_db
+from cache import response_cache
+from database import run_in_async_session
 from models import Category, Product
-from schemas import ProductSchema
+from responses import EncodedJSON, encode_json, send
+from schemas import BrandSchema, CategorySchema, ProductSchema, ReviewSchema
 
 
 router = APIRouter(tags=["Products"])
 
 # ===========================================================================
-# Простой in-memory кэш с TTL
+# Проекция полей для /products/
 # ===========================================================================
 
-_cache: dict[str, tuple[float, Any]] = {}
-_TTL = 300.0  # секунд
+PRODUCT_FIELDS = tuple(ProductSchema.model_fields)
+_RELATIONS = {
+    "brand":    (Product.brand,    BrandSchema),
+    "category": (Product.category, CategorySchema),
+}
 
 
-def _cache_get(key: str) -> Any | None:
-    """Вернуть значение из кэша если не истёк TTL, иначе None."""
-    entry = _cache.get(key)
-    if entry is None:
-        return None
-    ts, value = entry
-    if time.monotonic() - ts > _TTL:
-        del _cache[key]
-        return None
-    return value
+def _parse_fields(fields: str | None) -> tuple[str, ...]:
+    """Разобрать ``fields=a,b,c``; id входит всегда (по нему курсор)."""
+    if not fields:
+        return PRODUCT_FIELDS
+    requested = [f.strip() for f in fields.split(",") if f.strip()]
+    unknown = sorted(set(requested) - set(PRODUCT_FIELDS))
+    if unknown:
+        raise HTTPException(
+            status_code=422,
+            detail=f"Неизвестные поля: {', '.join(unknown)}. "
+                   f"Допустимые: {', '.join(PRODUCT_FIELDS)}",
+        )
+    return tuple(f for f in PRODUCT_FIELDS if f == "id" or f in requested)
 
 
-def _cache_set(key: str, value: Any) -> None:
-    """Сохранить значение в кэш с текущей меткой времени."""
-    _cache[key] = (time.monotonic(), value)
+def _product_dict(p: Product, fields: tuple[str, ...]) -> dict[str, Any]:
+    out: dict[str, Any] = {}
+    for field in fields:
+        if field in _RELATIONS:
+            value = getattr(p, field)
+            out[field] = (_RELATIONS[field][1].model_validate(value).model_dump()
+                          if value is not None else None)
+        elif field == "reviews":
+            out[field] = [ReviewSchema.model_validate(r).model_dump()
+                          for r in p.reviews]
+        else:
+            out[field] = getattr(p, field)
+    return out
 
 
 # ===========================================================================
@@ -54,68 +88,83 @@ def _cache_set(key: str, value: Any) -> None:
 
 
 @router.get("/products/", response_model=list[ProductSchema])
-async def get_products(db: Session = Depends(get_db)) -> list[ProductSchema]:
-    """Вернуть все SKU, которые есть в базе (К5).
-
-    Результат кэшируется на 5 минут.
+async def get_products(
+    request: Request,
+    limit: int = Query(50, ge=1, le=500, description="Товаров на странице"),
+    after: int = Query(0, ge=0, description="id последнего товара предыдущей страницы"),
+    fields: str | None = Query(None, description="Поля через запятую, напр. id,title,price"),
+) -> Response:
+    """Вернуть страницу SKU по возрастанию id (К5).
+
+    Keyset-пагинация (limit / after), проекция полей (fields), ETag.
+    Страница кэшируется (тег "products") до следующей записи загрузчика.
     """
-    cached = _cache_get("all_products")
-    if cached is not None:
-        return cached
-
-    products = (
-        db.query(Product)
-        .options(
-            joinedload(Product.brand),
-            joinedload(Product.category),
-            joinedload(Product.reviews),
-        )
-        .order_by(Product.id)
-        .all()
+    selected = _parse_fields(fields)
+
+    async def build(db: AsyncSession) -> tuple[EncodedJSON, int | None]:
+        columns = [getattr(Product, f) for f in selected
+                   if f not in _RELATIONS and f != "reviews"]
+        options = [load_only(*columns)]
+        options += [joinedload(_RELATIONS[f][0]) for f in selected if f in _RELATIONS]
+        if "reviews" in selected:
+            options.append(selectinload(Product.reviews))
+        products = (await db.scalars(
+            select(Product)
+            .options(*options)
+            .where(Product.id > after)
+            .order_by(Product.id)
+            .limit(limit)
+        )).all()
+
+        next_after = products[-1].id if len(products) == limit else None
+        return encode_json([_product_dict(p, selected) for p in products]), next_after
+
+    encoded, next_after = await response_cache.get_or_set(
+        f"products:{after}:{limit}:{','.join(selected)}",
+        lambda: run_in_async_session(build), tags=("products",),
     )
-
-    result = [ProductSchema.model_validate(p) for p in products]
-    _cache_set("all_products", result)
-    return result
+    headers = {}
+    if next_after is not None:
+        next_url = request.url.include_query_params(after=next_after, limit=limit)
+        headers["Link"] = f'<{next_url}>; rel="next"'
+    return send(request, encoded, headers)
 
 
 @router.get("/category/{category_name}", response_model=list[ProductSchema])
 async def get_by_category(
     category_name: str,
-    db: Session = Depends(get_db),
-) -> list[ProductSchema]:
+    request: Request,
+) -> Response:
     """Вернуть все товары указанной категории (К4).
 
-    Результат кэшируется на 5 минут.
+    Результат кэшируется с тегом category:<имя>.
     """
-    cache_key = f"category:{category_name}"
-    cached = _cache_get(cache_key)
-    if cached is not None:
-        return cached
-
-    category = (
-        db.query(Category)
-        .filter(func.lower(Category.name) == category_name.lower())
-        .first()
-    )
-    if category is None:
-        raise HTTPException(
-            status_code=404,
-            detail=f"Категория '{category_name}' не найдена.",
-        )
-
-    products = (
-        db.query(Product)
+    key = f"category:{category_name.lower()}"
+    encoded = await response_cache.get_or_set(
+        key, lambda: run_in_async_session(_category_products, category_name), tags=(key,))
+    return send(request, encoded)
+
+
+async def _category_products(db: AsyncSession, category_name: str) -> EncodedJSON:
+    # Имя и товары — одним запросом (JOIN categories по индексу lower(name)),
+    # отзывы — вторым (selectinload); проверка существования — только
+    # если товаров нет
+    by_name = func.lower(Category.name) == category_name.lower()
+    products = (await db.scalars(
+        select(Product)
+        .join(Product.category)
+        .where(by_name)
         .options(
+            contains_eager(Product.category),
             joinedload(Product.brand),
-            joinedload(Product.category),
-            joinedload(Product.reviews),
+            selectinload(Product.reviews),
         )
-        .filter(Product.category_id == category.id)
         .order_by(Product.id)
-        .all()
-    )
+    )).all()
+    if not products and not await db.scalar(select(exists().where(by_name))):
+        raise HTTPException(
+            status_code=404,
+            detail=f"Категория '{category_name}' не найдена.",
+        )
 
-    result = [ProductSchema.model_validate(p) for p in products]
-    _cache_set(cache_key, result)
-    return result
+    return encode_json([ProductSchema.model_validate(p) for p in products])
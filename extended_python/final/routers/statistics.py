@@ -2,48 +2,95 @@
 Продвинутый Python — Итоговый проект
 -------------------------------------
 Роутер: statistics.py
-Эндпоинт:
-    GET /statistics/   — сводная статистика по каталогу
+Эндпоинты:
+    GET /statistics/              — сводная статистика по каталогу
+    GET /statistics/categories    — та же статистика по каждой категории
+    GET /statistics/brands        — та же статистика по каждому бренду
+
+Ничего не агрегирует при запросе: ответы читаются из stats_snapshot,
+которую заполняет загрузчик (catalog_stats.py). /statistics/ — одна
+строка по первичному ключу, независимо от размера каталога.
 """
 
 from __future__ import annotations
 
 from fastapi import APIRouter, Depends
-from sqlalchemy import case, func
-from sqlalchemy.orm import Session
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 
-from database import get_db
-from models import Brand, Category, Product, Review
-from schemas import StatisticsSchema
+from catalog_stats import rebuild_statistics
+from database import get_async_db
+from models import StatisticsSnapshot
+from schemas import (BrandStatisticsSchema, CategoryStatisticsSchema,
+                     StatisticsSchema)
 
 
 router = APIRouter(prefix="/statistics", tags=["Statistics"])
 
 
-@router.get("/", response_model=StatisticsSchema)
-async def get_statistics(db: Session = Depends(get_db)) -> StatisticsSchema:
-    """Вернуть сводную статистику по каталогу товаров.
+async def _total(db: AsyncSession) -> StatisticsSnapshot:
+    """Итоговая строка snapshot; если её нет — пересчитать всё один раз
+    (данные записаны не загрузчиком, например скриптом).
 
-    Оптимизировано: агрегация products выполняется одним запросом (CASE).
+    Одновременные первые запросы пересчитают её каждый сам — строки
+    snapshot пишутся upsert'ом (refresh_snapshot), без конфликта ключей.
     """
-    # Один запрос для total и low_stock (оптимизация из конспекта)
-    product_stats = db.query(
-        func.count(Product.id).label("total"),
-        func.sum(
-            case((Product.stock < 10, 1), else_=0)
-        ).label("low_stock"),
-        func.avg(Product.price).label("avg_price"),
-    ).first()
-
-    total_brands     = db.query(func.count(Brand.id)).scalar() or 0
-    total_categories = db.query(func.count(Category.id)).scalar() or 0
-    total_reviews    = db.query(func.count(Review.id)).scalar() or 0
+    row = await db.get(StatisticsSnapshot, ("total", ""))
+    if row is None:
+        await db.run_sync(rebuild_statistics)
+        await db.commit()
+        row = await db.get(StatisticsSnapshot, ("total", ""))
+    return row
+
+
+async def _groups(db: AsyncSession, kind: str) -> list[StatisticsSnapshot]:
+    await _total(db)
+    return list(await db.scalars(
+        select(StatisticsSnapshot)
+        .where(StatisticsSnapshot.kind == kind)
+        .order_by(StatisticsSnapshot.name)
+    ))
+
 
+@router.get("/", response_model=StatisticsSchema)
+async def get_statistics(db: AsyncSession = Depends(get_async_db)) -> StatisticsSchema:
+    """Вернуть сводную статистику по каталогу товаров."""
+    row = await _total(db)
     return StatisticsSchema(
-        total_products     = product_stats.total     or 0,
-        low_stock_products = product_stats.low_stock or 0,
-        avg_price          = round(product_stats.avg_price, 2) if product_stats.avg_price else None,
-        total_brands       = total_brands,
-        total_categories   = total_categories,
-        total_reviews      = total_reviews,
+        total_products     = row.products,
+        low_stock_products = row.low_stock,
+        avg_price          = row.avg_price,
+        total_brands       = row.brands,
+        total_categories   = row.categories,
+        total_reviews      = row.reviews,
     )
+
+
+@router.get("/categories", response_model=list[CategoryStatisticsSchema])
+async def get_statistics_by_category(
+    db: AsyncSession = Depends(get_async_db),
+) -> list[CategoryStatisticsSchema]:
+    """Статистика по каждой категории (число брендов — внутри категории)."""
+    return [
+        CategoryStatisticsSchema(
+            name=row.name, total_products=row.products,
+            low_stock_products=row.low_stock, avg_price=row.avg_price,
+            total_reviews=row.reviews, total_brands=row.brands,
+        )
+        for row in await _groups(db, "category")
+    ]
+
+
+@router.get("/brands", response_model=list[BrandStatisticsSchema])
+async def get_statistics_by_brand(
+    db: AsyncSession = Depends(get_async_db),
+) -> list[BrandStatisticsSchema]:
+    """Статистика по каждому бренду (число категорий, где он представлен)."""
+    return [
+        BrandStatisticsSchema(
+            name=row.name, total_products=row.products,
+            low_stock_products=row.low_stock, avg_price=row.avg_price,
+            total_reviews=row.reviews, total_categories=row.categories,
+        )
+        for row in await _groups(db, "brand")
+    ]
@@ -16,6 +16,8 @@ CREATE TABLE IF NOT EXISTS brands (
 );
 
 CREATE INDEX IF NOT EXISTS idx_brands_name ON brands (name);
+-- Поиск без учёта регистра (/brand/{name}): WHERE lower(name) = …
+CREATE INDEX IF NOT EXISTS idx_brands_name_lower ON brands (lower(name));
 
 -- -----------------------------------------------------------------------------
 -- Справочник категорий
@@ -26,6 +28,8 @@ CREATE TABLE IF NOT EXISTS categories (
 );
 
 CREATE INDEX IF NOT EXISTS idx_categories_name ON categories (name);
+-- Поиск без учёта регистра (/category/{name}): WHERE lower(name) = …
+CREATE INDEX IF NOT EXISTS idx_categories_name_lower ON categories (lower(name));
 
 -- -----------------------------------------------------------------------------
 -- Товары (SKU)
@@ -60,3 +64,47 @@ CREATE TABLE IF NOT EXISTS reviews (
 );
 
 CREATE INDEX IF NOT EXISTS idx_reviews_product_id ON reviews (product_id);
+
+-- -----------------------------------------------------------------------------
+-- Сводная статистика (пересчитывается загрузчиком, см. catalog_stats.py)
+-- stats_category_brand — агрегаты по паре (категория, бренд), 0 — нет значения
+-- stats_snapshot       — готовые ответы /statistics/: kind = total / category / brand
+-- -----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS stats_category_brand (
+    category_id INTEGER NOT NULL,
+    brand_id    INTEGER NOT NULL,
+    products    INTEGER NOT NULL,
+    low_stock   INTEGER NOT NULL,
+    price_sum   FLOAT   NOT NULL,
+    reviews     INTEGER NOT NULL,
+    PRIMARY KEY (category_id, brand_id)
+);
+
+CREATE TABLE IF NOT EXISTS stats_snapshot (
+    kind       VARCHAR(16)  NOT NULL,
+    name       VARCHAR(255) NOT NULL,
+    products   INTEGER      NOT NULL,
+    low_stock  INTEGER      NOT NULL,
+    avg_price  FLOAT,
+    reviews    INTEGER      NOT NULL,
+    brands     INTEGER      NOT NULL,
+    categories INTEGER      NOT NULL,
+    PRIMARY KEY (kind, name)
+);
+
+-- -----------------------------------------------------------------------------
+-- Состояние источника для инкрементального /update (см. loader.py)
+-- source_categories — хэш тела ответа, ETag и Last-Modified по категории
+-- source_products   — хэш исходного JSON товара вместе с отзывами
+-- -----------------------------------------------------------------------------
+CREATE TABLE IF NOT EXISTS source_categories (
+    name          VARCHAR(255) PRIMARY KEY,
+    content_hash  VARCHAR(64)  NOT NULL,
+    etag          VARCHAR(255),
+    last_modified VARCHAR(64)
+);
+
+CREATE TABLE IF NOT EXISTS source_products (
+    product_id   INTEGER     PRIMARY KEY REFERENCES products(id) ON DELETE CASCADE,
+    content_hash VARCHAR(64) NOT NULL
+);
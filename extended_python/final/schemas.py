@@ -91,3 +91,21 @@ class StatisticsSchema(BaseModel):
     total_brands:      int
     total_categories:  int
     total_reviews:     int
+
+
+class GroupStatisticsSchema(BaseModel):
+    """Статистика по товарам одной категории или одного бренда."""
+
+    name:               str
+    total_products:     int
+    low_stock_products: int
+    avg_price:          float | None
+    total_reviews:      int
+
+
+class CategoryStatisticsSchema(GroupStatisticsSchema):
+    total_brands: int
+
+
+class BrandStatisticsSchema(GroupStatisticsSchema):
+    total_categories: int
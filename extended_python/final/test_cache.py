@@ -0,0 +1,190 @@
+"""
+Продвинутый Python — Итоговый проект
+-------------------------------------
+Модуль: test_cache.py
+Назначение: регрессионные тесты общего кэша ответов (cache.py) —
+            хранилища, LRU, инвалидация по тегам и single-flight.
+
+Запуск (из папки final/):
+    python -m pytest -q test_cache.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+
+import pytest
+
+from cache import Cache, MemoryBackend, SQLiteBackend
+
+
+@pytest.fixture(params=["memory", "sqlite"])
+def backend(request, tmp_path):
+    if request.param == "memory":
+        return MemoryBackend(max_entries=3)
+    return SQLiteBackend(tmp_path / "cache.db", max_entries=3)
+
+
+def test_lru_evicts_least_recently_read(backend) -> None:
+    for key in "abc":
+        backend.set(key, key.upper(), ttl=60, tags=())
+    assert backend.get("a") == "A"          # «a» снова свежая
+    backend.set("d", "D", ttl=60, tags=())
+    assert backend.get("b") is None
+    assert [backend.get(k) for k in "acd"] == ["A", "C", "D"]
+
+
+def test_invalidate_by_tag(backend) -> None:
+    backend.set("brand:a", 1, ttl=60, tags=("brands", "brand:a"))
+    backend.set("brand:b", 2, ttl=60, tags=("brands", "brand:b"))
+    backend.set("products", 3, ttl=60, tags=("products",))
+    assert backend.invalidate(["brand:a"]) == 1
+    assert backend.get("brand:a") is None and backend.get("brand:b") == 2
+    assert backend.invalidate(["brands"]) == 1
+    assert len(backend) == 1
+
+
+def test_expired_entry_is_not_returned(backend) -> None:
+    backend.set("k", 1, ttl=-1, tags=("t",))
+    assert backend.get("k") is None
+
+
+def test_sqlite_get_does_not_write(tmp_path) -> None:
+    backend = SQLiteBackend(tmp_path / "cache.db")
+    backend.set("k", "v", ttl=60, tags=("t",))
+    changes = backend._db.total_changes
+    for _ in range(10):
+        assert backend.get("k") == "v"
+    assert backend._db.total_changes == changes
+    assert not backend._db.in_transaction
+
+
+# ===========================================================================
+# Single-flight
+# ===========================================================================
+
+
+class _SlowCompute:
+    """compute для get_or_set: ждёт release, считает вызовы."""
+
+    def __init__(self, value: object = "value") -> None:
+        self.value = value
+        self.calls = 0
+        self.release = asyncio.Event()
+
+    async def __call__(self) -> object:
+        self.calls += 1
+        await self.release.wait()
+        return self.value
+
+
+def test_concurrent_misses_compute_once() -> None:
+    async def scenario() -> None:
+        cache = Cache(MemoryBackend())
+        compute = _SlowCompute()
+        tasks = [asyncio.ensure_future(cache.get_or_set("k", compute)) for _ in range(5)]
+        await asyncio.sleep(0)
+        compute.release.set()
+        assert await asyncio.gather(*tasks) == ["value"] * 5
+        assert compute.calls == 1
+        assert cache.get("k") == "value"
+
+    asyncio.run(scenario())
+
+
+def test_cancelled_initiator_does_not_fail_waiters() -> None:
+    async def scenario() -> None:
+        cache = Cache(MemoryBackend())
+        compute = _SlowCompute()
+        first = asyncio.ensure_future(cache.get_or_set("k", compute))
+        await asyncio.sleep(0)
+        waiter = asyncio.ensure_future(cache.get_or_set("k", compute))
+        await asyncio.sleep(0)
+        first.cancel()                    # клиент, начавший вычисление, ушёл
+        await asyncio.sleep(0)
+        compute.release.set()
+        assert await waiter == "value"
+        assert first.cancelled()
+        assert compute.calls == 1
+        assert cache.get("k") == "value"
+
+    asyncio.run(scenario())
+
+
+def test_failed_compute_is_not_cached_and_can_retry() -> None:
+    async def scenario() -> None:
+        cache = Cache(MemoryBackend())
+
+        async def broken() -> object:
+            raise RuntimeError("БД недоступна")
+
+        with pytest.raises(RuntimeError):
+            await cache.get_or_set("k", broken)
+        assert await cache.get_or_set("k", lambda: 42) == 42
+
+    asyncio.run(scenario())
+
+
+@pytest.mark.parametrize("invalidated, stored", [("brand:a", False), ("brand:b", True)])
+def test_invalidation_during_compute(invalidated: str, stored: bool) -> None:
+    async def scenario() -> None:
+        cache = Cache(MemoryBackend())
+        compute = _SlowCompute()
+        task = asyncio.ensure_future(
+            cache.get_or_set("brand:a", compute, tags=("brand:a",)))
+        await asyncio.sleep(0)
+        cache.invalidate(invalidated)
+        compute.release.set()
+        assert await task == "value"
+        # результат отдан всегда, в кэш — только если его тег не сбрасывали
+        assert (cache.get("brand:a") == "value") is stored
+
+    asyncio.run(scenario())
+
+
+def test_concurrent_invalidations_are_all_counted() -> None:
+    """Инвалидации из потоков загрузчика не склеиваются в одну."""
+    cache = Cache(MemoryBackend())
+    threads = [threading.Thread(target=lambda: [cache.invalidate("brands")
+                                                for _ in range(2000)])
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert cache._tag_generations["brands"] == 8 * 2000
+
+
+def test_invalidation_between_check_and_store() -> None:
+    """Инвалидация, прошедшая между проверкой поколения и записью."""
+
+    class RacingBackend(MemoryBackend):
+        def set(self, key, value, ttl, tags) -> None:
+            cache.invalidate(*tags)          # «поток загрузчика» успел первым
+            super().set(key, value, ttl, tags)
+
+    cache = Cache(RacingBackend())
+
+    async def scenario() -> None:
+        assert await cache.get_or_set("k", lambda: "old", tags=("t",)) == "old"
+
+    asyncio.run(scenario())
+    assert cache.get("k") is None
+
+
+def test_sqlite_backend_is_called_off_the_loop(tmp_path) -> None:
+    calls: list[bool] = []
+
+    class RecordingBackend(SQLiteBackend):
+        def get(self, key):
+            calls.append(threading.current_thread() is threading.main_thread())
+            return super().get(key)
+
+    async def scenario() -> None:
+        cache = Cache(RecordingBackend(tmp_path / "cache.db"))
+        assert await cache.get_or_set("k", lambda: 1, tags=("t",)) == 1
+        assert await cache.get_or_set("k", lambda: 2, tags=("t",)) == 1
+
+    asyncio.run(scenario())
+    assert calls == [False, False]
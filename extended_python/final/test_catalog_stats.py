@@ -0,0 +1,106 @@
+"""
+Продвинутый Python — Итоговый проект
+-------------------------------------
+Модуль: test_catalog_stats.py
+Назначение: регрессионные тесты материализованной статистики
+            (catalog_stats.py) — snapshot совпадает с живыми агрегатами,
+            в том числе после переезда товара в другую категорию, и
+            пересчитывается одновременными запросами без ошибок.
+
+Запуск (из папки final/):
+    python -m pytest -q test_catalog_stats.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+import copy
+
+import httpx
+from sqlalchemy import delete, func, select
+
+from catalog_stats import refresh_snapshot
+from database import SessionLocal
+from dummyjson_stub import group_by_category, make_products
+from loader import _save_products
+from main import app
+from models import Category, Product, Review, StatisticsSnapshot
+
+
+def _save_by_category(products: list[dict], incremental: bool = False) -> None:
+    """Сохранить товары пакетами по категориям — как загрузчик."""
+    for batch in group_by_category(products).values():
+        with SessionLocal() as db:
+            _save_products(db, batch, incremental=incremental)
+    with SessionLocal() as db:
+        refresh_snapshot(db)
+        db.commit()
+
+
+def _snapshot(db, kind: str) -> dict[str, tuple[int, int]]:
+    return {row.name: (row.products, row.reviews) for row in db.scalars(
+        select(StatisticsSnapshot).where(StatisticsSnapshot.kind == kind))}
+
+
+def _live_by_category(db) -> dict[str, tuple[int, int]]:
+    reviews = dict(db.execute(
+        select(Review.product_id, func.count()).group_by(Review.product_id)).all())
+    result: dict[str, tuple[int, int]] = {}
+    for product_id, name in db.execute(select(Product.id, Category.name)
+                                       .join(Product.category)):
+        products, n_reviews = result.get(name, (0, 0))
+        result[name] = (products + 1, n_reviews + reviews.get(product_id, 0))
+    return result
+
+
+def _assert_matches_live() -> None:
+    with SessionLocal() as db:
+        total = _snapshot(db, "total")[""]
+        assert total == (db.scalar(select(func.count(Product.id))),
+                         db.scalar(select(func.count(Review.id))))
+        assert _snapshot(db, "category") == _live_by_category(db)
+
+
+def test_snapshot_matches_live_aggregates(clean_db) -> None:
+    _save_by_category(make_products(400))
+    _assert_matches_live()
+
+
+def test_product_moved_to_another_category(clean_db) -> None:
+    products = make_products(400)
+    _save_by_category(products)
+
+    moved = copy.deepcopy(products)
+    product = next(p for p in moved if p["category"] == "category-2")
+    product["category"] = "category-3"
+    # Пакет содержит только новую категорию товара — как при /update
+    with SessionLocal() as db:
+        _save_products(db, group_by_category(moved)["category-3"], incremental=True)
+    with SessionLocal() as db:
+        refresh_snapshot(db)
+        db.commit()
+
+    _assert_matches_live()
+    with SessionLocal() as db:
+        categories = _snapshot(db, "category")
+    before = {name: len(batch) for name, batch in group_by_category(products).items()}
+    assert categories["category-2"][0] == before["category-2"] - 1
+    assert categories["category-3"][0] == before["category-3"] + 1
+
+
+def test_concurrent_first_statistics_requests(clean_db) -> None:
+    """Snapshot пуст: одновременные /statistics/ пересчитывают его без 500."""
+    _save_by_category(make_products(200))
+    with SessionLocal() as db:
+        db.execute(delete(StatisticsSnapshot))
+        db.commit()
+
+    async def scenario() -> list[httpx.Response]:
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            return await asyncio.gather(*(client.get("/statistics/") for _ in range(8)))
+
+    responses = asyncio.run(scenario())
+    assert [r.status_code for r in responses] == [200] * 8
+    assert {r.json()["total_products"] for r in responses} == {200}
+    _assert_matches_live()
@@ -0,0 +1,38 @@
+"""
+Продвинутый Python — Итоговый проект
+-------------------------------------
+Модуль: test_responses.py
+Назначение: регрессионные тесты готовых ответов (responses.py) —
+            разбор If-None-Match и Accept-Encoding.
+
+Запуск (из папки final/):
+    python -m pytest -q test_responses.py
+"""
+
+from __future__ import annotations
+
+import pytest
+
+from responses import _accepted, _etag_matches
+
+ETAG = 'W/"abc"'
+
+
+@pytest.mark.parametrize("header, expected", [
+    ('W/"abc"', True),
+    ('"abc"', True),                     # слабое сравнение: W/ не важен
+    ('"x", W/"abc"', True),
+    ('W/"x",W/"abc" ', True),
+    ("*", True),
+    ('W/"ab"', False),                   # не подстрока
+    ('W/"abcd"', False),
+    ('"xabc"', False),
+    ("", False),
+    ('abc', False),                      # без кавычек — не тег
+])
+def test_etag_matches(header: str, expected: bool) -> None:
+    assert _etag_matches(header, ETAG) is expected
+
+
+def test_accepted_skips_q_zero() -> None:
+    assert _accepted("gzip;q=0, br;q=0.5, identity") == {"br", "identity"}
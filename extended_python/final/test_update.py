@@ -0,0 +1,104 @@
+"""
+Продвинутый Python — Итоговый проект
+-------------------------------------
+Модуль: test_update.py
+Назначение: регрессионные тесты инкрементального POST /update на
+            локальной заглушке DummyJSON — неизменившиеся категории
+            пропускаются, записываются только изменившиеся товары,
+            отзывы нетронутых товаров не перезаписываются, кэш ответов
+            сразу отдаёт новые цены.
+
+Запуск (из папки final/):
+    python -m pytest -q test_update.py
+"""
+
+from __future__ import annotations
+
+import asyncio
+
+import httpx
+import pytest
+from sqlalchemy import select
+
+from database import SessionLocal, async_engine
+from dummyjson_stub import DummyJSONStub, group_by_category, make_products
+from loader import DummyJSONLoader
+from main import app
+from models import Product, Review
+
+
+def _db_state() -> tuple[dict[int, tuple], dict[int, list[int]]]:
+    """{id товара: (цена, остаток, оценки отзывов)}, {id товара: id отзывов}."""
+    with SessionLocal() as db:
+        prices = {i: (price, stock) for i, price, stock in db.execute(
+            select(Product.id, Product.price, Product.stock))}
+        ratings: dict[int, list[int]] = {}
+        review_ids: dict[int, list[int]] = {}
+        for review_id, product_id, rating in db.execute(
+                select(Review.id, Review.product_id, Review.rating).order_by(Review.id)):
+            ratings.setdefault(product_id, []).append(rating)
+            review_ids.setdefault(product_id, []).append(review_id)
+    state = {i: (*prices[i], tuple(ratings.get(i, ()))) for i in prices}
+    return state, review_ids
+
+
+def _expected(products: list[dict]) -> dict[int, tuple]:
+    return {p["id"]: (p["price"], p["stock"], tuple(r["rating"] for r in p["reviews"]))
+            for p in products}
+
+
+@pytest.mark.parametrize("etag", [True, False], ids=["etag", "hash"])
+def test_incremental_update_writes_only_changes(clean_db, monkeypatch, etag: bool) -> None:
+    products = make_products(300, n_categories=6)
+    catalog = group_by_category(products)
+    stub = DummyJSONStub(catalog, etag=etag)
+
+    async def scenario() -> None:
+        monkeypatch.setattr(DummyJSONLoader, "BASE_URL", await stub.start())
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+
+            async def update(full: bool) -> dict:
+                response = await client.post("/update", params={"full": str(full).lower()})
+                assert response.status_code == 200
+                return response.json()
+
+            body = await update(full=True)
+            assert body["total_saved"] == len(products)
+            assert _db_state()[0] == _expected(products)
+
+            # Источник не менялся — ни одной записи
+            not_modified = stub.not_modified
+            body = await update(full=False)
+            assert body["total_saved"] == 0
+            assert body["metrics"]["unchanged"] == len(catalog)
+            assert stub.not_modified - not_modified == (len(catalog) if etag else 0)
+
+            # Прогреть кэш страницы, которую изменение должно сбросить
+            page = await client.get("/products/", params={"fields": "id,price"})
+            assert page.status_code == 200
+
+            changed = products[:3]
+            for product in changed:
+                product["price"] = round(product["price"] + 1, 2)
+                if product["reviews"]:
+                    product["reviews"][0]["rating"] = product["reviews"][0]["rating"] % 5 + 1
+            changed_ids = {p["id"] for p in changed}
+            review_ids = _db_state()[1]
+
+            body = await update(full=False)
+            assert body["total_saved"] == len(changed)
+            state, after = _db_state()
+            assert state == _expected(products)
+            assert all(after.get(i) == review_ids.get(i)
+                       for i in {p["id"] for p in products} - changed_ids)
+
+            page = await client.get("/products/", params={"fields": "id,price"})
+            prices = {row["id"]: row["price"] for row in page.json()}
+            assert {p["id"]: p["price"] for p in changed} == \
+                {i: prices[i] for i in changed_ids}
+
+        await stub.stop()
+        await async_engine.dispose()
+
+    asyncio.run(scenario())
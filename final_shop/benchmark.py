@@ -0,0 +1,254 @@
+"""
+Замеры производительности магазина.
+
+Правила скидок: сравниваем скомпилированный PricingPlan (один проход
+по позициям) с наивным расчётом «один проход на каждое правило».
+У плана время растёт линейно с размером корзины и почти не зависит
+от числа правил; у наивного расчёта — как размер × число правил.
+Наивный расчёт считает всю разбивку (скидки позиций, порог, доставка,
+налог), и перед замером его итог сверяется с Cart.breakdown().
+
+Автовыбор сортировки: для разных размеров и форм данных показываем,
+какой алгоритм выбирает режим «Авто» (с шагами и без), и сравниваем его
+время с каждым алгоритмом по отдельности.
+
+Поиск: запрос с limit идёт по упорядоченным спискам токенов и
+останавливается на limit-м совпадении; без limit время растёт с числом
+найденных.
+
+Запуск: python benchmark.py [rules|sort|search]
+"""
+
+import random
+import sys
+import time
+
+from cart import Cart
+from discounts import (CategoryDiscount, NForM, PriceBreakdown, PricingPlan,
+                       ThresholdDiscount, WeightShipping)
+from models import CartItem, Product
+from search import SearchIndex
+from sorting import ALGORITHMS, choose_algorithm
+
+
+def measure_time(func, *args, repeat: int = 5) -> float:
+    """Лучшее из repeat запусков func(*args), в миллисекундах."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+# ---------------------------------------------------------------------------
+# Правила скидок
+# ---------------------------------------------------------------------------
+
+def _make_cart(size: int, n_categories: int) -> list[CartItem]:
+    random.seed(0)
+    return [
+        CartItem(Product(i, f"Товар {i}", f"Категория {i % n_categories}",
+                         round(random.uniform(10, 1000), 2),
+                         random.randint(50, 2000)),
+                 qty=random.randint(1, 10))
+        for i in range(size)
+    ]
+
+
+def _make_rules(n_rules: int, n_categories: int) -> list:
+    rules = [
+        ThresholdDiscount(((1000, 0.03), (5000, 0.05), (20000, 0.07))),
+        WeightShipping(((1000, 99), (5000, 199), (20000, 399)), free_over=3000),
+    ]
+    for i in range(n_rules - len(rules)):
+        category = f"Категория {i % n_categories}"
+        if i % 2:
+            rules.append(CategoryDiscount(category, 0.1))
+        else:
+            rules.append(NForM(3, 2, category=category))
+    return rules
+
+
+def _naive_breakdown(items: list[CartItem], rules: list,
+                     tax_rate: float = 0.0) -> PriceBreakdown:
+    """Эталон: те же правила и формулы, что в PricingPlan, но каждое
+    правило заново проходит по всей корзине."""
+    subtotal = sum(item.total_price for item in items)
+    weight = 0
+    item_discount = 0.0
+    tiers: list[tuple[float, float]] = []
+    shipping_rule = None
+    for rule in rules:
+        if isinstance(rule, CategoryDiscount):
+            for item in items:
+                if item.product.category == rule.category:
+                    item_discount += item.product.price * item.qty * rule.rate
+        elif isinstance(rule, NForM):
+            for item in items:
+                if rule.product_id is not None:
+                    applies = item.product.id == rule.product_id
+                else:
+                    applies = rule.category in (None, item.product.category)
+                if applies:
+                    item_discount += (item.qty // rule.n) * (rule.n - rule.m) \
+                        * item.product.price
+        elif isinstance(rule, ThresholdDiscount):
+            tiers.extend(rule.tiers)
+        elif isinstance(rule, WeightShipping):
+            shipping_rule = rule
+            weight = sum(item.total_weight for item in items)
+
+    threshold_discount = 0.0
+    base = subtotal - item_discount
+    for threshold, rate in sorted(tiers, reverse=True):
+        if base > threshold:
+            threshold_discount = round(base * rate, 2)
+            break
+    discount = (round(item_discount + threshold_discount, 2)
+                if item_discount else threshold_discount)
+
+    shipping = 0.0
+    if shipping_rule is not None and weight > 0 and not (
+            shipping_rule.free_over is not None and
+            subtotal - discount >= shipping_rule.free_over):
+        for max_weight, cost in sorted(shipping_rule.tiers):
+            shipping = cost
+            if weight <= max_weight:
+                break
+
+    tax = round((subtotal - discount) * tax_rate, 2)
+    total = round(subtotal - discount + tax + shipping, 2)
+    return PriceBreakdown(subtotal, discount, shipping, tax, total, weight)
+
+
+def _check_same(items: list[CartItem], rules: list) -> None:
+    """План (через Cart.breakdown) и эталон считают одно и то же.
+
+    Скидки позиций складываются в разном порядке, поэтому суммы сверяются
+    с точностью до копейки.
+    """
+    cart = Cart(rules)
+    cart.set_items(items)
+    expected = _naive_breakdown(items, rules, cart.TAX_RATE)
+    got = cart.breakdown()
+    for field, a, b in zip(PriceBreakdown._fields, got, expected):
+        assert abs(a - b) <= 0.011, (field, a, b)
+
+
+def benchmark_rules() -> None:
+    sizes = [10, 100, 1000, 10_000]
+    rule_counts = [2, 10, 50, 200]
+    n_categories = 200
+
+    print("=" * 72)
+    print("Правила скидок: время расчёта корзины, мс")
+    print("=" * 72)
+    header = f"{'Позиций':>8} | {'Правил':>6} | {'План (1 проход)':>16} | {'Наивно':>10} | {'мкс/позиция':>11}"
+    print(header)
+    print("-" * len(header))
+    for size in sizes:
+        items = _make_cart(size, n_categories)
+        for n_rules in rule_counts:
+            rules = _make_rules(n_rules, n_categories)
+            plan = PricingPlan(rules)
+            _check_same(items, rules)
+            t_plan = measure_time(plan.evaluate, items)
+            t_naive = measure_time(_naive_breakdown, items, rules)
+            per_item = t_plan * 1000 / size
+            print(f"{size:>8,} | {n_rules:>6} | {t_plan:>16.3f} | {t_naive:>10.3f} | {per_item:>11.3f}")
+    print()
+
+
+# ---------------------------------------------------------------------------
+# Автовыбор сортировки
+# ---------------------------------------------------------------------------
+
+def _make_items(size: int, shape: str) -> list[CartItem]:
+    random.seed(1)
+    prices = [round(random.uniform(10, 1000), 2) for _ in range(size)]
+    if shape == "отсорт.":
+        prices.sort()
+    elif shape == "почти":
+        prices.sort()
+        for _ in range(max(1, size // 100)):   # 1% случайных обменов
+            i, j = random.randrange(size), random.randrange(size)
+            prices[i], prices[j] = prices[j], prices[i]
+    elif shape == "обратн.":
+        prices.sort(reverse=True)
+    return [CartItem(Product(i, f"Товар {i}", f"Категория {i % 7}", price, 100))
+            for i, price in enumerate(prices)]
+
+
+def benchmark_sort() -> None:
+    sizes = [20, 500, 5000]
+    shapes = ["случайн.", "отсорт.", "почти", "обратн."]
+    quadratic = {"Пузырьком", "Вставками"}
+    names = [name for name in ALGORITHMS if name != "Авто"]
+
+    print("=" * 100)
+    print("Автовыбор сортировки: время, мс (— не замерялось: O(n²) на большом n)")
+    print("=" * 100)
+    header = (f"{'n':>6} | {'данные':>8} | {'выбор (шаги)':>12} | {'выбор':>8} | "
+              + " | ".join(f"{name:>9}" for name in names))
+    print(header)
+    print("-" * len(header))
+    for size in sizes:
+        for shape in shapes:
+            items = _make_items(size, shape)
+            with_steps, _ = choose_algorithm(items, "price", steps=True)
+            without, _ = choose_algorithm(items, "price", steps=False)
+            cells = []
+            for name in names:
+                if name in quadratic and size > 1000 and \
+                        not (name == "Вставками" and with_steps == name):
+                    cells.append(f"{'—':>9}")
+                    continue
+                t = measure_time(ALGORITHMS[name], items, "price", repeat=3)
+                cells.append(f"{t:>9.3f}")
+            print(f"{size:>6} | {shape:>8} | {with_steps:>12} | {without:>8} | "
+                  + " | ".join(cells))
+    print()
+
+
+# ---------------------------------------------------------------------------
+# Поиск с limit
+# ---------------------------------------------------------------------------
+
+def benchmark_search() -> None:
+    sizes = [10_000, 100_000, 1_000_000]
+    queries = ["т", "товар", "то", "товар 1", "категория 7 т"]
+    limit = 50
+
+    print("=" * 72)
+    print(f"Поиск: время запроса с limit={limit} и без limit, мс")
+    print("=" * 72)
+    header = f"{'Товаров':>9} | {'Запрос':>14} | {'Найдено':>9} | {'limit':>8} | {'все':>8}"
+    print(header)
+    print("-" * len(header))
+    random.seed(2)
+    for size in sizes:
+        index = SearchIndex()
+        index.add_many(
+            Product(i, f"Товар {random.randrange(size)}", f"Категория {i % 50}",
+                    round(random.uniform(10, 1000), 2), 100)
+            for i in range(size))
+        for query in queries:
+            found = index.search(query)
+            # первый запрос строит упорядоченные списки токенов — не в счёт
+            assert index.search(query, limit) == found[:limit]
+            t_limit = measure_time(index.search, query, limit)
+            t_all = measure_time(index.search, query, repeat=3)
+            print(f"{size:>9,} | {query:>14} | {len(found):>9,} | "
+                  f"{t_limit:>8.3f} | {t_all:>8.2f}")
+    print()
+
+
+if __name__ == "__main__":
+    which = sys.argv[1] if len(sys.argv) > 1 else "all"
+    if which in ("rules", "all"):
+        benchmark_rules()
+    if which in ("sort", "all"):
+        benchmark_sort()
+    if which in ("search", "all"):
+        benchmark_search()
@@ -0,0 +1,332 @@
+"""
+Массовый импорт и экспорт каталога.
+
+Импорт CSV идёт потоково, пакетами по chunk_size строк: пакет разбирается
+модулем csv, цена и вес проверяются векторно (NumPy), корректные строки
+добавляются в каталог одним вызовом Catalog.add_many — в SQLite это одна
+транзакция executemany, поисковый индекс обновляется раз на пакет.
+Ошибочные строки пропускаются и попадают в отчёт с номером строки файла.
+
+Формат CSV: первая строка — заголовок с колонками name, category, price,
+weight и необязательной description (порядок любой).
+
+Экспорт — столбцовый двоичный файл для быстрой повторной загрузки:
+    .npz   — NumPy: числа как массивы, строки как UTF-8 байты + смещения,
+             категории — словарь значений + коды (как dictionary в Arrow);
+    .arrow — Arrow IPC (нужен pyarrow), категории тоже словарные.
+При загрузке id назначаются каталогом заново.
+
+Запуск:
+    python bulk.py import products.csv [--db shop.db]
+    python bulk.py export catalog.npz  [--db shop.db]
+    python bulk.py load   catalog.npz  [--db shop.db]
+    python bulk.py demo   [кол-во строк]     # замер на временных файлах
+"""
+from __future__ import annotations
+
+import argparse
+import csv
+import itertools
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Iterator, NamedTuple
+
+try:
+    import numpy as np
+except ImportError as exc:  # pragma: no cover
+    raise SystemExit(
+        "Не найден пакет 'numpy'. Установите его командой: pip install numpy"
+    ) from exc
+
+from catalog import Catalog
+from models import Product
+from storage import SQLiteCatalog
+
+CSV_COLUMNS = ("name", "category", "price", "weight", "description")
+_REQUIRED = CSV_COLUMNS[:4]
+
+
+class ImportReport(NamedTuple):
+    """Итог импорта: сколько товаров добавлено и описания пропущенных строк."""
+    imported: int
+    errors: list[str]
+
+
+# ===========================================================================
+# Импорт CSV
+# ===========================================================================
+
+def _to_float(values: list[str]) -> np.ndarray:
+    """Строки → float64 одним вызовом; неразборные значения → NaN."""
+    try:
+        return np.array(values, dtype=np.float64)
+    except ValueError:
+        out = np.empty(len(values))
+        for i, v in enumerate(values):
+            try:
+                out[i] = float(v)
+            except ValueError:
+                out[i] = np.nan
+        return out
+
+
+def _validate(chunk: list[list[str]]) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """Проверить пакет строк [name, category, price, weight, description].
+
+    Возвращает (маска корректных строк, цены, веса).
+    """
+    price = _to_float([row[2] for row in chunk])
+    weight = _to_float([row[3] for row in chunk])
+    filled = np.fromiter((bool(row[0].strip()) and bool(row[1].strip())
+                          for row in chunk), dtype=bool, count=len(chunk))
+    with np.errstate(invalid="ignore"):
+        ok = (filled & np.isfinite(price) & np.isfinite(weight)
+              & (price >= 0) & (weight >= 0))
+    return ok, price, weight
+
+
+def _reason(row: list[str], price: float, weight: float) -> str:
+    if not row[0].strip() or not row[1].strip():
+        return "название и категория обязательны"
+    if not np.isfinite(price) or not np.isfinite(weight):
+        return "цена и вес должны быть числами"
+    return "цена и вес не могут быть отрицательными"
+
+
+def read_csv_chunks(path: str | Path, chunk_size: int = 50_000,
+                    delimiter: str = ","
+                    ) -> Iterator[tuple[list[int], list[list[str]]]]:
+    """Пакеты строк CSV: (номера строк файла, строки в порядке CSV_COLUMNS).
+
+    Строки с недостающими колонками отдаются пустыми списками — их
+    отбракует вызывающий код.
+    """
+    with open(path, newline="", encoding="utf-8-sig") as f:
+        reader = csv.reader(f, delimiter=delimiter)
+        header = [h.strip().lower() for h in next(reader, [])]
+        missing = [c for c in _REQUIRED if c not in header]
+        if missing:
+            raise ValueError(f"В заголовке CSV нет колонок: {', '.join(missing)}")
+        positions = [header.index(c) if c in header else None for c in CSV_COLUMNS]
+        width = max(p for p in positions if p is not None) + 1
+
+        while True:
+            lines, rows = [], []
+            for raw in itertools.islice(reader, chunk_size):
+                lines.append(reader.line_num)
+                if len(raw) < width:
+                    rows.append([])
+                    continue
+                rows.append([raw[p] if p is not None else "" for p in positions])
+            if not rows:
+                return
+            yield lines, rows
+
+
+def import_csv(catalog: Catalog, path: str | Path, chunk_size: int = 50_000,
+               delimiter: str = ",") -> ImportReport:
+    """Добавить в каталог товары из CSV-файла (см. формат в описании модуля)."""
+    imported = 0
+    errors: list[str] = []
+    for lines, rows in read_csv_chunks(path, chunk_size, delimiter):
+        complete = [i for i, row in enumerate(rows) if row]
+        bad = [(lines[i], "не хватает колонок")
+               for i, row in enumerate(rows) if not row]
+        chunk = [rows[i] for i in complete]
+        if not chunk:
+            errors += [f"строка {line}: {text}" for line, text in bad]
+            continue
+        ok, price, weight = _validate(chunk)
+        bad += [(lines[complete[i]], _reason(chunk[i], price[i], weight[i]))
+                for i in np.flatnonzero(~ok)]
+        errors += [f"строка {line}: {text}" for line, text in sorted(bad)]
+        good = np.flatnonzero(ok)
+        catalog.add_many(
+            (chunk[i][0], chunk[i][1], float(price[i]), float(weight[i]), chunk[i][4])
+            for i in good)
+        imported += len(good)
+    return ImportReport(imported, errors)
+
+
+# ===========================================================================
+# Столбцовый экспорт / загрузка
+# ===========================================================================
+
+def _iter_products(catalog: Catalog) -> Iterator[Product]:
+    if isinstance(catalog, SQLiteCatalog):
+        # Потоковое чтение базы, минуя кэш каталога
+        return catalog.storage.iter_products(batch=10_000)
+    return iter(catalog.all())
+
+
+def _pack_strings(values: list[str]) -> tuple[np.ndarray, np.ndarray]:
+    """Строки → (UTF-8 байты подряд, смещения длиной len + 1)."""
+    encoded = [v.encode() for v in values]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(b) for b in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+def _unpack_strings(data: np.ndarray, offsets: np.ndarray) -> list[str]:
+    raw = data.tobytes()
+    bounds = offsets.tolist()
+    return [raw[a:b].decode() for a, b in zip(bounds, bounds[1:])]
+
+
+def export_columns(catalog: Catalog, path: str | Path) -> int:
+    """Сохранить каталог в .npz или .arrow. Возвращает число товаров."""
+    products = list(_iter_products(catalog))
+    ids = np.fromiter((p.id for p in products), dtype=np.int64, count=len(products))
+    price = np.fromiter((p.price for p in products), dtype=np.float64, count=len(products))
+    weight = np.fromiter((p.weight for p in products), dtype=np.float64, count=len(products))
+    categories, codes = np.unique(
+        np.array([p.category for p in products], dtype=object), return_inverse=True)
+    names = [p.name for p in products]
+    descriptions = [p.description for p in products]
+
+    if Path(path).suffix == ".arrow":
+        pa = _pyarrow()
+        table = pa.table({
+            "id": ids,
+            "name": pa.array(names, pa.string()),
+            "category": pa.DictionaryArray.from_arrays(
+                pa.array(codes.astype(np.int32)),
+                pa.array(categories.tolist(), pa.string())),
+            "price": price,
+            "weight": weight,
+            "description": pa.array(descriptions, pa.string()),
+        })
+        with pa.OSFile(str(path), "wb") as sink, \
+                pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+        return len(products)
+
+    name_data, name_offsets = _pack_strings(names)
+    desc_data, desc_offsets = _pack_strings(descriptions)
+    cat_data, cat_offsets = _pack_strings(categories.tolist())
+    with open(path, "wb") as f:   # open(): np.savez не добавит своё .npz
+        np.savez(f, id=ids, price=price, weight=weight,
+                 category_codes=codes.astype(np.int32),
+                 category_data=cat_data, category_offsets=cat_offsets,
+                 name_data=name_data, name_offsets=name_offsets,
+                 description_data=desc_data, description_offsets=desc_offsets)
+    return len(products)
+
+
+def read_columns(path: str | Path) -> list[tuple]:
+    """Прочитать файл export_columns: строки (name, category, price, weight, description)."""
+    if Path(path).suffix == ".arrow":
+        pa = _pyarrow()
+        with pa.memory_map(str(path)) as source:
+            table = pa.ipc.open_file(source).read_all()
+        columns = table.select(list(CSV_COLUMNS)).to_pydict()
+        return list(zip(*(columns[c] for c in CSV_COLUMNS)))
+
+    with np.load(path) as data:
+        categories = _unpack_strings(data["category_data"], data["category_offsets"])
+        category = [categories[c] for c in data["category_codes"].tolist()]
+        names = _unpack_strings(data["name_data"], data["name_offsets"])
+        descriptions = _unpack_strings(data["description_data"],
+                                       data["description_offsets"])
+        price = data["price"].tolist()
+        weight = data["weight"].tolist()
+    return list(zip(names, category, price, weight, descriptions))
+
+
+def load_columns(catalog: Catalog, path: str | Path) -> int:
+    """Добавить в каталог товары из файла export_columns."""
+    return len(catalog.add_many(read_columns(path)))
+
+
+def _pyarrow():
+    try:
+        import pyarrow as pa
+        import pyarrow.ipc  # noqa: F401
+    except ImportError as exc:
+        raise SystemExit(
+            "Не найден пакет 'pyarrow'. Установите его командой: pip install pyarrow "
+            "(или используйте формат .npz)"
+        ) from exc
+    return pa
+
+
+# ===========================================================================
+# Командная строка
+# ===========================================================================
+
+def _demo(n_rows: int) -> None:
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = Path(tmp) / "products.csv"
+        with open(csv_path, "w", newline="", encoding="utf-8") as f:
+            writer = csv.writer(f)
+            writer.writerow(CSV_COLUMNS)
+            for i in range(n_rows):
+                price = round(float(rng.uniform(10, 1000)), 2)
+                if i % 1000 == 999:
+                    price = -price   # немного брака для отчёта
+                writer.writerow((f"Товар {i}", f"Категория {i % 40}", price,
+                                 int(rng.integers(50, 3000)), f"Описание {i % 97}"))
+
+        catalog = SQLiteCatalog.open(Path(tmp) / "shop.db")
+        start = time.perf_counter()
+        report = import_csv(catalog, csv_path)
+        t_import = time.perf_counter() - start
+
+        npz_path = Path(tmp) / "catalog.npz"
+        start = time.perf_counter()
+        exported = export_columns(catalog, npz_path)
+        t_export = time.perf_counter() - start
+
+        start = time.perf_counter()
+        rows = read_columns(npz_path)
+        t_read = time.perf_counter() - start
+
+        start = time.perf_counter()
+        fresh = Catalog()
+        fresh.add_many(rows)
+        t_load = time.perf_counter() - start
+
+        print(f"CSV: {n_rows:,} строк, {csv_path.stat().st_size / 1e6:.1f} МБ")
+        print(f"Импорт CSV → SQLite:  {t_import * 1000:9.1f} мс  "
+              f"({report.imported:,} товаров, {len(report.errors)} ошибок)")
+        print(f"Экспорт в .npz:       {t_export * 1000:9.1f} мс  "
+              f"({exported:,} товаров, {npz_path.stat().st_size / 1e6:.1f} МБ)")
+        print(f"Чтение .npz:          {t_read * 1000:9.1f} мс")
+        print(f"Catalog.add_many:     {t_load * 1000:9.1f} мс")
+        catalog.storage.close()
+
+
+def _main(argv: list[str]) -> None:
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("command", choices=["import", "export", "load", "demo"])
+    parser.add_argument("path", nargs="?", help="файл CSV / .npz / .arrow; для demo — кол-во строк")
+    parser.add_argument("--db", default=str(Path(__file__).with_name("shop.db")))
+    args = parser.parse_args(argv)
+
+    if args.command == "demo":
+        _demo(int(args.path) if args.path else 200_000)
+        return
+    if args.path is None:
+        parser.error("не указан файл")
+
+    catalog = SQLiteCatalog.open(args.db)
+    start = time.perf_counter()
+    if args.command == "import":
+        report = import_csv(catalog, args.path)
+        print(f"Добавлено товаров: {report.imported:,}, пропущено строк: {len(report.errors)}")
+        for line in report.errors[:20]:
+            print("  " + line)
+    elif args.command == "export":
+        print(f"Сохранено товаров: {export_columns(catalog, args.path):,}")
+    else:
+        print(f"Загружено товаров: {load_columns(catalog, args.path):,}")
+    print(f"Время: {(time.perf_counter() - start) * 1000:.1f} мс")
+    catalog.storage.close()
+
+
+if __name__ == "__main__":
+    _main(sys.argv[1:])
@@ -1,6 +1,7 @@
 """
 Корзина покупок: добавление, удаление, изменение кол-ва, подсчёт итога.
 """
+from discounts import PriceBreakdown, PricingPlan, Rule, ThresholdDiscount
 from models import Product, CartItem
 
 
@@ -11,9 +12,19 @@ class Cart:
     DISCOUNT_RATE      = 0.05     # 5 % скидка
     TAX_RATE           = 0.00     # НДС (0 — включён в цену, можно изменить)
 
-    def __init__(self):
+    def __init__(self, rules: list[Rule] | None = None):
         # Хранение: id товара → CartItem
         self._items: dict[int, CartItem] = {}
+        # Правила скидок/доставки; None — пороговая скидка по атрибутам класса
+        self._rules = rules
+        self._plan: PricingPlan | None = None
+        self._plan_key: tuple | None = None
+        # Последний расчёт и (версия, план, налог), для которых он сделан
+        self._breakdown: PriceBreakdown | None = None
+        self._breakdown_key: tuple | None = None
+        # Счётчик изменений: позволяет понять, менялась ли корзина
+        # за время фоновой сортировки
+        self._version: int = 0
 
     # ------------------------------------------------------------------
     # Операции с позициями
@@ -27,12 +38,14 @@ class Cart:
             self._items[product.id].qty += qty
         else:
             self._items[product.id] = CartItem(product=product, qty=qty)
+        self._version += 1
 
     def remove(self, product_id: int) -> None:
         """Полностью удалить позицию из корзины."""
         if product_id not in self._items:
             raise KeyError(f"Товар с id={product_id} не найден в корзине")
         del self._items[product_id]
+        self._version += 1
 
     def change_qty(self, product_id: int, delta: int) -> None:
         """
@@ -45,10 +58,12 @@ class Cart:
         item.qty += delta
         if item.qty <= 0:
             del self._items[product_id]
+        self._version += 1
 
     def clear(self) -> None:
         """Очистить корзину."""
         self._items.clear()
+        self._version += 1
 
     # ------------------------------------------------------------------
     # Просмотр
@@ -58,9 +73,18 @@ class Cart:
         """Вернуть список позиций корзины."""
         return list(self._items.values())
 
+    def get(self, product_id: int) -> CartItem | None:
+        """Позиция корзины по id товара (None если её нет)."""
+        return self._items.get(product_id)
+
+    def ids(self) -> list[int]:
+        """id товаров в порядке позиций корзины."""
+        return list(self._items)
+
     def set_items(self, items: list[CartItem]) -> None:
         """Заменить содержимое корзины (используется после сортировки)."""
         self._items = {item.product.id: item for item in items}
+        self._version += 1
 
     def is_empty(self) -> bool:
         return len(self._items) == 0
@@ -68,28 +92,70 @@ class Cart:
     def size(self) -> int:
         return len(self._items)
 
+    @property
+    def version(self) -> int:
+        """Номер версии содержимого; растёт при каждом изменении."""
+        return self._version
+
+    def touch(self) -> None:
+        """Товары корзины изменились снаружи (например, цена в каталоге)."""
+        self._version += 1
+
     # ------------------------------------------------------------------
     # Подсчёт стоимости (K4: скидки и налоги)
     # ------------------------------------------------------------------
 
+    def set_rules(self, rules: list[Rule] | None) -> None:
+        """Заменить правила скидок (None — правило по умолчанию)."""
+        self._rules = rules
+        self._plan = None
+
+    def plan(self) -> PricingPlan:
+        """Скомпилированный план расчёта для текущих правил."""
+        if self._rules is not None:
+            if self._plan is None:
+                self._plan = PricingPlan(self._rules)
+            return self._plan
+        # Правило по умолчанию следует за атрибутами класса
+        key = (self.DISCOUNT_THRESHOLD, self.DISCOUNT_RATE)
+        if self._plan is None or self._plan_key != key:
+            self._plan = PricingPlan([ThresholdDiscount((key,))])
+            self._plan_key = key
+        return self._plan
+
+    def breakdown(self) -> PriceBreakdown:
+        """Полный расчёт корзины за один проход по позициям.
+
+        Результат запоминается до изменения корзины, правил или ставки
+        налога — subtotal(), discount(), tax() и total() подряд считают
+        корзину один раз. После правки товара в каталоге — touch().
+        """
+        plan = self.plan()
+        key = (self._version, plan, self.TAX_RATE)
+        if self._breakdown is None or self._breakdown_key != key:
+            self._breakdown = plan.evaluate(self._items.values(), self.TAX_RATE)
+            self._breakdown_key = key
+        return self._breakdown
+
     def subtotal(self) -> float:
         """Сумма без скидки и налогов."""
-        return sum(item.total_price for item in self._items.values())
+        return self.breakdown().subtotal
 
     def discount(self) -> float:
-        """Размер скидки в рублях (5% при сумме > 1000 руб.)."""
-        sub = self.subtotal()
-        if sub > self.DISCOUNT_THRESHOLD:
-            return round(sub * self.DISCOUNT_RATE, 2)
-        return 0.0
+        """Размер скидки в рублях (по умолчанию 5% при сумме > 1000 руб.)."""
+        return self.breakdown().discount
+
+    def shipping(self) -> float:
+        """Стоимость доставки в рублях."""
+        return self.breakdown().shipping
 
     def tax(self) -> float:
         """Налог (НДС) в рублях."""
-        return round((self.subtotal() - self.discount()) * self.TAX_RATE, 2)
+        return self.breakdown().tax
 
     def total(self) -> float:
-        """Итоговая сумма: subtotal − скидка + налог."""
-        return round(self.subtotal() - self.discount() + self.tax(), 2)
+        """Итоговая сумма: subtotal − скидка + налог + доставка."""
+        return self.breakdown().total
 
     def total_weight(self) -> float:
         """Общий вес корзины в граммах."""
@@ -1,15 +1,53 @@
 """
 Каталог товаров: хранение, добавление, редактирование, удаление.
 """
+from collections.abc import Iterable, Sequence
+
 from models import Product
+from search import SearchIndex, normalize
+
+
+# Ключи сортировки каталога по колонкам таблицы
+SORT_COLUMNS = {
+    "id":       lambda p: p.id,
+    "name":     lambda p: normalize(p.name),
+    "category": lambda p: normalize(p.category),
+    "price":    lambda p: p.price,
+    "weight":   lambda p: p.weight,
+}
+
+
+class ReversedView(Sequence):
+    """Последовательность в обратном порядке без копирования исходной."""
+
+    def __init__(self, base: Sequence):
+        self._base = base
+
+    def __len__(self) -> int:
+        return len(self._base)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        n = len(self._base)
+        if index < 0:
+            index += n
+        if not 0 <= index < n:
+            raise IndexError(index)
+        return self._base[n - 1 - index]
 
 
 class Catalog:
     """Управляет списком товаров магазина."""
 
     def __init__(self):
-        self._products: list[Product] = []
+        # id → Product; dict сохраняет порядок добавления и даёт поиск за O(1)
+        self._products: dict[int, Product] = {}
         self._next_id: int = 1
+        # Кэш отсортированных перестановок id: колонка → список id
+        self._sort_cache: dict[str, list[int]] = {}
+        # Поисковый индекс обновляется при каждом add / update / remove
+        self._index: SearchIndex | None = SearchIndex()
 
     # ------------------------------------------------------------------
     # CRUD
@@ -28,41 +66,124 @@ class Catalog:
             weight=weight,
             description=description.strip(),
         )
-        self._products.append(p)
+        self._products[p.id] = p
         self._next_id += 1
+        self._sort_cache.clear()
+        if self._index is not None:
+            self._index.add(p)
         return p
 
+    def add_many(self, rows: Iterable[tuple]) -> list[Product]:
+        """Добавить пакет товаров из кортежей (name, category, price, weight[, description]).
+
+        Кэш сортировок сбрасывается и поисковый индекс обновляется один
+        раз на пакет, а не на каждый товар.
+        """
+        products = self._make_products(rows)
+        for p in products:
+            self._products[p.id] = p
+        self._sort_cache.clear()
+        if self._index is not None:
+            self._index.add_many(products)
+        return products
+
+    def _make_products(self, rows: Iterable[tuple]) -> list[Product]:
+        """Проверить строки и создать Product с очередными id."""
+        products = []
+        next_id = self._next_id
+        for name, category, price, weight, *rest in rows:
+            if price < 0 or weight < 0:
+                raise ValueError("Цена и вес не могут быть отрицательными")
+            products.append(Product(
+                id=next_id,
+                name=name.strip(),
+                category=category.strip(),
+                price=price,
+                weight=weight,
+                description=rest[0].strip() if rest else "",
+            ))
+            next_id += 1
+        self._next_id = next_id
+        return products
+
     def get(self, product_id: int) -> Product | None:
         """Найти товар по id. Возвращает None если не найден."""
-        for p in self._products:
-            if p.id == product_id:
-                return p
-        return None
+        return self._products.get(product_id)
 
     def update(self, product_id: int, **kwargs) -> Product:
         """Изменить поля товара по id. Возвращает обновлённый Product."""
         p = self.get(product_id)
         if p is None:
             raise KeyError(f"Товар с id={product_id} не найден")
+        self._check_fields(p, kwargs)
         for field, value in kwargs.items():
+            setattr(p, field, value)
+            # Порядок по остальным колонкам не изменился
+            self._sort_cache.pop(field, None)
+        if self._index is not None:
+            self._index.update(p)
+        return p
+
+    @staticmethod
+    def _check_fields(p: Product, fields: dict) -> None:
+        """Проверить все поля до изменения товара — без частичных правок."""
+        for field, value in fields.items():
             if not hasattr(p, field):
                 raise AttributeError(f"Неизвестное поле: {field}")
             if field in ("price", "weight") and value < 0:
                 raise ValueError(f"Поле '{field}' не может быть отрицательным")
-            setattr(p, field, value)
-        return p
 
     def remove(self, product_id: int) -> None:
         """Удалить товар из каталога по id."""
-        p = self.get(product_id)
-        if p is None:
+        if product_id not in self._products:
             raise KeyError(f"Товар с id={product_id} не найден")
-        self._products.remove(p)
+        del self._products[product_id]
+        self._sort_cache.clear()
+        if self._index is not None:
+            self._index.remove(product_id)
 
     def all(self) -> list[Product]:
         """Вернуть все товары каталога."""
+        return list(self._products.values())
+
+    def ids(self) -> list[int]:
+        """Вернуть id всех товаров в порядке добавления."""
         return list(self._products)
 
+    def size(self) -> int:
+        return len(self._products)
+
+    def sorted_ids(self, column: str, reverse: bool = False) -> Sequence[int]:
+        """id товаров, упорядоченные по колонке таблицы.
+
+        Перестановка считается один раз и кэшируется до изменения каталога;
+        обратный порядок — это представление того же списка с конца.
+        """
+        if column not in SORT_COLUMNS:
+            raise ValueError(f"Неизвестная колонка сортировки: {column}")
+        order = self._sort_cache.get(column)
+        if order is None:
+            key = SORT_COLUMNS[column]
+            order = sorted(self._products,
+                           key=lambda pid: key(self._products[pid]))
+            self._sort_cache[column] = order
+        return ReversedView(order) if reverse else order
+
+    # ------------------------------------------------------------------
+    # Поиск
+    # ------------------------------------------------------------------
+
+    def search_index(self) -> SearchIndex:
+        return self._index
+
+    def search(self, query: str, limit: int | None = None) -> list[int]:
+        """id товаров, подходящих под запрос (см. SearchIndex.search)."""
+        return self.search_index().search(query, limit)
+
+    def facets(self, ids: list[int] | None = None) -> dict[str, dict[str, int]]:
+        """Фасеты по категориям и ценовым корзинам (см. SearchIndex.facets)."""
+        return self.search_index().facets(ids)
+
     # ------------------------------------------------------------------
     # Предзаполненный каталог
     # ------------------------------------------------------------------
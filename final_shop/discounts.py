@@ -0,0 +1,184 @@
+"""
+Правила скидок и доставки для корзины.
+
+Правила описываются неизменяемыми dataclass-ами и один раз компилируются
+в PricingPlan. План раскладывает правила позиций по словарям
+«категория → правила» и «id товара → правила», поэтому корзина считается
+за один проход по позициям: каждая позиция проверяет только правила,
+которые к ней относятся, а не все правила подряд.
+
+Порядок расчёта:
+    1. subtotal и вес — сумма по позициям;
+    2. скидки позиций (CategoryDiscount, NForM);
+    3. пороговая скидка (ThresholdDiscount) — от суммы после шага 2;
+    4. доставка по весу (WeightShipping);
+    5. налог — от суммы после скидок, итог = subtotal − скидка + налог + доставка.
+"""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Iterable, NamedTuple
+
+from models import CartItem
+
+
+# ===========================================================================
+# Правила
+# ===========================================================================
+
+@dataclass(frozen=True)
+class ThresholdDiscount:
+    """Ступенчатая скидка от суммы: tiers = ((порог, ставка), ...).
+
+    Применяется ставка самой высокой ступени, порог которой превышен.
+    """
+    tiers: tuple[tuple[float, float], ...]
+
+
+@dataclass(frozen=True)
+class CategoryDiscount:
+    """Скидка rate на все товары категории."""
+    category: str
+    rate: float
+
+
+@dataclass(frozen=True)
+class NForM:
+    """«n по цене m»: из каждых n штук оплачиваются m.
+
+    Действует на товар product_id, на категорию или (если оба None) на всё.
+    """
+    n: int
+    m: int
+    category: str | None = None
+    product_id: int | None = None
+
+
+@dataclass(frozen=True)
+class WeightShipping:
+    """Доставка по весу: tiers = ((до граммов, стоимость), ...).
+
+    Вес тяжелее последней ступени стоит как последняя ступень;
+    при сумме от free_over (после скидок) доставка бесплатна.
+    """
+    tiers: tuple[tuple[float, float], ...]
+    free_over: float | None = None
+
+
+Rule = ThresholdDiscount | CategoryDiscount | NForM | WeightShipping
+
+
+class PriceBreakdown(NamedTuple):
+    """Результат расчёта корзины."""
+    subtotal: float
+    discount: float
+    shipping: float
+    tax:      float
+    total:    float
+    weight:   float
+
+
+# ===========================================================================
+# Компиляция
+# ===========================================================================
+
+ItemRule = Callable[[CartItem], float]
+
+
+def _category_rule(rule: CategoryDiscount) -> ItemRule:
+    rate = rule.rate
+    return lambda item: item.product.price * item.qty * rate
+
+
+def _n_for_m_rule(rule: NForM) -> ItemRule:
+    n, free = rule.n, rule.n - rule.m
+    return lambda item: (item.qty // n) * free * item.product.price
+
+
+class PricingPlan:
+    """Скомпилированный набор правил: расчёт корзины за один проход."""
+
+    def __init__(self, rules: Iterable[Rule] = ()):
+        self.rules = tuple(rules)
+        self._by_category: dict[str, list[ItemRule]] = {}
+        self._by_product: dict[int, list[ItemRule]] = {}
+        self._for_all: list[ItemRule] = []
+        self._tiers: list[tuple[float, float]] = []
+        self._shipping: WeightShipping | None = None
+        self._ship_tiers: list[tuple[float, float]] = []
+
+        for rule in self.rules:
+            if isinstance(rule, ThresholdDiscount):
+                self._tiers.extend(rule.tiers)
+            elif isinstance(rule, CategoryDiscount):
+                self._by_category.setdefault(rule.category, []).append(
+                    _category_rule(rule))
+            elif isinstance(rule, NForM):
+                if not 0 <= rule.m < rule.n:
+                    raise ValueError("Для правила «n по цене m» нужно 0 ≤ m < n")
+                fn = _n_for_m_rule(rule)
+                if rule.product_id is not None:
+                    self._by_product.setdefault(rule.product_id, []).append(fn)
+                elif rule.category is not None:
+                    self._by_category.setdefault(rule.category, []).append(fn)
+                else:
+                    self._for_all.append(fn)
+            elif isinstance(rule, WeightShipping):
+                if self._shipping is not None:
+                    raise ValueError("Допускается только одно правило доставки")
+                self._shipping = rule
+                self._ship_tiers = sorted(rule.tiers)
+            else:
+                raise TypeError(f"Неизвестное правило: {rule!r}")
+
+        # Ступени проверяем от самого высокого порога
+        self._tiers.sort(reverse=True)
+        self._has_item_rules = bool(
+            self._by_category or self._by_product or self._for_all)
+
+    def evaluate(self, items: Iterable[CartItem],
+                 tax_rate: float = 0.0) -> PriceBreakdown:
+        """Посчитать корзину за один проход по позициям."""
+        subtotal = 0
+        weight = 0
+        item_discount = 0.0
+        by_category = self._by_category
+        by_product = self._by_product
+        for_all = self._for_all
+        for item in items:
+            subtotal += item.total_price
+            weight += item.total_weight
+            if self._has_item_rules:
+                for fn in by_category.get(item.product.category, ()):
+                    item_discount += fn(item)
+                for fn in by_product.get(item.product.id, ()):
+                    item_discount += fn(item)
+                for fn in for_all:
+                    item_discount += fn(item)
+
+        threshold_discount = 0.0
+        base = subtotal - item_discount
+        for threshold, rate in self._tiers:
+            if base > threshold:
+                threshold_discount = round(base * rate, 2)
+                break
+        discount = (round(item_discount + threshold_discount, 2)
+                    if item_discount else threshold_discount)
+
+        shipping = 0.0
+        rule = self._shipping
+        if rule is not None and weight > 0 and not (
+                rule.free_over is not None and subtotal - discount >= rule.free_over):
+            for max_weight, cost in self._ship_tiers:
+                shipping = cost
+                if weight <= max_weight:
+                    break
+
+        tax = round((subtotal - discount) * tax_rate, 2)
+        total = round(subtotal - discount + tax + shipping, 2)
+        return PriceBreakdown(subtotal, discount, shipping, tax, total, weight)
+
+
+def compile_rules(rules: Iterable[Rule]) -> PricingPlan:
+    """Скомпилировать правила в план расчёта."""
+    return PricingPlan(rules)
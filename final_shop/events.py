@@ -0,0 +1,249 @@
+"""
+Журнал событий корзины (event sourcing) со снимками.
+
+Каждое изменение корзины дописывается в конец двоичного журнала
+фиксированной записью struct «<BIi» (9 байт): операция, id товара, число.
+
+    ADD    product_id, qty      — Cart.add
+    QTY    product_id, delta    — Cart.change_qty
+    REMOVE product_id           — Cart.remove
+    CLEAR                       — Cart.clear
+    SET    n                    — Cart.set_items, за ней n записей ITEM
+    ITEM   product_id, qty
+
+Журнал никогда не переписывается — это история для аудита и отмены.
+Только недописанная запись в конце (процесс упал посреди write)
+отрезается при открытии. Раз в snapshot_every событий состояние
+журнала (id → кол-во, включая товары, уже удалённые из каталога)
+сохраняется в файл-снимок вместе с номером события; при запуске
+корзина читает снимок и проигрывает только хвост журнала.
+
+Проигрывание идёт по словарю id → кол-во без создания CartItem на каждое
+событие: struct.iter_unpack разбирает весь хвост одним вызовом.
+"""
+from __future__ import annotations
+
+import os
+import struct
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from cart import Cart
+from catalog import Catalog
+from models import CartItem, Product
+
+ADD, QTY, REMOVE, CLEAR, SET, ITEM = range(1, 7)
+
+_RECORD = struct.Struct("<BIi")
+_SNAP_HEADER = struct.Struct("<QI")   # номер события, число позиций
+_SNAP_ITEM = struct.Struct("<Ii")     # id товара, кол-во
+
+
+# ===========================================================================
+# Журнал
+# ===========================================================================
+
+class CartEventLog:
+    """Файл-журнал событий и файл-снимок одной корзины."""
+
+    def __init__(self, path: str | Path):
+        self.path = Path(path)
+        self.snapshot_path = self.path.with_suffix(".snap")
+        self._file = open(self.path, "ab")
+        size = self.path.stat().st_size
+        self._count = size // _RECORD.size
+        if size != self._count * _RECORD.size:
+            # Хвост недописанной записи: иначе следующие записи сдвинутся
+            self._file.truncate(self._count * _RECORD.size)
+
+    def __len__(self) -> int:
+        """Количество событий в журнале."""
+        return self._count
+
+    def close(self) -> None:
+        self._file.close()
+
+    def append(self, records: Iterable[tuple[int, int, int]]) -> None:
+        """Дописать записи одной операцией записи."""
+        data = b"".join(_RECORD.pack(*r) for r in records)
+        self._file.write(data)
+        self._file.flush()
+        self._count += len(data) // _RECORD.size
+
+    def records(self, start: int = 0, stop: int | None = None) -> Iterator[tuple[int, int, int]]:
+        """Записи с номерами [start, stop)."""
+        stop = self._count if stop is None else min(stop, self._count)
+        if start >= stop:
+            return iter(())
+        with open(self.path, "rb") as f:
+            f.seek(start * _RECORD.size)
+            data = f.read((stop - start) * _RECORD.size)
+        return _RECORD.iter_unpack(data)
+
+    # --- Снимки ---
+
+    def write_snapshot(self, state: dict[int, int], at: int) -> None:
+        """Сохранить состояние после события номер at (атомарно)."""
+        tmp = self.snapshot_path.with_suffix(".snap.tmp")
+        with open(tmp, "wb") as f:
+            f.write(_SNAP_HEADER.pack(at, len(state)))
+            f.write(b"".join(_SNAP_ITEM.pack(pid, qty) for pid, qty in state.items()))
+        os.replace(tmp, self.snapshot_path)
+
+    def read_snapshot(self) -> tuple[dict[int, int], int]:
+        """Последний снимок: (состояние, номер события). Без снимка — ({}, 0)."""
+        try:
+            data = self.snapshot_path.read_bytes()
+        except FileNotFoundError:
+            return {}, 0
+        at, n = _SNAP_HEADER.unpack_from(data)
+        items = _SNAP_ITEM.iter_unpack(data[_SNAP_HEADER.size:
+                                            _SNAP_HEADER.size + n * _SNAP_ITEM.size])
+        return dict(items), at
+
+
+def replay(records: Iterable[tuple[int, int, int]],
+           state: dict[int, int] | None = None) -> dict[int, int]:
+    """Проиграть события поверх состояния id → кол-во (порядок позиций сохраняется)."""
+    state = {} if state is None else state
+    pending_set = 0
+    for op, pid, value in records:
+        if op == ADD:
+            state[pid] = state.get(pid, 0) + value
+        elif op == QTY:
+            qty = state.get(pid, 0) + value
+            if qty <= 0:
+                state.pop(pid, None)
+            else:
+                state[pid] = qty
+        elif op == REMOVE:
+            state.pop(pid, None)
+        elif op == CLEAR:
+            state.clear()
+        elif op == SET:
+            state.clear()
+            pending_set = value
+        elif op == ITEM:
+            if pending_set <= 0:
+                raise ValueError("Запись ITEM без предшествующей SET")
+            state[pid] = value
+            pending_set -= 1
+        else:
+            raise ValueError(f"Неизвестная операция в журнале: {op}")
+    return state
+
+
+# ===========================================================================
+# Корзина с журналом
+# ===========================================================================
+
+class EventSourcedCart(Cart):
+    """Корзина, записывающая каждое изменение в журнал событий."""
+
+    def __init__(self, catalog: Catalog, log: CartEventLog,
+                 snapshot_every: int = 1000, rules=None):
+        if snapshot_every <= 0:
+            raise ValueError("snapshot_every должен быть больше нуля")
+        super().__init__(rules)
+        self._catalog = catalog
+        self._log = log
+        self._snapshot_every = snapshot_every
+        # Номера событий, с которых начинались изменения (для отмены)
+        self._marks: list[int] = []
+        # Состояние по журналу (id → кол-во) — из него пишутся снимки;
+        # в отличие от _items, здесь остаются товары, удалённые из каталога
+        self._state: dict[int, int] = {}
+
+    @classmethod
+    def open(cls, catalog: Catalog, path: str | Path,
+             snapshot_every: int = 1000,
+             initial: list[CartItem] | None = None,
+             rules=None) -> "EventSourcedCart":
+        """Восстановить корзину: снимок + проигрывание хвоста журнала.
+
+        initial — содержимое для нового (пустого) журнала, например
+        корзина, сохранённая до появления журнала; rules — правила скидок
+        (в журнал не пишутся, см. Cart).
+        """
+        log = CartEventLog(path)
+        try:
+            cart = cls(catalog, log, snapshot_every, rules)
+        except ValueError:
+            log.close()
+            raise
+        if len(cart._log) == 0 and initial:
+            cart.set_items(initial)
+            cart._marks.clear()   # начальное состояние не отменяется
+        else:
+            cart._state = cart.state_at(len(cart._log))
+            Cart.set_items(cart, cart._materialize(cart._state))
+        return cart
+
+    def close(self) -> None:
+        self._log.close()
+
+    # --- Запись событий ---
+
+    def _record(self, records: list[tuple[int, int, int]]) -> None:
+        self._marks.append(len(self._log))
+        before = len(self._log)
+        self._log.append(records)
+        replay(records, self._state)
+        # Снимок, если пересекли очередную границу snapshot_every
+        if before // self._snapshot_every != len(self._log) // self._snapshot_every:
+            self._log.write_snapshot(self._state, len(self._log))
+
+    def add(self, product: Product, qty: int = 1) -> None:
+        super().add(product, qty)
+        self._record([(ADD, product.id, qty)])
+
+    def remove(self, product_id: int) -> None:
+        super().remove(product_id)
+        self._record([(REMOVE, product_id, 0)])
+
+    def change_qty(self, product_id: int, delta: int) -> None:
+        super().change_qty(product_id, delta)
+        self._record([(QTY, product_id, delta)])
+
+    def clear(self) -> None:
+        super().clear()
+        self._record([(CLEAR, 0, 0)])
+
+    def set_items(self, items: list[CartItem]) -> None:
+        super().set_items(items)
+        self._record([(SET, 0, len(items))] +
+                     [(ITEM, item.product.id, item.qty) for item in items])
+
+    # --- История ---
+
+    def state_at(self, n_events: int) -> dict[int, int]:
+        """Состояние корзины после первых n_events событий (id → кол-во)."""
+        state, at = self._log.read_snapshot()
+        if at > n_events:
+            state, at = {}, 0   # снимок новее нужного момента — с начала
+        return replay(self._log.records(at, n_events), state)
+
+    def can_undo(self) -> bool:
+        return bool(self._marks)
+
+    def undo(self) -> None:
+        """Отменить последнее изменение этой сессии.
+
+        Отмена тоже записывается в журнал (как SET), история не теряется.
+        """
+        if not self._marks:
+            raise IndexError("Нечего отменять")
+        mark = self._marks.pop()
+        items = self._materialize(self.state_at(mark))
+        Cart.set_items(self, items)
+        self._record([(SET, 0, len(items))] +
+                     [(ITEM, item.product.id, item.qty) for item in items])
+        self._marks.pop()   # сама отмена не становится точкой отмены
+
+    def _materialize(self, state: dict[int, int]) -> list[CartItem]:
+        items = []
+        for pid, qty in state.items():
+            product = self._catalog.get(pid)
+            if product is not None:   # товар могли удалить из каталога
+                items.append(CartItem(product=product, qty=qty))
+        return items
@@ -0,0 +1,121 @@
+"""
+Генератор нагрузки для сервера корзин (server.py).
+
+Каждый клиент в цикле открывает корзину, добавляет несколько товаров,
+меняет количество, запрашивает итог и закрывает корзину. Считаем,
+сколько корзин в секунду обслуживает сервер при разном числе клиентов.
+Параллельно «администратор» меняет цены, чтобы проверить, что читатели
+не ждут писателя.
+
+Запуск:
+    python loadgen.py                      # поднимает сервер в этом же процессе
+    python loadgen.py --port 8765          # нагрузка на уже запущенный сервер
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import random
+import time
+
+from catalog import Catalog
+from server import CartServer, SharedCatalog, request
+
+
+async def _client(host: str, port: int, product_ids: list[int],
+                  deadline: float, items_per_cart: int) -> int:
+    reader, writer = await asyncio.open_connection(host, port)
+    done = 0
+    try:
+        while time.perf_counter() < deadline:
+            cart = (await request(reader, writer, {"op": "open"}))["cart"]
+            picked = random.sample(product_ids, items_per_cart)
+            for pid in picked:
+                await request(reader, writer, {"op": "add", "cart": cart,
+                                               "product": pid, "qty": 2})
+            if picked:
+                await request(reader, writer, {"op": "qty", "cart": cart,
+                                               "product": picked[-1], "delta": -1})
+            reply = await request(reader, writer, {"op": "total", "cart": cart})
+            assert reply["ok"], reply
+            await request(reader, writer, {"op": "close", "cart": cart})
+            done += 1
+    finally:
+        writer.close()
+    return done
+
+
+async def _admin(host: str, port: int, product_ids: list[int],
+                 deadline: float) -> int:
+    reader, writer = await asyncio.open_connection(host, port)
+    edits = 0
+    try:
+        while time.perf_counter() < deadline:
+            await request(reader, writer, {
+                "op": "admin_update", "product": random.choice(product_ids),
+                "fields": {"price": round(random.uniform(10, 500), 2)}})
+            edits += 1
+            await asyncio.sleep(0.01)
+    finally:
+        writer.close()
+    return edits
+
+
+async def run_load(host: str, port: int, clients: int, duration: float,
+                   items_per_cart: int = 5) -> tuple[int, int, float]:
+    """Нагрузка clients клиентами в течение duration секунд.
+
+    Возвращает (корзин обслужено, правок каталога, корзин в секунду).
+    """
+    reader, writer = await asyncio.open_connection(host, port)
+    reply = await request(reader, writer, {"op": "products", "limit": 10_000})
+    writer.close()
+    product_ids = [p["id"] for p in reply["products"]]
+    if not product_ids:
+        raise ValueError("В каталоге сервера нет товаров — нагружать нечем")
+    items_per_cart = min(items_per_cart, len(product_ids))
+
+    start = time.perf_counter()
+    deadline = start + duration
+    results = await asyncio.gather(
+        _admin(host, port, product_ids, deadline),
+        *(_client(host, port, product_ids, deadline, items_per_cart)
+          for _ in range(clients)),
+    )
+    elapsed = time.perf_counter() - start
+    carts = sum(results[1:])
+    return carts, results[0], carts / elapsed
+
+
+async def _main(args: argparse.Namespace) -> None:
+    server = None
+    if args.port is None:
+        server = await CartServer(
+            SharedCatalog.from_catalog(Catalog.default())).start(port=0)
+        host, port = server.sockets[0].getsockname()[:2]
+    else:
+        host, port = args.host, args.port
+
+    print("=" * 56)
+    print(f"Нагрузка на сервер корзин {host}:{port}, {args.duration} с на замер")
+    print("=" * 56)
+    print(f"{'Клиентов':>9} | {'Корзин':>9} | {'Правок':>7} | {'Корзин/с':>10}")
+    print("-" * 45)
+    for clients in args.clients:
+        carts, edits, rate = await run_load(host, port, clients, args.duration)
+        print(f"{clients:>9} | {carts:>9,} | {edits:>7} | {rate:>10,.0f}")
+
+    if server is not None:
+        server.close()
+        await server.wait_closed()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=None,
+                        help="порт запущенного сервера (по умолчанию — свой)")
+    parser.add_argument("--clients", type=int, nargs="+", default=[1, 10, 50, 100])
+    parser.add_argument("--duration", type=float, default=3.0)
+    asyncio.run(_main(parser.parse_args()))
@@ -1,34 +1,125 @@
 """
 Главное окно приложения — Симулятор магазина.
-Запуск: python main.py
+Запуск: python main.py [путь к базе]
+
+Каталог и корзина хранятся в SQLite (по умолчанию shop.db рядом с main.py),
+изменения корзины дополнительно пишутся в журнал событий shop.cart.log.
+
+Время запуска: python -X importtime main.py 2> startup.log — в конце
+лога, после дерева импортов, печатается время до первого кадра окна и до
+заполнения таблиц (отсчёт от начала импорта main.py). База и журнал
+корзины открываются уже после первого кадра; до этого ввод в окно
+заблокирован (tk busy).
+
+Замеры в работе (см. profiling.py):
+    F12 — показать/скрыть строку с временем последних действий (последнее и p95);
+    F9  — начать/остановить запись профиля cProfile и сохранить его в файл.
 """
+import time
+_START = time.perf_counter()   # до остальных импортов — они тоже в счёт
+
+import queue
+import sys
+from pathlib import Path
 import tkinter as tk
-from tkinter import ttk, messagebox, simpledialog
+from tkinter import ttk, filedialog, messagebox, simpledialog
 
-from catalog import Catalog
-from cart import Cart
-from sorting import sort_cart, ALGORITHMS, SORT_KEYS
-from ui_steps import StepsWindow
+from catalog import SORT_COLUMNS
+from profiling import SessionProfiler, recent, timed, timing
+from events import EventSourcedCart
+from storage import SQLiteCatalog
+from sorting import ALGORITHMS, SORT_KEYS
+from sort_worker import SortJob
+from virtual_table import VirtualTable
 
 
 # ===========================================================================
 # Главное окно
 # ===========================================================================
 
+DB_PATH = Path(__file__).with_name("shop.db")
+
+
 class ShopApp(tk.Tk):
-    def __init__(self):
+    def __init__(self, db_path: str | Path = DB_PATH):
         super().__init__()
         self.title("🛒  Симулятор магазина")
         self.geometry("1100x640")
         self.minsize(900, 500)
         self.resizable(True, True)
 
-        self.catalog = Catalog.default()
-        self.cart    = Cart()
-
+        # База и журнал корзины открываются после первого кадра
+        # (_load_data): окно не ждёт COUNT(*), заполнения пустой базы
+        # и проигрывания журнала
+        self._db_path = Path(db_path)
+        self.catalog: SQLiteCatalog | None = None
+        self.cart: EventSourcedCart | None = None
+        self.protocol("WM_DELETE_WINDOW", self._on_close)
+
+        # Текущая фоновая сортировка и версия корзины на момент её запуска
+        self._sort_job: SortJob | None = None
+        self._sort_version = 0
+        self._sort_show_steps = False
+
+        # Сортировка таблицы каталога: (колонка, по убыванию) и
+        # направление следующего клика по каждой колонке
+        self._cat_sort: tuple[str, bool] | None = None
+        self._cat_sort_rev: dict[str, bool] = {}
+
+        # Сначала показываем пустое окно, таблицы заполняются после
+        # первого кадра — так окно появляется сразу при любом размере базы
         self._build_ui()
+        self.bind("<Map>", self._on_first_map)
+
+        # Строка замеров (F12) и запись профиля сессии (F9)
+        self._profiler = SessionProfiler()
+        self._profile_path = Path(db_path).with_name("session.prof")
+        # Строка замеров видна; id запланированного обновления (after)
+        self._timing_visible = False
+        self._timing_after: str | None = None
+        self.bind("<F12>", lambda _e: self._toggle_timing_overlay())
+        self.bind("<F9>", lambda _e: self._toggle_profiling())
+
+    def _on_first_map(self, event: tk.Event) -> None:
+        """Окно впервые отображено: заполнить таблицы в ближайший простой."""
+        if event.widget is not self:
+            return
+        self.unbind("<Map>")
+        self._window_ms = (time.perf_counter() - _START) * 1000
+        self.after_idle(self._load_data)
+
+    def _load_data(self) -> None:
+        """Открыть каталог и корзину, снять блокировку ввода, заполнить таблицы."""
+        # Товары подгружаются из базы постранично, в памяти — только кэш
+        self.catalog = SQLiteCatalog.open(self._db_path)
+        # Корзина восстанавливается из журнала событий (снимок + хвост)
+        self.cart = EventSourcedCart.open(
+            self.catalog, self._db_path.with_suffix(".cart.log"),
+            initial=self.catalog.load_cart_items())
+        for widget in self._busy_widgets:
+            self.tk.call("tk", "busy", "forget", widget)
+        self._fill_tables()
+
+    def _fill_tables(self) -> None:
         self._refresh_catalog()
         self._refresh_cart()
+        if "importtime" in sys._xoptions:
+            filled_ms = (time.perf_counter() - _START) * 1000
+            print(f"startup: окно {self._window_ms:.1f} мс, "
+                  f"таблицы {filled_ms:.1f} мс", file=sys.stderr)
+
+    def _on_close(self) -> None:
+        """Сохранить корзину и закрыть базу перед выходом."""
+        if self._sort_job is not None:
+            self._sort_job.cancel()
+        if self._profiler.active:
+            self._profiler.stop(self._profile_path)   # запись не потеряется
+        if self.cart is not None:          # окно закрыли до загрузки данных
+            self.catalog.storage.save_cart(self.cart.items())
+            self.cart.close()
+        if self.catalog is not None:
+            self.catalog.storage.close()
+        self.destroy()
 
     # -----------------------------------------------------------------------
     # Построение интерфейса
@@ -43,6 +134,11 @@ class ShopApp(tk.Tk):
         self._build_cart_panel(paned)
         self._build_bottom_bar()
 
+        # До загрузки данных (_load_data) кнопки и таблицы не принимают ввод
+        self._busy_widgets = (paned, self._bottom_bar)
+        for widget in self._busy_widgets:
+            self.tk.call("tk", "busy", "hold", widget)
+
     # --- Каталог (левая панель) ---
 
     def _build_catalog_panel(self, parent) -> None:
@@ -69,11 +165,24 @@ class ShopApp(tk.Tk):
                    command=self._edit_product_dialog).pack(side="left", padx=2)
         ttk.Button(ctrl, text="Удалить",
                    command=self._remove_product).pack(side="left", padx=2)
-
-        # Таблица каталога
-        cols = ("id", "name", "category", "price", "weight")
-        self.cat_tree = ttk.Treeview(frame, columns=cols, show="headings",
-                                     selectmode="browse", height=20)
+        ttk.Button(ctrl, text="Импорт…",
+                   command=self._import_products).pack(side="left", padx=2)
+        ttk.Button(ctrl, text="Экспорт…",
+                   command=self._export_products).pack(side="left", padx=2)
+
+        # Поиск по названию, категории и описанию (с подсказкой по префиксу)
+        search = ttk.Frame(frame)
+        search.pack(fill="x", pady=(0, 4))
+        ttk.Label(search, text="🔍 Поиск:").pack(side="left")
+        self.search_var = tk.StringVar(value="")
+        ttk.Entry(search, textvariable=self.search_var,
+                  width=30).pack(side="left", padx=4)
+        self.search_var.trace_add("write", lambda *_: self._refresh_catalog())
+        self.facets_var = tk.StringVar(value="")
+        ttk.Label(search, textvariable=self.facets_var,
+                  foreground="gray").pack(side="left", padx=6)
+
+        # Таблица каталога (виртуализированная: в Treeview только видимые строки)
         headings = {
             "id":       ("ID",        45),
             "name":     ("Название",  180),
@@ -81,16 +190,9 @@ class ShopApp(tk.Tk):
             "price":    ("Цена, ₽",   80),
             "weight":   ("Вес, г",    70),
         }
-        for col, (label, width) in headings.items():
-            self.cat_tree.heading(col, text=label,
-                                  command=lambda c=col: self._sort_catalog(c))
-            self.cat_tree.column(col, width=width, anchor="center")
-
-        vsb = ttk.Scrollbar(frame, orient="vertical",
-                            command=self.cat_tree.yview)
-        self.cat_tree.configure(yscrollcommand=vsb.set)
-        self.cat_tree.pack(side="left", fill="both", expand=True)
-        vsb.pack(side="left", fill="y")
+        self.cat_table = VirtualTable(frame, headings, self._catalog_row,
+                                      height=20, on_heading=self._sort_catalog)
+        self.cat_table.pack(side="left", fill="both", expand=True)
 
     # --- Корзина (правая панель) ---
 
@@ -110,11 +212,10 @@ class ShopApp(tk.Tk):
                    command=self._cart_remove).pack(side="left", padx=2)
         ttk.Button(ctrl, text="🧹 Очистить",
                    command=self._cart_clear).pack(side="left", padx=2)
+        ttk.Button(ctrl, text="↶ Отменить",
+                   command=self._cart_undo).pack(side="left", padx=2)
 
         # Таблица корзины
-        cols = ("name", "category", "price", "weight", "qty", "total")
-        self.cart_tree = ttk.Treeview(frame, columns=cols, show="headings",
-                                      selectmode="browse", height=20)
         headings = {
             "name":     ("Название",   170),
             "category": ("Категория",  100),
@@ -123,21 +224,20 @@ class ShopApp(tk.Tk):
             "qty":      ("Кол-во",      60),
             "total":    ("Сумма, ₽",    85),
         }
-        for col, (label, width) in headings.items():
-            self.cart_tree.heading(col, text=label)
-            self.cart_tree.column(col, width=width, anchor="center")
-
-        vsb = ttk.Scrollbar(frame, orient="vertical",
-                            command=self.cart_tree.yview)
-        self.cart_tree.configure(yscrollcommand=vsb.set)
-        self.cart_tree.pack(side="left", fill="both", expand=True)
-        vsb.pack(side="left", fill="y")
+        self.cart_table = VirtualTable(frame, headings, self._cart_row, height=20)
+        self.cart_table.pack(side="left", fill="both", expand=True)
 
     # --- Нижняя панель: сортировка и итог ---
 
     def _build_bottom_bar(self) -> None:
+        # Строка замеров — под нижней панелью, скрыта до F12
+        self.timing_var = tk.StringVar(value="")
+        self.timing_bar = ttk.Label(self, textvariable=self.timing_var,
+                                    foreground="gray", padding=(8, 0, 8, 2))
+
         bar = ttk.Frame(self, padding=(8, 4))
         bar.pack(fill="x", side="bottom")
+        self._bottom_bar = bar
 
         ttk.Separator(self).pack(fill="x", side="bottom")
 
@@ -149,7 +249,7 @@ class ShopApp(tk.Tk):
                      values=list(SORT_KEYS.keys()),
                      width=10, state="readonly").pack(side="left", padx=4)
 
-        self.sort_algo_var = tk.StringVar(value="Пузырьком")
+        self.sort_algo_var = tk.StringVar(value="Авто")
         ttk.Combobox(bar, textvariable=self.sort_algo_var,
                      values=list(ALGORITHMS.keys()),
                      width=12, state="readonly").pack(side="left", padx=4)
@@ -163,8 +263,18 @@ class ShopApp(tk.Tk):
         ttk.Checkbutton(bar, text="Показывать шаги",
                         variable=self.show_steps_var).pack(side="left", padx=6)
 
-        ttk.Button(bar, text="▶ Сортировать",
-                   command=self._do_sort).pack(side="left", padx=4)
+        self.sort_btn = ttk.Button(bar, text="▶ Сортировать",
+                                   command=self._do_sort)
+        self.sort_btn.pack(side="left", padx=4)
+
+        # Прогресс фоновой сортировки и кнопка отмены
+        self.sort_progress = ttk.Progressbar(bar, length=100, maximum=100,
+                                             mode="determinate")
+        self.sort_progress.pack(side="left", padx=4)
+        self.cancel_btn = ttk.Button(bar, text="✖ Отмена",
+                                     command=self._cancel_sort,
+                                     state="disabled")
+        self.cancel_btn.pack(side="left", padx=2)
 
         ttk.Separator(bar, orient="vertical").pack(side="left",
                                                    fill="y", padx=12)
@@ -185,37 +295,81 @@ class ShopApp(tk.Tk):
     # Обновление таблиц
     # -----------------------------------------------------------------------
 
-    def _refresh_catalog(self) -> None:
-        """Перерисовать таблицу каталога."""
-        for row in self.cat_tree.get_children():
-            self.cat_tree.delete(row)
-        for p in self.catalog.all():
-            self.cat_tree.insert("", "end", iid=str(p.id), values=(
-                p.id, p.name, p.category, f"{p.price:.2f}", p.weight,
-            ))
+    def _catalog_row(self, product_id: int) -> tuple:
+        """Значения строки каталога для VirtualTable."""
+        p = self.catalog.get(product_id)
+        return (p.id, p.name, p.category, f"{p.price:.2f}", p.weight)
+
+    def _cart_row(self, product_id: int) -> tuple:
+        """Значения строки корзины для VirtualTable."""
+        item = self.cart.get(product_id)
+        p = item.product
+        return (p.name, p.category, f"{p.price:.2f}", p.weight,
+                item.qty, f"{item.total_price:.2f}")
 
+    @timed()
+    def _refresh_catalog(self) -> None:
+        """Обновить таблицу каталога (перерисовываются только изменённые видимые строки)."""
+        query = self.search_var.get()
+        if query.strip():
+            self.cat_table.set_rows(self._search_rows(query))
+        elif self._cat_sort is None:
+            self.cat_table.set_rows(self.catalog.ids())
+            self.facets_var.set("")
+        else:
+            self.cat_table.set_rows(self.catalog.sorted_ids(*self._cat_sort))
+            self.facets_var.set("")
+
+    def _search_rows(self, query: str) -> list[int]:
+        """Результаты поиска в текущем порядке таблицы + строка фасетов."""
+        ids = self.catalog.search(query)
+        if self._cat_sort is not None:
+            col, reverse = self._cat_sort
+            key = SORT_COLUMNS[col]
+            ids.sort(key=lambda pid: key(self.catalog.get(pid)), reverse=reverse)
+        facets = self.catalog.facets(ids)
+        top = sorted(facets["category"].items(), key=lambda kv: -kv[1])[:4]
+        parts = [f"{name}: {count}" for name, count in top]
+        parts += [f"{name}: {count}" for name, count in facets["price"].items()]
+        self.facets_var.set(f"Найдено {len(ids)}  |  " + " · ".join(parts))
+        return ids
+
+    @timed()
     def _refresh_cart(self) -> None:
-        """Перерисовать таблицу корзины и пересчитать итог."""
-        for row in self.cart_tree.get_children():
-            self.cart_tree.delete(row)
-        for item in self.cart.items():
-            p = item.product
-            self.cart_tree.insert("", "end", iid=str(p.id), values=(
-                p.name, p.category,
-                f"{p.price:.2f}", p.weight,
-                item.qty, f"{item.total_price:.2f}",
-            ))
-        # Итог
-        sub      = self.cart.subtotal()
-        discount = self.cart.discount()
-        total    = self.cart.total()
-        weight   = self.cart.total_weight()
+        """Обновить таблицу корзины и пересчитать итог."""
+        self.cart_table.set_rows(self.cart.ids())
+        self._refresh_totals()
+
+    @timed()
+    def _refresh_cart_row(self, product_id: int) -> None:
+        """Обновить одну позицию корзины после изменения её количества.
+
+        Если позиция появилась или исчезла — меняется список строк,
+        иначе перерисовывается только её строка.
+        """
+        if self.cart.get(product_id) is None or \
+                self.cart.size() != len(self.cart_table.rows()):
+            self._refresh_cart()
+            return
+        self.cart_table.refresh_row(product_id)
+        self._refresh_totals()
+
+    @timed()
+    def _refresh_totals(self) -> None:
+        """Пересчитать итоговую строку корзины."""
+        # Один проход по корзине вместо отдельного вызова на каждую сумму
+        price    = self.cart.breakdown()
+        discount = price.discount
+        total    = price.total
+        weight   = price.weight
 
         self.total_var.set(f"Итого: {total:.2f} ₽")
+        extras = []
         if discount > 0:
-            self.discount_var.set(f"(скидка 5%: −{discount:.2f} ₽)")
-        else:
-            self.discount_var.set("")
+            extras.append(f"скидка: −{discount:.2f} ₽")
+        if price.shipping > 0:
+            extras.append(f"доставка: {price.shipping:.2f} ₽")
+        self.discount_var.set(f"({', '.join(extras)})" if extras else "")
         if weight > 0:
             kg = weight / 1000
             self.weight_var.set(f"Вес: {kg:.2f} кг")
@@ -226,8 +380,9 @@ class ShopApp(tk.Tk):
     # Обработчики: каталог
     # -----------------------------------------------------------------------
 
+    @timed()
     def _add_to_cart(self) -> None:
-        sel = self.cat_tree.selection()
+        sel = self.cat_table.selection()
         if not sel:
             messagebox.showwarning("Внимание", "Выберите товар из каталога")
             return
@@ -241,7 +396,7 @@ class ShopApp(tk.Tk):
             messagebox.showerror("Ошибка", "Введите корректное количество (> 0)")
             return
         self.cart.add(product, qty)
-        self._refresh_cart()
+        self._refresh_cart_row(product_id)
 
     def _add_product_dialog(self) -> None:
         """Диалог добавления нового товара в каталог."""
@@ -249,14 +404,16 @@ class ShopApp(tk.Tk):
         self.wait_window(dlg)
         if dlg.result:
             try:
-                self.catalog.add(**dlg.result)
-                self._refresh_catalog()
+                # Мерим только работу с каталогом, без времени в диалоге
+                with timing("Каталог: добавление"):
+                    self.catalog.add(**dlg.result)
+                    self._refresh_catalog()
             except ValueError as e:
                 messagebox.showerror("Ошибка", str(e))
 
     def _edit_product_dialog(self) -> None:
         """Диалог редактирования выбранного товара."""
-        sel = self.cat_tree.selection()
+        sel = self.cat_table.selection()
         if not sel:
             messagebox.showwarning("Внимание", "Выберите товар для редактирования")
             return
@@ -266,15 +423,24 @@ class ShopApp(tk.Tk):
         self.wait_window(dlg)
         if dlg.result:
             try:
-                self.catalog.update(product_id, **dlg.result)
-                self._refresh_catalog()
-                self._refresh_cart()  # цена могла измениться
+                with timing("Каталог: изменение"):
+                    self.catalog.update(product_id, **dlg.result)
+                    if self._cat_sort is None:
+                        self.cat_table.refresh_row(product_id)
+                    else:
+                        # товар мог сместиться в отсортированной таблице
+                        self._refresh_catalog()
+                    if self.cart.get(product_id) is not None:
+                        # цена могла измениться
+                        self.cart.touch()
+                        self.cart_table.refresh_row(product_id)
+                        self._refresh_totals()
             except (ValueError, AttributeError) as e:
                 messagebox.showerror("Ошибка", str(e))
 
     def _remove_product(self) -> None:
         """Удалить товар из каталога."""
-        sel = self.cat_tree.selection()
+        sel = self.cat_table.selection()
         if not sel:
             messagebox.showwarning("Внимание", "Выберите товар для удаления")
             return
@@ -282,50 +448,79 @@ class ShopApp(tk.Tk):
         if not messagebox.askyesno("Подтверждение",
                                    "Удалить товар из каталога?"):
             return
+        with timing("Каталог: удаление"):
+            try:
+                self.catalog.remove(product_id)
+            except KeyError:
+                pass
+            # Если товар был в корзине — убрать
+            if self.cart.get(product_id) is not None:
+                self.cart.remove(product_id)
+            self.cat_table.clear_selection()
+            self._refresh_catalog()
+            self._refresh_cart()
+
+    def _import_products(self) -> None:
+        """Массовый импорт товаров из CSV или столбцового файла."""
+        path = filedialog.askopenfilename(
+            parent=self, title="Импорт товаров",
+            filetypes=[("CSV", "*.csv"), ("Столбцовый формат", "*.npz *.arrow")])
+        if not path:
+            return
         try:
-            self.catalog.remove(product_id)
-        except KeyError:
-            pass
-        # Если товар был в корзине — убрать
-        if product_id in [item.product.id for item in self.cart.items()]:
-            self.cart.remove(product_id)
+            import bulk   # тянет NumPy — только по требованию
+            if path.endswith(".csv"):
+                count, errors = bulk.import_csv(self.catalog, path)
+            else:
+                count, errors = bulk.load_columns(self.catalog, path), []
+        except (SystemExit, OSError, ValueError, KeyError) as e:
+            messagebox.showerror("Импорт", str(e))
+            return
         self._refresh_catalog()
-        self._refresh_cart()
+        text = f"Добавлено товаров: {count}"
+        if errors:
+            text += f"\nПропущено строк: {len(errors)}\n\n" + "\n".join(errors[:10])
+        messagebox.showinfo("Импорт", text)
+
+    def _export_products(self) -> None:
+        """Сохранить каталог в столбцовый файл (.npz или .arrow)."""
+        path = filedialog.asksaveasfilename(
+            parent=self, title="Экспорт каталога", defaultextension=".npz",
+            filetypes=[("NumPy", "*.npz"), ("Arrow IPC", "*.arrow")])
+        if not path:
+            return
+        try:
+            import bulk
+            count = bulk.export_columns(self.catalog, path)
+        except (SystemExit, OSError) as e:
+            messagebox.showerror("Экспорт", str(e))
+            return
+        messagebox.showinfo("Экспорт", f"Сохранено товаров: {count}")
 
+    @timed()
     def _sort_catalog(self, col: str) -> None:
-        """Сортировка каталога по клику на заголовок колонки."""
-        items = self.catalog.all()
-        reverse = getattr(self, f"_cat_sort_{col}_rev", False)
-        if col == "id":
-            items.sort(key=lambda p: p.id, reverse=reverse)
-        elif col == "name":
-            items.sort(key=lambda p: p.name.lower(), reverse=reverse)
-        elif col == "category":
-            items.sort(key=lambda p: p.category.lower(), reverse=reverse)
-        elif col == "price":
-            items.sort(key=lambda p: p.price, reverse=reverse)
-        elif col == "weight":
-            items.sort(key=lambda p: p.weight, reverse=reverse)
-        setattr(self, f"_cat_sort_{col}_rev", not reverse)
-        # Перерисовываем в нужном порядке
-        for row in self.cat_tree.get_children():
-            self.cat_tree.delete(row)
-        for p in items:
-            self.cat_tree.insert("", "end", iid=str(p.id), values=(
-                p.id, p.name, p.category, f"{p.price:.2f}", p.weight,
-            ))
+        """Сортировка каталога по клику на заголовок колонки.
+
+        Каталог кэширует порядок по каждой колонке, повторный клик
+        просто обходит тот же порядок с конца.
+        """
+        reverse = self._cat_sort_rev.get(col, False)
+        self._cat_sort_rev[col] = not reverse
+        self._cat_sort = (col, reverse)
+        self._refresh_catalog()
 
     # -----------------------------------------------------------------------
     # Обработчики: корзина
     # -----------------------------------------------------------------------
 
     def _selected_cart_id(self) -> int | None:
-        sel = self.cart_tree.selection()
+        sel = self.cart_table.selection()
         if not sel:
             messagebox.showwarning("Внимание", "Выберите позицию в корзине")
             return None
         return int(sel[0])
 
+    @timed()
     def _cart_minus(self) -> None:
         pid = self._selected_cart_id()
         if pid is None:
@@ -334,8 +529,9 @@ class ShopApp(tk.Tk):
             self.cart.change_qty(pid, -1)
         except KeyError:
             pass
-        self._refresh_cart()
+        self._refresh_cart_row(pid)
 
+    @timed()
     def _cart_plus(self) -> None:
         pid = self._selected_cart_id()
         if pid is None:
@@ -344,8 +540,9 @@ class ShopApp(tk.Tk):
             self.cart.change_qty(pid, +1)
         except KeyError:
             pass
-        self._refresh_cart()
+        self._refresh_cart_row(pid)
 
+    @timed()
     def _cart_remove(self) -> None:
         pid = self._selected_cart_id()
         if pid is None:
@@ -354,20 +551,35 @@ class ShopApp(tk.Tk):
             self.cart.remove(pid)
         except KeyError:
             pass
+        self.cart_table.clear_selection()
         self._refresh_cart()
 
     def _cart_clear(self) -> None:
         if self.cart.is_empty():
             return
         if messagebox.askyesno("Подтверждение", "Очистить корзину?"):
-            self.cart.clear()
-            self._refresh_cart()
+            with timing("Корзина: очистка"):
+                self.cart.clear()
+                self._refresh_cart()
+
+    @timed()
+    def _cart_undo(self) -> None:
+        """Отменить последнее изменение корзины (по журналу событий)."""
+        if not self.cart.can_undo():
+            return
+        self.cart.undo()
+        self._refresh_cart()
 
     # -----------------------------------------------------------------------
     # Сортировка корзины
     # -----------------------------------------------------------------------
 
+    SORT_POLL_MS = 50   # период опроса очереди фоновой сортировки
+
+    @timed()
     def _do_sort(self) -> None:
+        if self._sort_job is not None:
+            return
         if self.cart.is_empty():
             messagebox.showinfo("Сортировка", "Корзина пуста — нечего сортировать")
             return
@@ -377,18 +589,116 @@ class ShopApp(tk.Tk):
         reverse   = self.sort_order_var.get() == "По убыванию"
         show_steps = self.show_steps_var.get()
 
-        sorted_items, steps_log = sort_cart(
-            self.cart.items(), algorithm, key, reverse, show_steps
-        )
-        self.cart.set_items(sorted_items)
+        # Сортировка идёт в фоновом потоке; окно опрашивает её очередь
+        self._sort_version = self.cart.version
+        self._sort_job = SortJob(self.cart.items(), algorithm, key,
+                                 reverse, show_steps)
+        self._sort_show_steps = show_steps
+        self.sort_btn.config(state="disabled")
+        self.cancel_btn.config(state="normal")
+        self.sort_progress["value"] = 0
+        self._sort_job.start()
+        self.after(self.SORT_POLL_MS, self._poll_sort)
+
+    def _cancel_sort(self) -> None:
+        if self._sort_job is not None:
+            self._sort_job.cancel()
+
+    def _poll_sort(self) -> None:
+        """Забрать сообщения фоновой сортировки (вызывается через after)."""
+        job = self._sort_job
+        if job is None:
+            return
+        try:
+            while True:
+                kind, payload = job.messages.get_nowait()
+                if kind == "progress":
+                    self.sort_progress["value"] = payload
+                    continue
+                self._finish_sort(job, kind, payload)
+                return
+        except queue.Empty:
+            pass
+        self.after(self.SORT_POLL_MS, self._poll_sort)
+
+    @timed()
+    def _finish_sort(self, job: SortJob, kind: str, payload) -> None:
+        self._sort_job = None
+        self.sort_btn.config(state="normal")
+        self.cancel_btn.config(state="disabled")
+        self.sort_progress["value"] = 0
+
+        if kind == "cancelled":
+            return
+        if kind == "error":
+            messagebox.showerror("Ошибка сортировки", str(payload))
+            return
+
+        sorted_items, steps_log = payload
+        if self.cart.version != self._sort_version:
+            # Пока шла сортировка, корзину изменили — результат устарел
+            messagebox.showwarning("Сортировка",
+                                   "Корзина изменилась во время сортировки — "
+                                   "результат отброшен")
+            return
+        self.cart.set_items(sorted_items)   # применяем результат целиком
         self._refresh_cart()
 
-        if show_steps and steps_log:
-            StepsWindow(self, algorithm, steps_log)
-        elif show_steps:
+        if self._sort_show_steps and steps_log:
+            # Окно шагов нужно редко — импортируем только по требованию
+            from ui_steps import StepsWindow
+            StepsWindow(self, job.algorithm, steps_log)
+        elif self._sort_show_steps:
             messagebox.showinfo("Шаги", "Шаги не зафиксированы "
                                         "(возможно, список уже отсортирован)")
 
+    # -----------------------------------------------------------------------
+    # Замеры и профиль
+    # -----------------------------------------------------------------------
+
+    TIMING_REFRESH_MS = 500   # период обновления строки замеров
+
+    def _toggle_timing_overlay(self) -> None:
+        # Флаг, а не winfo_ismapped(): Tk отображает виджет только в
+        # простое, сразу после pack() он ещё «не виден»
+        if self._timing_after is not None:
+            self.after_cancel(self._timing_after)
+            self._timing_after = None
+        self._timing_visible = not self._timing_visible
+        if not self._timing_visible:
+            self.timing_bar.pack_forget()
+            return
+        self.timing_bar.pack(fill="x", side="bottom", before=self._bottom_bar)
+        self._update_timing_overlay()
+
+    def _update_timing_overlay(self) -> None:
+        """Последние действия: время последнего вызова и p95 (пока строка видна)."""
+        self._timing_after = None
+        if not self._timing_visible:
+            return
+        parts = [f"{s.name}: {s.last:.1f} мс (p95 {s.p95:.1f}, ×{s.calls})"
+                 for s in recent(3)]
+        if self._profiler.active:
+            parts.insert(0, "● запись профиля (F9 — стоп)")
+        self.timing_var.set("  |  ".join(parts) or "⏱ замеров пока нет")
+        self._timing_after = self.after(self.TIMING_REFRESH_MS,
+                                        self._update_timing_overlay)
+
+    def _toggle_profiling(self) -> None:
+        """F9: начать запись cProfile или остановить её и сохранить файл."""
+        if not self._profiler.active:
+            self._profiler.start()
+            return
+        path = filedialog.asksaveasfilename(
+            parent=self, title="Сохранить профиль сессии",
+            initialfile="session.prof", defaultextension=".prof",
+            filetypes=[("cProfile", "*.prof")])
+        if not path:
+            return   # запись продолжается
+        self._profiler.stop(path)
+        messagebox.showinfo("Профиль", f"Профиль сохранён: {path}\n"
+                                       f"Просмотр: python -m pstats {path}")
+
 
 # ===========================================================================
 # Диалог добавления / редактирования товара
@@ -455,5 +765,5 @@ class ProductDialog(tk.Toplevel):
 # ===========================================================================
 
 if __name__ == "__main__":
-    app = ShopApp()
+    app = ShopApp(sys.argv[1] if len(sys.argv) > 1 else DB_PATH)
     app.mainloop()
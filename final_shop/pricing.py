@@ -0,0 +1,152 @@
+"""
+Пакетный пересчёт корзин без окна (NumPy).
+
+Когда меняются Cart.DISCOUNT_RATE / Cart.TAX_RATE, сохранённые корзины
+нужно пересчитать. Делать это через Cart по одной позиции слишком долго,
+поэтому здесь корзины задаются массивом строк (cart_id, product_id, qty),
+цены берутся из столбца цен каталога, а суммы считаются групповыми
+редукциями (np.bincount).
+
+Считается правило скидки по умолчанию (порог Cart.DISCOUNT_THRESHOLD);
+для него результат совпадает с Cart.total() до бита:
+    - позиции каждой корзины суммируются в том же порядке, что и в Cart
+      (bincount складывает веса последовательно);
+    - округление до копеек векторное, а значения у самой границы
+      «…,5 копейки» досчитываются встроенным round(), как в Cart.
+
+Запуск проверки и замера: python pricing.py [кол-во корзин]
+"""
+from __future__ import annotations
+
+import sys
+import time
+from typing import NamedTuple
+
+try:
+    import numpy as np
+except ImportError as exc:  # pragma: no cover
+    raise SystemExit(
+        "Не найден пакет 'numpy'. Установите его командой: pip install numpy"
+    ) from exc
+
+from cart import Cart
+from catalog import Catalog
+
+
+class CartPrices(NamedTuple):
+    """Итоги по корзинам; все массивы выровнены по cart_ids."""
+    cart_ids: np.ndarray
+    subtotal: np.ndarray
+    discount: np.ndarray
+    tax:      np.ndarray
+    total:    np.ndarray
+
+
+def price_column(catalog: Catalog) -> np.ndarray:
+    """Плотный столбец цен: prices[product_id] (NaN для несуществующих id)."""
+    products = catalog.all()
+    max_id = max((p.id for p in products), default=0)
+    prices = np.full(max_id + 1, np.nan)
+    for p in products:
+        prices[p.id] = p.price
+    return prices
+
+
+def round2(values: np.ndarray) -> np.ndarray:
+    """Округление до копеек, совпадающее со встроенным round(x, 2).
+
+    np.round(x * 100) / 100 даёт тот же результат, пока x * 100 не лежит
+    у самой середины между целыми; такие значения округляются round().
+    """
+    scaled = values * 100.0
+    out = np.round(scaled) / 100.0
+    near_half = np.abs(scaled - np.floor(scaled) - 0.5) < 1e-6
+    if near_half.any():
+        out[near_half] = [round(float(v), 2) for v in values[near_half]]
+    return out
+
+
+def price_carts(
+    rows: np.ndarray,
+    prices: np.ndarray,
+    discount_threshold: float | None = None,
+    discount_rate: float | None = None,
+    tax_rate: float | None = None,
+) -> CartPrices:
+    """Посчитать subtotal, скидку, налог и итог для каждой корзины.
+
+    rows   — целочисленный массив формы (N, 3): cart_id, product_id, qty;
+             строки одной корзины идут в порядке её позиций
+    prices — столбец цен из price_column()
+    Ставки по умолчанию берутся из атрибутов Cart в момент вызова.
+    """
+    threshold = Cart.DISCOUNT_THRESHOLD if discount_threshold is None else discount_threshold
+    rate      = Cart.DISCOUNT_RATE      if discount_rate      is None else discount_rate
+    tax       = Cart.TAX_RATE           if tax_rate           is None else tax_rate
+
+    rows = np.asarray(rows, dtype=np.int64)
+    if rows.ndim != 2 or rows.shape[1] != 3:
+        raise ValueError("rows должен иметь форму (N, 3): cart_id, product_id, qty")
+    cart_col, product_col, qty_col = rows[:, 0], rows[:, 1], rows[:, 2]
+    if (qty_col <= 0).any():
+        raise ValueError("Количество должно быть больше нуля")
+    if (product_col < 0).any() or (product_col >= len(prices)).any():
+        raise KeyError("В корзинах есть товары, которых нет в каталоге")
+
+    line_total = prices[product_col] * qty_col          # CartItem.total_price
+    if np.isnan(line_total).any():
+        raise KeyError("В корзинах есть товары, которых нет в каталоге")
+
+    cart_ids, group = np.unique(cart_col, return_inverse=True)
+    subtotal = np.bincount(group, weights=line_total, minlength=len(cart_ids))
+
+    discount = np.where(subtotal > threshold, round2(subtotal * rate), 0.0)
+    tax_sum  = round2((subtotal - discount) * tax)
+    total    = round2(subtotal - discount + tax_sum)
+    return CartPrices(cart_ids, subtotal, discount, tax_sum, total)
+
+
+def carts_to_rows(carts: dict[int, Cart]) -> np.ndarray:
+    """Преобразовать словарь {cart_id: Cart} в массив строк для price_carts."""
+    rows = [(cart_id, item.product.id, item.qty)
+            for cart_id, cart in carts.items()
+            for item in cart.items()]
+    return np.array(rows, dtype=np.int64).reshape(-1, 3)
+
+
+# ===========================================================================
+# Проверка совпадения с Cart и замер скорости
+# ===========================================================================
+
+def _demo(n_carts: int) -> None:
+    rng = np.random.default_rng(0)
+    catalog = Catalog.default()
+    products = catalog.all()
+
+    carts: dict[int, Cart] = {}
+    for cart_id in range(n_carts):
+        cart = Cart()
+        for idx in rng.choice(len(products), size=rng.integers(1, 8), replace=False):
+            cart.add(products[idx], int(rng.integers(1, 10)))
+        carts[cart_id] = cart
+    rows = carts_to_rows(carts)
+    prices = price_column(catalog)
+
+    start = time.perf_counter()
+    expected = np.array([carts[i].total() for i in range(n_carts)])
+    t_cart = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result = price_carts(rows, prices)
+    t_numpy = time.perf_counter() - start
+
+    mismatches = int((result.total != expected).sum())
+    print(f"Корзин: {n_carts:,}, строк: {len(rows):,}")
+    print(f"Cart.total():  {t_cart * 1000:10.1f} мс")
+    print(f"price_carts(): {t_numpy * 1000:10.1f} мс  "
+          f"(×{t_cart / t_numpy:.0f} быстрее)")
+    print(f"Расхождений с Cart.total(): {mismatches}")
+
+
+if __name__ == "__main__":
+    _demo(int(sys.argv[1]) if len(sys.argv) > 1 else 100_000)
@@ -0,0 +1,149 @@
+"""
+Лёгкие замеры времени для обработчиков окна и алгоритмов сортировки.
+
+    @timed()                    — декоратор: время каждого вызова функции
+    with timing("имя"): ...     — то же для участка кода (например, после
+                                  модального диалога, чтобы не мерить ожидание
+                                  пользователя)
+
+Для каждого имени хранятся счётчик вызовов и кольцевой буфер последних
+WINDOW замеров (мс): из него берутся последнее значение и p95. Запись —
+два вызова perf_counter и добавление в deque, поэтому декоратор можно
+оставлять включённым всегда. Замеры из фонового потока (сортировка)
+пишутся в тот же реестр под блокировкой.
+
+SessionProfiler — запись сессии в cProfile и сохранение в файл .prof
+(смотреть: python -m pstats session.prof или snakeviz). cProfile видит
+только поток, в котором запущен, — для окна это главный поток Tk.
+"""
+from __future__ import annotations
+
+import cProfile
+import functools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Callable, Iterator, NamedTuple
+
+WINDOW = 256   # сколько последних замеров хранить на каждое имя
+
+
+class TimingStats(NamedTuple):
+    """Сводка по одному имени: вызовов, последний замер и p95 (мс)."""
+    name: str
+    calls: int
+    last: float
+    p95: float
+
+
+class _Series:
+    __slots__ = ("calls", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.samples: deque[float] = deque(maxlen=WINDOW)
+
+
+_lock = threading.Lock()
+_series: dict[str, _Series] = {}
+_recent: deque[str] = deque(maxlen=WINDOW)   # имена в порядке последних вызовов
+
+
+def record(name: str, ms: float) -> None:
+    """Добавить замер ms для name."""
+    with _lock:
+        series = _series.get(name)
+        if series is None:
+            series = _series[name] = _Series()
+        series.calls += 1
+        series.samples.append(ms)
+        _recent.append(name)
+
+
+@contextmanager
+def timing(name: str) -> Iterator[None]:
+    """Замерить время блока with."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record(name, (time.perf_counter() - start) * 1000)
+
+
+def timed(name: str | None = None) -> Callable[[Callable], Callable]:
+    """Декоратор: замерять каждый вызов функции (имя по умолчанию — __qualname__)."""
+    def decorate(func: Callable) -> Callable:
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, (time.perf_counter() - start) * 1000)
+        return wrapper
+    return decorate
+
+
+def stats(name: str) -> TimingStats | None:
+    """Сводка по name или None, если вызовов не было."""
+    with _lock:
+        series = _series.get(name)
+        if series is None:
+            return None
+        samples = sorted(series.samples)
+        last = series.samples[-1]
+        calls = series.calls
+    p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+    return TimingStats(name, calls, last, p95)
+
+
+def recent(limit: int = 3) -> list[TimingStats]:
+    """Сводки по последним вызванным именам (сначала самые свежие)."""
+    with _lock:
+        names = list(dict.fromkeys(reversed(_recent)))[:limit]
+    return [s for s in map(stats, names) if s is not None]
+
+
+def report() -> list[TimingStats]:
+    """Сводки по всем именам, по убыванию p95."""
+    with _lock:
+        names = list(_series)
+    return sorted((s for s in map(stats, names) if s is not None),
+                  key=lambda s: -s.p95)
+
+
+def reset() -> None:
+    with _lock:
+        _series.clear()
+        _recent.clear()
+
+
+# ===========================================================================
+# Профиль сессии
+# ===========================================================================
+
+class SessionProfiler:
+    """Запись cProfile между start() и stop()."""
+
+    def __init__(self):
+        self._profile: cProfile.Profile | None = None
+
+    @property
+    def active(self) -> bool:
+        return self._profile is not None
+
+    def start(self) -> None:
+        if self._profile is None:
+            self._profile = cProfile.Profile()
+            self._profile.enable()
+
+    def stop(self, path: str | Path) -> None:
+        """Остановить запись и сохранить профиль в path (формат pstats)."""
+        profile, self._profile = self._profile, None
+        if profile is not None:
+            profile.disable()
+            profile.dump_stats(str(path))
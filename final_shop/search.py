@@ -0,0 +1,317 @@
+"""
+Полнотекстовый поиск и фасеты по каталогу.
+
+SearchIndex — инвертированный индекс в памяти: токен → множество id товаров.
+Индексируются название, категория и описание. Текст приводится функцией
+normalize (casefold, «ё» → «е») — той же, что задаёт порядок сортировки
+каталога, так что «Зелёный» находится по «зеленый».
+
+Последний токен запроса (если после него нет пробела) ищется как префикс —
+это даёт подсказки при наборе: «мол» найдёт «Молоко» и «молотый».
+Словарь токенов хранится отсортированным, поэтому префикс находится
+двоичным поиском.
+
+Запрос с limit (подсказки, первые строки) не собирает все совпадения:
+у токена кроме множества есть отсортированный список id (строится при
+первом запросе и дальше поддерживается правками), и поиск идёт по списку
+самого редкого слова — или по слиянию списков префикса, если токенов на
+него немного, — проверяя остальное по множествам, пока не наберётся
+limit id. На 10⁶ товаров такой запрос занимает 0,1–0,4 мс
+(python benchmark.py search).
+
+Без limit возвращаются все совпадения по возрастанию id, и время растёт
+с их числом: на 10⁶ товаров префикс в одну букву (все товары) — около
+70 мс, «товар 1» (300 тыс. совпадений) — около 0,3 с. Окно магазина
+ищет без limit — ему нужны фасеты по всем найденным, — поэтому там
+цель «меньше 1 мс» выполняется только на узких запросах. Префикс вместе
+с точными словами проверяется по токенам кандидатов или пересечением
+с объединением списков префикса — что дешевле по размерам.
+
+Индекс обновляется инкрементально: add / update / remove одного товара.
+Для массовой загрузки есть add_many — словарь сортируется один раз на
+весь пакет, а не вставкой на каждый новый токен.
+"""
+from __future__ import annotations
+
+import heapq
+import re
+from bisect import bisect_left, insort
+from collections import Counter
+from itertools import islice
+from typing import Iterable, Iterator
+
+from models import Product
+
+_TOKEN_RE = re.compile(r"[0-9a-zа-я]+")
+
+# Границы ценовых корзин для фасетов, руб.
+PRICE_BUCKETS = (100, 300, 1000)
+
+
+def normalize(text: str) -> str:
+    """Текст без учёта регистра, «ё» как «е» — для поиска и сортировки."""
+    return text.casefold().replace("ё", "е")
+
+
+def tokenize(text: str) -> list[str]:
+    """Разбить нормализованный текст (normalize) на токены."""
+    return _TOKEN_RE.findall(normalize(text))
+
+
+def _insert_ordered(ordered: list[int] | None, pid: int) -> None:
+    """Вставить id в упорядоченный список (если список уже построен)."""
+    if ordered is None:
+        return
+    # Новые id обычно больше всех прежних — дописать в конец
+    if not ordered or pid > ordered[-1]:
+        ordered.append(pid)
+    else:
+        insort(ordered, pid)
+
+
+def price_bucket(price: float) -> str:
+    """Название ценовой корзины для фасета."""
+    low = 0
+    for high in PRICE_BUCKETS:
+        if price < high:
+            return f"{low}–{high} ₽"
+        low = high
+    return f"от {low} ₽"
+
+
+class SearchIndex:
+    """Инвертированный индекс по товарам каталога с фасетами."""
+
+    # Сколько токенов префикса сливать в запросе с limit; больше — проще
+    # идти по id подряд и проверять префикс у каждого товара
+    MERGE_MAX_TOKENS = 64
+
+    def __init__(self):
+        self._postings: dict[str, set[int]] = {}
+        # Те же списки по возрастанию id — для запросов с limit; строятся
+        # при первом обращении к токену. _all_sorted — все id индекса
+        self._sorted: dict[str, list[int]] = {}
+        self._all_sorted: list[int] | None = None
+        self._vocab: list[str] = []                  # отсортированные токены
+        self._doc_tokens: dict[int, frozenset[str]] = {}
+        # Фасеты: значения товара и счётчики по всему каталогу
+        self._doc_facets: dict[int, tuple[str, str]] = {}
+        self._category_counts: Counter[str] = Counter()
+        self._price_counts: Counter[str] = Counter()
+
+    def __len__(self) -> int:
+        return len(self._doc_tokens)
+
+    # ------------------------------------------------------------------
+    # Обновление
+    # ------------------------------------------------------------------
+
+    def add(self, p: Product) -> None:
+        """Проиндексировать товар (если он уже есть — переиндексировать)."""
+        for tok in self._index_doc(p):
+            insort(self._vocab, tok)
+
+    def add_many(self, products: Iterable[Product]) -> None:
+        """Проиндексировать пакет товаров; словарь сортируется один раз."""
+        new_tokens: list[str] = []
+        for p in products:
+            new_tokens += self._index_doc(p)
+        if new_tokens:
+            # Токен мог уйти из индекса, если товар пакета переиндексирован
+            fresh = {tok for tok in new_tokens if tok in self._postings}
+            self._vocab = sorted(fresh.union(self._vocab))
+
+    def _index_doc(self, p: Product) -> list[str]:
+        """Добавить товар в списки и фасеты; вернуть новые для словаря токены."""
+        if p.id in self._doc_tokens:
+            self.remove(p.id)
+        tokens = frozenset(tokenize(f"{p.name} {p.category} {p.description}"))
+        self._doc_tokens[p.id] = tokens
+        _insert_ordered(self._all_sorted, p.id)
+        new_tokens = []
+        for tok in tokens:
+            ids = self._postings.get(tok)
+            if ids is None:
+                self._postings[tok] = {p.id}
+                new_tokens.append(tok)
+            else:
+                ids.add(p.id)
+                _insert_ordered(self._sorted.get(tok), p.id)
+        facets = (p.category, price_bucket(p.price))
+        self._doc_facets[p.id] = facets
+        self._category_counts[facets[0]] += 1
+        self._price_counts[facets[1]] += 1
+        return new_tokens
+
+    def update(self, p: Product) -> None:
+        self.add(p)
+
+    def remove(self, product_id: int) -> None:
+        """Убрать товар из индекса (если его нет — ничего не делать)."""
+        tokens = self._doc_tokens.pop(product_id, None)
+        if tokens is None:
+            return
+        if self._all_sorted is not None:
+            del self._all_sorted[bisect_left(self._all_sorted, product_id)]
+        for tok in tokens:
+            ids = self._postings[tok]
+            ids.discard(product_id)
+            ordered = self._sorted.get(tok)
+            if ordered is not None:
+                del ordered[bisect_left(ordered, product_id)]
+            if not ids:
+                del self._postings[tok]
+                self._sorted.pop(tok, None)
+                i = bisect_left(self._vocab, tok)
+                if i < len(self._vocab) and self._vocab[i] == tok:
+                    del self._vocab[i]
+        category, bucket = self._doc_facets.pop(product_id)
+        for counts, value in ((self._category_counts, category),
+                              (self._price_counts, bucket)):
+            counts[value] -= 1
+            if counts[value] == 0:
+                del counts[value]
+
+    # ------------------------------------------------------------------
+    # Запросы
+    # ------------------------------------------------------------------
+
+    def search(self, query: str, limit: int | None = None) -> list[int]:
+        """id товаров, содержащих все слова запроса (по возрастанию id).
+
+        Последнее слово ищется как префикс, если запрос не заканчивается
+        пробелом.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+        prefix = tokens.pop() if not query[-1].isspace() else None
+        if limit is not None:
+            return list(islice(self._first_matches(set(tokens), prefix), limit))
+
+        # Точные токены пересекаем от самого редкого к самому частому
+        result: set[int] | None = None
+        for tok in sorted(set(tokens),
+                          key=lambda t: len(self._postings.get(t, ()))):
+            ids = self._postings.get(tok)
+            if not ids:
+                return []
+            result = ids if result is None else result & ids
+            if not result:
+                return []
+
+        if prefix is not None:
+            if result is None:
+                result = self._prefix_union(prefix)
+            elif len(result) <= self._prefix_size(prefix):
+                # Кандидатов меньше, чем товаров с префиксом, — проверяем
+                # их токены напрямую
+                result = {pid for pid in result
+                          if any(t.startswith(prefix)
+                                 for t in self._doc_tokens[pid])}
+            else:
+                result = result & self._prefix_union(prefix)
+
+        return sorted(result)
+
+    def _first_matches(self, tokens: set[str], prefix: str | None) -> Iterator[int]:
+        """id с токенами tokens (и префиксом prefix) по возрастанию, лениво.
+
+        Идём по упорядоченному списку самого редкого слова (или по слиянию
+        списков префикса, если оно короче) и проверяем остальное по
+        множествам — вызывающий берёт столько id, сколько нужно.
+        """
+        if any(tok not in self._postings for tok in tokens):
+            return
+        sets = sorted((self._postings[tok] for tok in tokens), key=len)
+        rarest = min(tokens, key=lambda t: len(self._postings[t]), default=None)
+        driver = len(sets[0]) if sets else len(self._doc_tokens)
+        check_prefix = prefix is not None
+        prefix_tokens = []
+        if prefix is not None:
+            # Слияние списков префикса выгодно, только если токенов на него
+            # немного («1» в номерах товаров — это сотни тысяч токенов)
+            prefix_tokens = list(islice(self._prefix_tokens(prefix),
+                                        self.MERGE_MAX_TOKENS + 1))
+            if not prefix_tokens:
+                return
+        if check_prefix and len(prefix_tokens) <= self.MERGE_MAX_TOKENS and \
+                sum(len(self._postings[t]) for t in prefix_tokens) < driver:
+            candidates = self._merged(prefix_tokens)
+            check_prefix = False
+        elif rarest is not None:
+            candidates = iter(self._ordered(rarest))
+            sets = sets[1:]
+        else:
+            candidates = iter(self._all_ordered())
+        for pid in candidates:
+            if all(pid in ids for ids in sets) and (
+                    not check_prefix or
+                    any(t.startswith(prefix) for t in self._doc_tokens[pid])):
+                yield pid
+
+    def _ordered(self, tok: str) -> list[int]:
+        ordered = self._sorted.get(tok)
+        if ordered is None:
+            ordered = self._sorted[tok] = sorted(self._postings[tok])
+        return ordered
+
+    def _all_ordered(self) -> list[int]:
+        """Все id индекса по возрастанию (строится при первом обращении)."""
+        if self._all_sorted is None:
+            self._all_sorted = sorted(self._doc_tokens)
+        return self._all_sorted
+
+    def _merged(self, tokens: list[str]) -> Iterator[int]:
+        """id с любым из tokens по возрастанию, без повторов."""
+        last = None
+        for pid in heapq.merge(*(self._ordered(tok) for tok in tokens)):
+            if pid != last:
+                yield pid
+                last = pid
+
+    def complete(self, prefix: str, limit: int = 10) -> list[str]:
+        """Токены словаря, начинающиеся с prefix (для подсказок)."""
+        prefix = normalize(prefix)
+        start = bisect_left(self._vocab, prefix)
+        out = []
+        for tok in self._vocab[start:start + limit]:
+            if not tok.startswith(prefix):
+                break
+            out.append(tok)
+        return out
+
+    def facets(self, ids: list[int] | None = None) -> dict[str, dict[str, int]]:
+        """Количество товаров по категориям и ценовым корзинам.
+
+        Без ids — по всему каталогу (готовые счётчики), иначе — по
+        переданным id (например, по результатам поиска).
+        """
+        if ids is None:
+            return {"category": dict(self._category_counts),
+                    "price": dict(self._price_counts)}
+        categories: Counter[str] = Counter()
+        prices: Counter[str] = Counter()
+        for pid in ids:
+            category, bucket = self._doc_facets[pid]
+            categories[category] += 1
+            prices[bucket] += 1
+        return {"category": dict(categories), "price": dict(prices)}
+
+    def _prefix_tokens(self, prefix: str) -> Iterable[str]:
+        start = bisect_left(self._vocab, prefix)
+        for i in range(start, len(self._vocab)):
+            tok = self._vocab[i]
+            if not tok.startswith(prefix):
+                break
+            yield tok
+
+    def _prefix_union(self, prefix: str) -> set[int]:
+        result: set[int] = set()
+        for tok in self._prefix_tokens(prefix):
+            result |= self._postings[tok]
+        return result
+
+    def _prefix_size(self, prefix: str) -> int:
+        """Сумма длин списков токенов с префиксом — цена _prefix_union."""
+        return sum(len(self._postings[tok]) for tok in self._prefix_tokens(prefix))
@@ -0,0 +1,240 @@
+"""
+Серверный режим магазина: много корзин над одним общим каталогом.
+
+Протокол — JSON-строки поверх TCP (asyncio): клиент шлёт по одному
+объекту на строку, сервер отвечает одним объектом на строку.
+
+    {"op": "open"}                                  → {"ok": true, "cart": 1}
+    {"op": "add", "cart": 1, "product": 5, "qty": 2}
+    {"op": "qty", "cart": 1, "product": 5, "delta": -1}
+    {"op": "remove", "cart": 1, "product": 5}
+    {"op": "total", "cart": 1}                      → {"ok": true, "total": ...}
+    {"op": "close", "cart": 1}
+    {"op": "products", "offset": 0, "limit": 50}
+    {"op": "admin_update", "product": 5, "fields": {"price": 99.0}}
+
+Ошибки возвращаются как {"ok": false, "error": "..."}.
+Корзины, не закрытые клиентом, удаляются при разрыве соединения.
+
+Каталог хранится снимками (copy-on-write): читатели берут ссылку на
+текущий неизменяемый снимок и никогда не ждут администратора; правка
+строит новый снимок и подменяет ссылку. Снимок — общий большой словарь
+плюс маленький слой правок: правка копирует только слой, а слой
+вливается в новый общий словарь, когда вырастает до √n товаров, —
+в среднем O(√n) на правку вместо копии всего каталога.
+Товар попадает в корзину из снимка, действующего на момент добавления,
+поэтому цена позиции фиксируется при добавлении.
+
+Команды корзины принимаются только от соединения, открывшего корзину.
+
+Запуск: python server.py [порт]
+"""
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import itertools
+import json
+import math
+import sys
+from typing import Any, Iterator, Mapping
+
+from cart import Cart
+from catalog import Catalog
+from models import Product
+
+DEFAULT_PORT = 8765
+
+
+# ===========================================================================
+# Общий каталог со снимками
+# ===========================================================================
+
+class CatalogSnapshot(Mapping):
+    """Неизменяемый снимок каталога: общий словарь + слой правок.
+
+    Ни base, ни overlay после создания снимка не меняются.
+    """
+
+    __slots__ = ("_base", "_overlay")
+
+    def __init__(self, base: dict[int, Product], overlay: dict[int, Product]):
+        self._base = base
+        self._overlay = overlay
+
+    def __getitem__(self, product_id: int) -> Product:
+        product = self._overlay.get(product_id)
+        return self._base[product_id] if product is None else product
+
+    def __iter__(self) -> Iterator[int]:
+        return iter(self._base)
+
+    def __len__(self) -> int:
+        return len(self._base)
+
+    def values(self) -> Iterator[Product]:
+        """Товары в порядке каталога, с учётом правок."""
+        overlay = self._overlay
+        return (overlay.get(pid, p) for pid, p in self._base.items())
+
+
+class SharedCatalog:
+    """Каталог для многих читателей: неизменяемые снимки + copy-on-write.
+
+    Все вызовы идут из потока цикла событий сервера, поэтому правки не
+    пересекаются и блокировка не нужна.
+    """
+
+    def __init__(self, products: list[Product]):
+        self._snapshot = CatalogSnapshot(
+            {p.id: dataclasses.replace(p) for p in products}, {})
+
+    @classmethod
+    def from_catalog(cls, catalog: Catalog) -> "SharedCatalog":
+        return cls(catalog.all())
+
+    def snapshot(self) -> Mapping[int, Product]:
+        """Текущий снимок; не меняется после получения."""
+        return self._snapshot
+
+    def update(self, product_id: int, **fields) -> Product:
+        """Изменить товар: новый снимок, старый остаётся у читателей."""
+        current = self._snapshot
+        if product_id not in current:
+            raise KeyError(f"Товар с id={product_id} не найден")
+        for field, value in fields.items():
+            if field == "id" or field not in Product.__dataclass_fields__:
+                raise AttributeError(f"Неизвестное поле: {field}")
+            if field in ("price", "weight") and value < 0:
+                raise ValueError(f"Поле '{field}' не может быть отрицательным")
+        product = dataclasses.replace(current[product_id], **fields)
+        base, overlay = current._base, dict(current._overlay)
+        overlay[product_id] = product
+        if len(overlay) > math.isqrt(len(base)):
+            base, overlay = {**base, **overlay}, {}   # влить слой правок
+        self._snapshot = CatalogSnapshot(base, overlay)   # подмена ссылки
+        return product
+
+
+# ===========================================================================
+# Сервер корзин
+# ===========================================================================
+
+class CartServer:
+    """Хранит корзины сессий и обрабатывает команды клиентов."""
+
+    def __init__(self, catalog: SharedCatalog):
+        self.catalog = catalog
+        self.carts: dict[int, Cart] = {}
+        self._ids = itertools.count(1)
+        self.carts_closed = 0
+
+    # --- Команды ---
+
+    def _cart(self, msg: dict, owned: set[int] | None = None) -> Cart:
+        """Корзина из команды; с owned — только своя для соединения."""
+        cart_id = msg.get("cart")
+        if owned is not None and cart_id not in owned:
+            raise KeyError(f"Корзина {cart_id} не найдена")
+        try:
+            return self.carts[cart_id]
+        except (KeyError, TypeError):
+            raise KeyError(f"Корзина {cart_id} не найдена") from None
+
+    def _product(self, product_id: int) -> Product:
+        product = self.catalog.snapshot().get(product_id)
+        if product is None:
+            raise KeyError(f"Товар с id={product_id} не найден")
+        return product
+
+    def handle(self, msg: dict, owned: set[int] | None = None) -> dict[str, Any]:
+        """Выполнить одну команду и вернуть ответ.
+
+        owned — корзины соединения: open добавляет в него новую корзину,
+        close убирает; команды к чужим корзинам отклоняются.
+        """
+        op = msg.get("op")
+        if op == "open":
+            cart_id = next(self._ids)
+            self.carts[cart_id] = Cart()
+            if owned is not None:
+                owned.add(cart_id)
+            return {"ok": True, "cart": cart_id}
+        if op == "add":
+            self._cart(msg, owned).add(self._product(msg["product"]),
+                                       msg.get("qty", 1))
+            return {"ok": True}
+        if op == "qty":
+            self._cart(msg, owned).change_qty(msg["product"], msg["delta"])
+            return {"ok": True}
+        if op == "remove":
+            self._cart(msg, owned).remove(msg["product"])
+            return {"ok": True}
+        if op == "total":
+            return {"ok": True, **self._cart(msg, owned).breakdown()._asdict()}
+        if op == "close":
+            self._cart(msg, owned)
+            del self.carts[msg["cart"]]
+            if owned is not None:
+                owned.discard(msg["cart"])
+            self.carts_closed += 1
+            return {"ok": True}
+        if op == "products":
+            snapshot = self.catalog.snapshot()
+            offset, limit = msg.get("offset", 0), msg.get("limit", 50)
+            page = itertools.islice(snapshot.values(), offset, offset + limit)
+            return {"ok": True, "total": len(snapshot),
+                    "products": [dataclasses.asdict(p) for p in page]}
+        if op == "admin_update":
+            product = self.catalog.update(msg["product"], **msg.get("fields", {}))
+            return {"ok": True, "product": dataclasses.asdict(product)}
+        raise ValueError(f"Неизвестная команда: {op}")
+
+    # --- Сеть ---
+
+    async def serve_client(self, reader: asyncio.StreamReader,
+                           writer: asyncio.StreamWriter) -> None:
+        owned: set[int] = set()   # корзины, открытые этим соединением
+        try:
+            while line := await reader.readline():
+                try:
+                    reply = self.handle(json.loads(line), owned)
+                except (KeyError, ValueError, AttributeError, TypeError) as exc:
+                    reply = {"ok": False, "error": str(exc)}
+                writer.write(json.dumps(reply, ensure_ascii=False).encode() + b"\n")
+                await writer.drain()
+        except ConnectionResetError:
+            pass
+        finally:
+            # Клиент ушёл, не закрыв корзины, — иначе они копятся в памяти
+            for cart_id in owned:
+                if self.carts.pop(cart_id, None) is not None:
+                    self.carts_closed += 1
+            writer.close()
+            try:
+                await writer.wait_closed()
+            except ConnectionError:
+                pass
+
+    async def start(self, host: str = "127.0.0.1",
+                    port: int = DEFAULT_PORT) -> asyncio.Server:
+        return await asyncio.start_server(self.serve_client, host, port)
+
+
+async def request(reader: asyncio.StreamReader, writer: asyncio.StreamWriter,
+                  msg: dict) -> dict:
+    """Клиентская сторона: отправить команду и дождаться ответа."""
+    writer.write(json.dumps(msg).encode() + b"\n")
+    await writer.drain()
+    return json.loads(await reader.readline())
+
+
+async def _main(port: int) -> None:
+    server = await CartServer(SharedCatalog.from_catalog(Catalog.default())).start(port=port)
+    print(f"Сервер корзин слушает 127.0.0.1:{port}")
+    async with server:
+        await server.serve_forever()
+
+
+if __name__ == "__main__":
+    asyncio.run(_main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_PORT))
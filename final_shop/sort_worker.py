@@ -0,0 +1,76 @@
+"""
+Фоновая сортировка корзины.
+
+SortJob запускает sort_cart в отдельном потоке, чтобы долгая сортировка
+(например, пузырьком на большой корзине) не блокировала цикл событий Tk.
+Поток общается с окном только через очередь сообщений, которую окно
+опрашивает через after():
+
+    ("progress", процент)
+    ("done",     (отсортированный список, шаги))
+    ("cancelled", None)
+    ("error",    исключение)
+
+Время сортировки записывается в profiling под именем «Сортировка:
+<алгоритм>» здесь, а не декоратором в sorting.py — сами алгоритмы
+не зависят от замеров (их гоняет и benchmark.py).
+"""
+from __future__ import annotations
+
+import queue
+import threading
+
+from models import CartItem
+from profiling import timing
+from sorting import SortCancelled, sort_cart
+
+
+class SortJob:
+    """Одна фоновая сортировка с отчётом о прогрессе и отменой."""
+
+    def __init__(self, items: list[CartItem], algorithm: str, key: str,
+                 reverse: bool = False, steps: bool = False):
+        self.algorithm = algorithm
+        self.messages: queue.Queue = queue.Queue()
+        self._cancel = threading.Event()
+        self._last_percent = -1
+        self._thread = threading.Thread(
+            target=self._run,
+            args=(items, algorithm, key, reverse, steps),
+            daemon=True,
+        )
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def cancel(self) -> None:
+        """Попросить поток остановиться при следующем отчёте о прогрессе."""
+        self._cancel.set()
+
+    def is_alive(self) -> bool:
+        return self._thread.is_alive()
+
+    # ------------------------------------------------------------------
+    # Код рабочего потока
+    # ------------------------------------------------------------------
+
+    def _progress(self, done: int, total: int) -> None:
+        if self._cancel.is_set():
+            raise SortCancelled
+        percent = done * 100 // total if total else 100
+        # В очередь попадает не больше 101 сообщения на сортировку
+        if percent != self._last_percent:
+            self._last_percent = percent
+            self.messages.put(("progress", percent))
+
+    def _run(self, items, algorithm, key, reverse, steps) -> None:
+        try:
+            with timing(f"Сортировка: {algorithm}"):
+                result = sort_cart(items, algorithm, key, reverse, steps,
+                                   progress=self._progress)
+        except SortCancelled:
+            self.messages.put(("cancelled", None))
+        except Exception as exc:   # передаём ошибку в поток окна
+            self.messages.put(("error", exc))
+        else:
+            self.messages.put(("done", result))
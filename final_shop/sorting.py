@@ -6,14 +6,28 @@
     key       — строка-ключ: "price" | "weight" | "category"
     reverse   — False = по возрастанию, True = по убыванию
     steps     — True = записывать промежуточные состояния
+    progress  — необязательный callback progress(done, total) для отчёта
+                о ходе сортировки; может прервать её, бросив SortCancelled
 
 Возвращает кортеж:
     (отсортированный список CartItem, список строк-шагов)
 """
 
 from __future__ import annotations
+
+import math
+import random
+import time
+from typing import Callable
+
 from models import CartItem
 
+Progress = Callable[[int, int], None]
+
+
+class SortCancelled(Exception):
+    """Сортировка прервана пользователем (бросается из callback progress)."""
+
 
 # ---------------------------------------------------------------------------
 # Вспомогательные функции
@@ -36,6 +50,11 @@ def _snapshot(items: list[CartItem], key: str) -> str:
     return " → ".join(parts)
 
 
+def _report(progress: Progress | None, done: int, total: int) -> None:
+    if progress is not None:
+        progress(done, total)
+
+
 def _apply_reverse(items: list[CartItem], reverse: bool) -> list[CartItem]:
     if reverse:
         items.reverse()
@@ -51,6 +70,7 @@ def bubble_sort(
     key: str = "price",
     reverse: bool = False,
     steps: bool = False,
+    progress: Progress | None = None,
 ) -> tuple[list[CartItem], list[str]]:
     """
     Сортировка пузырьком.
@@ -62,6 +82,7 @@ def bubble_sort(
     log: list[str] = []
 
     for i in range(n):
+        _report(progress, i, n)
         swapped = False
         for j in range(n - i - 1):
             # Сравниваем соседние элементы
@@ -76,6 +97,7 @@ def bubble_sort(
                 log.append("↳ Список отсортирован досрочно")
             break
 
+    _report(progress, n, n)
     return _apply_reverse(arr, reverse), log
 
 
@@ -88,6 +110,7 @@ def insertion_sort(
     key: str = "price",
     reverse: bool = False,
     steps: bool = False,
+    progress: Progress | None = None,
 ) -> tuple[list[CartItem], list[str]]:
     """
     Сортировка вставками.
@@ -97,7 +120,9 @@ def insertion_sort(
     arr = items.copy()
     log: list[str] = []
 
-    for i in range(1, len(arr)):
+    n = len(arr)
+    for i in range(1, n):
+        _report(progress, i, n)
         key_val = _key_func(arr[i], key)
         current = arr[i]
         j = i - 1
@@ -112,6 +137,7 @@ def insertion_sort(
         if steps:
             log.append(f"Вставка [{i}]: {_snapshot(arr, key)}")
 
+    _report(progress, n, n)
     return _apply_reverse(arr, reverse), log
 
 
@@ -124,6 +150,7 @@ def quick_sort(
     key: str = "price",
     reverse: bool = False,
     steps: bool = False,
+    progress: Progress | None = None,
 ) -> tuple[list[CartItem], list[str]]:
     """
     Быстрая сортировка.
@@ -131,15 +158,21 @@ def quick_sort(
     Шаг записывается после каждого разбиения.
     """
     log: list[str] = []
+    n = len(items)
+    placed = 0   # элементов, уже стоящих на своём месте
 
     def _qsort(arr: list[CartItem]) -> list[CartItem]:
+        nonlocal placed
         if len(arr) <= 1:
+            placed += len(arr)
             return arr
         pivot = arr[len(arr) // 2]
         pivot_val = _key_func(pivot, key)
         left   = [x for x in arr if _key_func(x, key) <  pivot_val]
         middle = [x for x in arr if _key_func(x, key) == pivot_val]
         right  = [x for x in arr if _key_func(x, key) >  pivot_val]
+        placed += len(middle)
+        _report(progress, placed, n)
         if steps:
             log.append(
                 f"Pivot={pivot.product.name}({pivot_val})  "
@@ -149,6 +182,7 @@ def quick_sort(
         return _qsort(left) + middle + _qsort(right)
 
     result = _qsort(items.copy())
+    _report(progress, n, n)
     return _apply_reverse(result, reverse), log
 
 
@@ -161,6 +195,7 @@ def merge_sort(
     key: str = "price",
     reverse: bool = False,
     steps: bool = False,
+    progress: Progress | None = None,
 ) -> tuple[list[CartItem], list[str]]:
     """
     Сортировка слиянием.
@@ -168,8 +203,13 @@ def merge_sort(
     Шаг записывается после каждого слияния.
     """
     log: list[str] = []
+    n = len(items)
+    merges = 0   # слияний всего n − 1
 
     def _merge(left: list[CartItem], right: list[CartItem]) -> list[CartItem]:
+        nonlocal merges
+        merges += 1
+        _report(progress, merges, max(1, n - 1))
         result, i, j = [], 0, 0
         while i < len(left) and j < len(right):
             if _key_func(left[i], key) <= _key_func(right[j], key):
@@ -189,9 +229,121 @@ def merge_sort(
         return _merge(_msort(arr[:mid]), _msort(arr[mid:]))
 
     result = _msort(items.copy())
+    _report(progress, n, n)
+    return _apply_reverse(result, reverse), log
+
+
+# ---------------------------------------------------------------------------
+# Timsort — встроенная sorted() с заранее извлечёнными ключами
+# ---------------------------------------------------------------------------
+
+def tim_sort(
+    items: list[CartItem],
+    key: str = "price",
+    reverse: bool = False,
+    steps: bool = False,
+    progress: Progress | None = None,
+) -> tuple[list[CartItem], list[str]]:
+    """
+    Timsort (встроенная sorted(), реализована на C).
+    Ключи извлекаются один раз, сортируется список индексов.
+    Промежуточные шаги недоступны — записывается одна строка.
+    """
+    n = len(items)
+    _report(progress, 0, n)
+    keys = [_key_func(item, key) for item in items]
+    order = sorted(range(n), key=keys.__getitem__)
+    result = [items[i] for i in order]
+    log = [f"sorted() отсортировала {n} элементов за один вызов"] if steps else []
+    _report(progress, n, n)
     return _apply_reverse(result, reverse), log
 
 
+# ---------------------------------------------------------------------------
+# Автовыбор алгоритма
+# ---------------------------------------------------------------------------
+
+_INVERSION_SAMPLES = 256   # случайных пар для оценки числа инверсий
+
+
+def estimate_inversions(keys: list) -> float:
+    """Оценка числа инверсий по случайной выборке пар (i < j).
+
+    Доля пар «не по порядку» в выборке × n(n − 1)/2.
+    Для уже отсортированного списка даёт 0.
+    """
+    n = len(keys)
+    if n < 2:
+        return 0.0
+    if n * (n - 1) // 2 <= _INVERSION_SAMPLES:
+        # Пар меньше, чем выборка, — считаем точно
+        return float(sum(keys[i] > keys[j]
+                         for i in range(n) for j in range(i + 1, n)))
+    rng = random.Random(n)   # детерминированно для одного и того же размера
+    inverted = 0
+    for _ in range(_INVERSION_SAMPLES):
+        i, j = rng.randrange(n), rng.randrange(n)
+        if i > j:
+            i, j = j, i
+        if i != j and keys[i] > keys[j]:
+            inverted += 1
+    # Пары с i == j не бывают инверсиями; доля i == j равна 1/n
+    return inverted / _INVERSION_SAMPLES * n * n / 2
+
+
+def choose_algorithm(items: list[CartItem], key: str,
+                     steps: bool = False) -> tuple[str, str]:
+    """Выбрать самый дешёвый алгоритм для данных: (название, причина).
+
+    Без шагов выигрывает Timsort: встроенная sorted() работает на C.
+    Если шаги нужны, выбираем среди учебных алгоритмов:
+        - вставками, если ожидаемое число сдвигов n + инверсии меньше
+          n·log₂n (мало элементов или список почти отсортирован);
+        - слиянием для строковых ключей (меньше сравнений строк);
+        - быструю для чисел.
+    Пузырьком не выбирается никогда.
+    """
+    n = len(items)
+    if not steps:
+        return "Timsort", "шаги не нужны — встроенная sorted() быстрее всех"
+    keys = [_key_func(item, key) for item in items]
+    inversions = estimate_inversions(keys)
+    n_log_n = n * math.log2(n) if n > 1 else 1
+    if n + inversions <= n_log_n:
+        return "Вставками", (f"≈{inversions:,.0f} инверсий — дешевле, "
+                             f"чем n·log₂n = {n_log_n:,.0f}")
+    if keys and isinstance(keys[0], str):
+        return "Слиянием", "строковые ключи — меньше сравнений строк"
+    return "Быстрая", f"≈{inversions:,.0f} инверсий, числовые ключи"
+
+
+def auto_sort(
+    items: list[CartItem],
+    key: str = "price",
+    reverse: bool = False,
+    steps: bool = False,
+    progress: Progress | None = None,
+) -> tuple[list[CartItem], list[str]]:
+    """
+    Автовыбор: анализирует размер, упорядоченность и тип ключа и
+    запускает самый дешёвый алгоритм. Решение и время анализа/сортировки
+    всегда записываются в начало журнала шагов.
+    """
+    start = time.perf_counter()
+    name, reason = choose_algorithm(items, key, steps)
+    t_choose = time.perf_counter() - start
+
+    start = time.perf_counter()
+    result, log = ALGORITHMS[name](items, key, reverse, steps, progress)
+    t_sort = time.perf_counter() - start
+
+    header = [
+        f"Авто: n={len(items)}, ключ={key} → «{name}» ({reason})",
+        f"Авто: анализ {t_choose * 1000:.2f} мс, сортировка {t_sort * 1000:.2f} мс",
+    ]
+    return result, header + log
+
+
 # ---------------------------------------------------------------------------
 # Единая точка входа
 # ---------------------------------------------------------------------------
@@ -201,6 +353,8 @@ ALGORITHMS = {
     "Вставками":  insertion_sort,
     "Быстрая":    quick_sort,
     "Слиянием":   merge_sort,
+    "Timsort":    tim_sort,
+    "Авто":       auto_sort,
 }
 
 SORT_KEYS = {
@@ -216,15 +370,17 @@ def sort_cart(
     key: str,
     reverse: bool = False,
     steps: bool = False,
+    progress: Progress | None = None,
 ) -> tuple[list[CartItem], list[str]]:
     """
     Сортирует список CartItem выбранным алгоритмом.
 
     algorithm — один из ключей ALGORITHMS
     key       — один из ключей SORT_KEYS
+    progress  — callback progress(done, total), см. описание модуля
     """
     if algorithm not in ALGORITHMS:
         raise ValueError(f"Неизвестный алгоритм: {algorithm}")
     if key not in SORT_KEYS:
         raise ValueError(f"Неизвестный ключ: {key}")
-    return ALGORITHMS[algorithm](items, SORT_KEYS[key], reverse, steps)
+    return ALGORITHMS[algorithm](items, SORT_KEYS[key], reverse, steps, progress)
@@ -0,0 +1,433 @@
+"""
+Хранение каталога и корзины в SQLite.
+
+SQLiteStorage — тонкий слой над sqlite3 (WAL, индексы по категории и цене,
+пакетная запись через executemany).
+SQLiteCatalog — каталог с тем же интерфейсом, что и Catalog, но товары
+живут в базе: в памяти держится только небольшой кэш, а таблица
+окна получает id товаров постранично (LazyIds).
+
+name и category сортируются сопоставлением shop_text (search.normalize:
+без учёта регистра, «ё» как «е») — так же, как SORT_COLUMNS в памяти.
+Страницы читаются keyset-запросами WHERE (ключ, id) > (?, ?) по
+индексу (ключ, id), без OFFSET по строкам таблицы.
+"""
+from __future__ import annotations
+
+import dataclasses
+import sqlite3
+import weakref
+from collections import OrderedDict
+from collections.abc import Sequence
+from pathlib import Path
+from typing import Iterable, Iterator
+
+from catalog import Catalog
+from models import CartItem, Product
+from search import SearchIndex, normalize
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS products (
+    id          INTEGER PRIMARY KEY,
+    name        TEXT    NOT NULL,
+    category    TEXT    NOT NULL,
+    price       REAL    NOT NULL,
+    weight      REAL    NOT NULL,
+    description TEXT    NOT NULL DEFAULT ''
+);
+CREATE INDEX IF NOT EXISTS idx_products_price    ON products (price, id);
+CREATE INDEX IF NOT EXISTS idx_products_weight   ON products (weight, id);
+-- Порядок таблицы окна: то же сопоставление, что в ORDER BY
+CREATE INDEX IF NOT EXISTS idx_products_name_text
+    ON products (name COLLATE shop_text, id);
+CREATE INDEX IF NOT EXISTS idx_products_category_text
+    ON products (category COLLATE shop_text, id);
+
+CREATE TABLE IF NOT EXISTS cart_items (
+    position   INTEGER PRIMARY KEY,
+    product_id INTEGER NOT NULL REFERENCES products(id) ON DELETE CASCADE,
+    qty        INTEGER NOT NULL
+);
+"""
+
+_COLUMNS = "id, name, category, price, weight, description"
+# Колонка сортировки → сопоставление (то же, что у её индекса)
+_ORDER_COLUMNS = {
+    "id":       "",
+    "name":     " COLLATE shop_text",
+    "category": " COLLATE shop_text",
+    "price":    "",
+    "weight":   "",
+}
+
+
+def _collate_text(a: str, b: str) -> int:
+    """Сопоставление shop_text: сравнение по search.normalize."""
+    ka, kb = normalize(a), normalize(b)
+    return (ka > kb) - (ka < kb)
+
+
+def _row_to_product(row: tuple) -> Product:
+    return Product(*row)
+
+
+def _product_to_row(p: Product) -> tuple:
+    return (p.id, p.name, p.category, p.price, p.weight, p.description)
+
+
+# ===========================================================================
+# Низкоуровневое хранилище
+# ===========================================================================
+
+class SQLiteStorage:
+    """Таблицы products и cart_items в одном файле SQLite."""
+
+    def __init__(self, path: str | Path):
+        self.path = str(path)
+        self._conn = sqlite3.connect(self.path)
+        # До схемы: индексы по name / category построены с этим сопоставлением
+        self._conn.create_collation("shop_text", _collate_text)
+        # WAL: читатели не блокируются записью, commit дешевле
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute("PRAGMA foreign_keys=ON")
+        self._conn.executescript(_SCHEMA)
+
+    def close(self) -> None:
+        self._conn.close()
+
+    # --- Товары ---
+
+    def count(self) -> int:
+        return self._conn.execute("SELECT COUNT(*) FROM products").fetchone()[0]
+
+    def max_id(self) -> int:
+        return self._conn.execute(
+            "SELECT COALESCE(MAX(id), 0) FROM products").fetchone()[0]
+
+    def get(self, product_id: int) -> Product | None:
+        row = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM products WHERE id = ?", (product_id,)
+        ).fetchone()
+        return _row_to_product(row) if row else None
+
+    def page(self, after: tuple | None, limit: int, order_by: str = "id",
+             reverse: bool = False) -> list[Product]:
+        """Страница товаров в заданном порядке после ключа after.
+
+        after — (значение колонки, id) последнего товара предыдущей
+        страницы (None — с начала): WHERE (ключ, id) > (?, ?) по индексу.
+        """
+        collate = self._collation(order_by)
+        direction, op = ("DESC", "<") if reverse else ("ASC", ">")
+        if after is None:
+            where, params = "", ()
+        elif order_by == "id":
+            where, params = f"WHERE id {op} ?", (after[1],)
+        else:
+            # COLLATE у параметра, а не у колонки — иначе SQLite не ищет
+            # по индексу, а сканирует его с начала
+            where = f"WHERE ({order_by}, id) {op} (?{collate}, ?)"
+            params = after
+        rows = self._conn.execute(
+            f"SELECT {_COLUMNS} FROM products {where} "
+            f"ORDER BY {order_by}{collate} {direction}, id {direction} LIMIT ?",
+            (*params, limit),
+        ).fetchall()
+        return [_row_to_product(r) for r in rows]
+
+    def key_at(self, position: int, order_by: str = "id",
+               reverse: bool = False) -> tuple | None:
+        """(значение колонки, id) товара с номером position в порядке order_by.
+
+        Нужен для перехода к произвольной странице (прокрутка ползунком):
+        OFFSET идёт только по покрывающему индексу (ключ, id), строки
+        таблицы не читаются, дальше страница берётся keyset-запросом.
+        """
+        collate = self._collation(order_by)
+        direction = "DESC" if reverse else "ASC"
+        return self._conn.execute(
+            f"SELECT {order_by}, id FROM products "
+            f"ORDER BY {order_by}{collate} {direction}, id {direction} "
+            f"LIMIT 1 OFFSET ?",
+            (position,),
+        ).fetchone()
+
+    @staticmethod
+    def _collation(order_by: str) -> str:
+        collate = _ORDER_COLUMNS.get(order_by)
+        if collate is None:
+            raise ValueError(f"Неизвестная колонка сортировки: {order_by}")
+        return collate
+
+    def id_position(self, product_id: int, reverse: bool = False) -> int:
+        """Номер товара в порядке по id (по индексу первичного ключа)."""
+        op = ">" if reverse else "<"
+        return self._conn.execute(
+            f"SELECT COUNT(*) FROM products WHERE id {op} ?", (product_id,)
+        ).fetchone()[0]
+
+    def iter_products(self, batch: int = 1000) -> Iterator[Product]:
+        """Потоковое чтение всех товаров пакетами (по возрастанию id)."""
+        last_id = 0
+        while True:
+            rows = self._conn.execute(
+                f"SELECT {_COLUMNS} FROM products WHERE id > ? "
+                f"ORDER BY id LIMIT ?", (last_id, batch),
+            ).fetchall()
+            if not rows:
+                return
+            for r in rows:
+                yield _row_to_product(r)
+            last_id = rows[-1][0]
+
+    def upsert_products(self, products: Iterable[Product]) -> None:
+        """Вставить/обновить товары одной транзакцией (executemany)."""
+        with self._conn:
+            self._conn.executemany(
+                f"INSERT INTO products ({_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(id) DO UPDATE SET name = excluded.name, "
+                "category = excluded.category, price = excluded.price, "
+                "weight = excluded.weight, description = excluded.description",
+                (_product_to_row(p) for p in products),
+            )
+
+    def delete_product(self, product_id: int) -> None:
+        with self._conn:
+            self._conn.execute("DELETE FROM products WHERE id = ?", (product_id,))
+
+    # --- Корзина ---
+
+    def load_cart(self) -> list[tuple[int, int]]:
+        """Позиции сохранённой корзины: [(product_id, qty), ...]."""
+        return self._conn.execute(
+            "SELECT product_id, qty FROM cart_items ORDER BY position"
+        ).fetchall()
+
+    def save_cart(self, items: Iterable[CartItem]) -> None:
+        """Перезаписать сохранённую корзину одной транзакцией."""
+        with self._conn:
+            self._conn.execute("DELETE FROM cart_items")
+            self._conn.executemany(
+                "INSERT INTO cart_items (position, product_id, qty) "
+                "VALUES (?, ?, ?)",
+                ((pos, item.product.id, item.qty)
+                 for pos, item in enumerate(items)),
+            )
+
+
+# ===========================================================================
+# Ленивая последовательность id для таблицы окна
+# ===========================================================================
+
+class LazyIds(Sequence):
+    """id товаров в заданном порядке; страницы подгружаются по требованию."""
+
+    PAGE = 256
+
+    def __init__(self, catalog: "SQLiteCatalog", order_by: str = "id",
+                 reverse: bool = False):
+        self._catalog = catalog
+        self._order_by = order_by
+        self._reverse = reverse
+        self._len = catalog.size()
+        self._pages: dict[int, list[int]] = {}
+        # (значение колонки, id) последнего товара загруженной страницы
+        self._last_keys: dict[int, tuple] = {}
+
+    def __len__(self) -> int:
+        return self._len
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self._len))]
+        if index < 0:
+            index += self._len
+        if not 0 <= index < self._len:
+            raise IndexError(index)
+        page_no, pos = divmod(index, self.PAGE)
+        page = self._pages.get(page_no)
+        if page is None:
+            page = self._load_page(page_no)
+        if pos >= len(page):
+            raise IndexError(index)
+        return page[pos]
+
+    def _load_page(self, page_no: int) -> list[int]:
+        storage = self._catalog.storage
+        if page_no == 0:
+            after = None
+        elif page_no - 1 in self._last_keys:      # обычная прокрутка
+            after = self._last_keys[page_no - 1]
+        else:                                     # переход в середину
+            after = storage.key_at(page_no * self.PAGE - 1,
+                                   self._order_by, self._reverse)
+        products = storage.page(after, self.PAGE, self._order_by, self._reverse)
+        # Заодно прогреваем кэш каталога — строки сразу пойдут в таблицу
+        page = [self._catalog._remember(p).id for p in products]
+        self._pages[page_no] = page
+        if products:
+            last = products[-1]
+            self._last_keys[page_no] = (getattr(last, self._order_by), last.id)
+        return page
+
+    def index(self, value, start: int = 0, stop: int | None = None) -> int:
+        if self._order_by == "id" and start == 0 and stop is None:
+            # Позиция id в порядке по id считается по индексу первичного ключа
+            if self._catalog.get(value) is None:
+                raise ValueError(value)
+            return self._catalog.storage.id_position(value, self._reverse)
+        return super().index(value, start, stop if stop is not None else self._len)
+
+
+# ===========================================================================
+# Каталог поверх SQLite
+# ===========================================================================
+
+class SQLiteCatalog(Catalog):
+    """Каталог, хранящий товары в SQLite и держащий в памяти только кэш."""
+
+    def __init__(self, storage: SQLiteStorage, cache_size: int = 4096):
+        super().__init__()
+        self.storage = storage
+        self._next_id = storage.max_id() + 1
+        self._count = storage.count()
+        self._cache_size = cache_size
+        # LRU недавно показанных товаров
+        self._cache: OrderedDict[int, Product] = OrderedDict()
+        # Все «живые» объекты Product (например, лежащие в корзине): один id —
+        # один объект, чтобы правка цены сразу была видна в корзине
+        self._live: weakref.WeakValueDictionary[int, Product] = \
+            weakref.WeakValueDictionary()
+        # Отсортированные представления по (колонка, обратный порядок);
+        # страницы внутри них тоже кэшируются до изменения каталога
+        self._views: dict[tuple[str, bool], LazyIds] = {}
+        # Поисковый индекс строится при первом запросе, а не при запуске
+        self._index = None
+
+    def _remember(self, p: Product) -> Product:
+        live = self._live.get(p.id)
+        if live is not None:
+            p = live
+        else:
+            self._live[p.id] = p
+        self._cache[p.id] = p
+        self._cache.move_to_end(p.id)
+        if len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+        return p
+
+    # --- CRUD ---
+
+    def add(self, name: str, category: str, price: float,
+            weight: float, description: str = "") -> Product:
+        if price < 0 or weight < 0:
+            raise ValueError("Цена и вес не могут быть отрицательными")
+        p = Product(
+            id=self._next_id,
+            name=name.strip(),
+            category=category.strip(),
+            price=price,
+            weight=weight,
+            description=description.strip(),
+        )
+        self.storage.upsert_products([p])
+        self._next_id += 1
+        self._count += 1
+        self._views.clear()
+        if self._index is not None:
+            self._index.add(p)
+        return self._remember(p)
+
+    def add_many(self, rows: Iterable[tuple]) -> list[Product]:
+        """Пакет товаров — одной транзакцией executemany.
+
+        Индексы SQLite обновляются внутри транзакции; поисковый индекс
+        (если уже построен) — одним вызовом add_many.
+        """
+        products = self._make_products(rows)
+        self.storage.upsert_products(products)
+        self._count += len(products)
+        self._views.clear()
+        if self._index is not None:
+            self._index.add_many(products)
+        return products
+
+    def get(self, product_id: int) -> Product | None:
+        p = self._cache.get(product_id) or self._live.get(product_id)
+        if p is None:
+            p = self.storage.get(product_id)
+            if p is None:
+                return None
+        return self._remember(p)
+
+    def update(self, product_id: int, **kwargs) -> Product:
+        """Сначала запись в базу, потом правка товара в памяти.
+
+        Если запись не удалась, объект в памяти (и в корзине) остаётся
+        прежним и не расходится с базой.
+        """
+        p = self.get(product_id)
+        if p is None:
+            raise KeyError(f"Товар с id={product_id} не найден")
+        self._check_fields(p, kwargs)
+        self.storage.upsert_products([dataclasses.replace(p, **kwargs)])
+        p = super().update(product_id, **kwargs)
+        self._views.clear()
+        return p
+
+    def remove(self, product_id: int) -> None:
+        if self.get(product_id) is None:
+            raise KeyError(f"Товар с id={product_id} не найден")
+        self.storage.delete_product(product_id)
+        self._cache.pop(product_id, None)
+        self._live.pop(product_id, None)
+        self._count -= 1
+        self._views.clear()
+        if self._index is not None:
+            self._index.remove(product_id)
+
+    def all(self) -> list[Product]:
+        """Все товары (читает всю таблицу — для окна используйте ids())."""
+        return [self._remember(p) for p in self.storage.iter_products()]
+
+    def ids(self) -> LazyIds:
+        return self.sorted_ids("id")
+
+    def sorted_ids(self, column: str, reverse: bool = False) -> LazyIds:
+        """id в порядке колонки: страницы читаются по индексу этой колонки."""
+        view = self._views.get((column, reverse))
+        if view is None:
+            view = LazyIds(self, column, reverse)
+            self._views[(column, reverse)] = view
+        return view
+
+    def size(self) -> int:
+        return self._count
+
+    def search_index(self) -> SearchIndex:
+        """Индекс строится потоковым чтением базы при первом поиске."""
+        if self._index is None:
+            index = SearchIndex()
+            index.add_many(self.storage.iter_products())
+            self._index = index
+        return self._index
+
+    # --- Корзина ---
+
+    def load_cart_items(self) -> list[CartItem]:
+        """Восстановить сохранённую корзину."""
+        items = []
+        for product_id, qty in self.storage.load_cart():
+            p = self.get(product_id)
+            if p is not None:
+                items.append(CartItem(product=p, qty=qty))
+        return items
+
+    @classmethod
+    def open(cls, path: str | Path) -> "SQLiteCatalog":
+        """Открыть каталог в файле path; пустую базу заполнить демо-товарами."""
+        storage = SQLiteStorage(path)
+        if storage.count() == 0:
+            storage.upsert_products(Catalog.default().all())
+        return cls(storage)
@@ -0,0 +1,78 @@
+"""
+Регрессионные тесты журнала корзины (events.py): недописанная запись
+в конце журнала, снимки по состоянию журнала, а не окна, и параметры
+EventSourcedCart.open (snapshot_every, правила скидок).
+
+Запуск (из папки final_shop/): python -m pytest -q test_events.py
+"""
+
+import pytest
+
+from catalog import Catalog
+from discounts import CategoryDiscount
+from events import ADD, CartEventLog, EventSourcedCart, replay
+
+
+def _catalog() -> Catalog:
+    catalog = Catalog()
+    for i in range(5):
+        catalog.add(f"Товар {i}", "Тест", price=10.0 + i, weight=1.0)
+    return catalog
+
+
+def test_partial_record_is_truncated_on_open(tmp_path) -> None:
+    path = tmp_path / "cart.log"
+    log = CartEventLog(path)
+    log.append([(ADD, 1, 2), (ADD, 2, 1)])
+    log.close()
+    with open(path, "ab") as f:
+        f.write(b"\x01\x03\x00")          # упали посреди записи
+
+    log = CartEventLog(path)
+    assert len(log) == 2
+    log.append([(ADD, 3, 5)])
+    log.close()
+
+    log = CartEventLog(path)
+    assert list(log.records()) == [(ADD, 1, 2), (ADD, 2, 1), (ADD, 3, 5)]
+    log.close()
+
+
+def test_snapshot_keeps_products_removed_from_catalog(tmp_path) -> None:
+    path = tmp_path / "cart.log"
+    catalog = _catalog()
+    cart = EventSourcedCart.open(catalog, path, snapshot_every=4)
+    cart.add(catalog.get(1), 2)
+    cart.add(catalog.get(2), 3)
+    cart.close()
+
+    catalog.remove(2)                      # товара нет, но он в истории
+    cart = EventSourcedCart.open(catalog, path, snapshot_every=4)
+    assert [item.product.id for item in cart.items()] == [1]
+    cart.add(catalog.get(3))
+    cart.add(catalog.get(4))               # четвёртое событие — снимок
+    cart.close()
+
+    log = CartEventLog(path)
+    state, at = log.read_snapshot()
+    assert at == 4
+    assert state == replay(log.records(0, at)) == {1: 2, 2: 3, 3: 1, 4: 1}
+    log.close()
+
+
+def test_snapshot_every_must_be_positive(tmp_path) -> None:
+    with pytest.raises(ValueError):
+        EventSourcedCart.open(_catalog(), tmp_path / "cart.log", snapshot_every=0)
+
+
+def test_reopened_cart_keeps_discount_rules(tmp_path) -> None:
+    path = tmp_path / "cart.log"
+    catalog = _catalog()
+    rules = [CategoryDiscount("Тест", 0.1)]
+    cart = EventSourcedCart.open(catalog, path, rules=rules)
+    cart.add(catalog.get(1), 2)
+    cart.close()
+
+    cart = EventSourcedCart.open(catalog, path, rules=rules)
+    assert cart.discount() == round(2 * 10.0 * 0.1, 2)
+    cart.close()
@@ -0,0 +1,69 @@
+"""
+Пакетный пересчёт (pricing.py) против Cart.breakdown(): для случайных
+корзин subtotal, скидка, налог и итог совпадают до бита, в том числе
+после смены ставок Cart и у порога скидки.
+
+Запуск (из папки final_shop/): python -m pytest -q test_pricing.py
+"""
+
+import random
+
+import numpy as np
+import pytest
+
+from cart import Cart
+from catalog import Catalog
+from pricing import carts_to_rows, price_carts, price_column
+
+
+def _carts(catalog: Catalog, n_carts: int, seed: int) -> dict[int, Cart]:
+    rng = random.Random(seed)
+    products = catalog.all()
+    carts = {}
+    for cart_id in range(1, n_carts + 1):
+        cart = Cart()
+        for p in rng.sample(products, rng.randint(1, 8)):
+            cart.add(p, rng.randint(1, 5))
+        carts[cart_id] = cart
+    return carts
+
+
+def _assert_same(carts: dict[int, Cart], catalog: Catalog) -> None:
+    result = price_carts(carts_to_rows(carts), price_column(catalog))
+    assert result.cart_ids.tolist() == list(carts)
+    for i, cart in enumerate(carts.values()):
+        b = cart.breakdown()
+        assert (float(result.subtotal[i]), float(result.discount[i]),
+                float(result.tax[i]), float(result.total[i])) == \
+            (b.subtotal, b.discount, b.tax, b.total)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_price_carts_matches_cart(seed: int) -> None:
+    catalog = Catalog.default()
+    _assert_same(_carts(catalog, 500, seed), catalog)
+
+
+def test_price_carts_follows_cart_rates(monkeypatch) -> None:
+    catalog = Catalog.default()
+    carts = _carts(catalog, 300, seed=7)
+    monkeypatch.setattr(Cart, "DISCOUNT_RATE", 0.125)
+    monkeypatch.setattr(Cart, "TAX_RATE", 0.2)
+    _assert_same(carts, catalog)
+
+
+def test_discount_threshold_is_strict() -> None:
+    catalog = Catalog()
+    p = catalog.add("Товар", "Тест", price=Cart.DISCOUNT_THRESHOLD, weight=1.0)
+    at_threshold, above = Cart(), Cart()
+    at_threshold.add(p)
+    above.add(p, 2)
+    carts = {1: at_threshold, 2: above}
+    _assert_same(carts, catalog)
+    assert at_threshold.discount() == 0
+
+
+def test_unknown_product_is_rejected() -> None:
+    prices = price_column(Catalog.default())
+    with pytest.raises(KeyError):
+        price_carts(np.array([[1, len(prices), 1]]), prices)
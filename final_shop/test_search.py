@@ -0,0 +1,93 @@
+"""
+Поисковый индекс (search.py) против полного перебора: те же id для
+точных слов, префикса и запросов с limit и те же счётчики фасетов —
+в том числе после add / update / remove отдельных товаров.
+
+Запуск (из папки final_shop/): python -m pytest -q test_search.py
+"""
+
+import random
+from collections import Counter
+
+import pytest
+
+from models import Product
+from search import SearchIndex, normalize, price_bucket, tokenize
+
+_WORDS = ["молоко", "молотый", "Мёд", "мед", "чай", "чайник", "кофе", "Товар",
+          "товары", "зелёный", "зеленый", "Сыр", "1", "12", "123", "a1"]
+_QUERIES = ["", " ", "м", "мо", "мол ", "молоко", "МЁД", "мед ", "чай",
+            "чай ", "товар 1", "товар 12", "зелен", "сыр чай", "кофе м",
+            "1", "12 ", "нет", "a", "чайник мёд молоко"]
+
+
+def _brute_force(products: dict[int, Product], query: str) -> list[int]:
+    """Все товары, где есть каждое слово запроса (последнее — префиксом)."""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+    prefix = tokens.pop() if not query[-1].isspace() else None
+    found = []
+    for pid, p in sorted(products.items()):
+        doc = set(tokenize(f"{p.name} {p.category} {p.description}"))
+        if not set(tokens) <= doc:
+            continue
+        if prefix is not None and not any(t.startswith(prefix) for t in doc):
+            continue
+        found.append(pid)
+    return found
+
+
+def _random_product(rng: random.Random, pid: int) -> Product:
+    def text(n: int) -> str:
+        return " ".join(rng.choice(_WORDS) for _ in range(rng.randint(0, n)))
+    return Product(id=pid, name=text(3), category=rng.choice(_WORDS),
+                   price=rng.uniform(1, 2000), weight=1.0,
+                   description=text(4))
+
+
+def _check(index: SearchIndex, products: dict[int, Product]) -> None:
+    for query in _QUERIES:
+        expected = _brute_force(products, query)
+        assert index.search(query) == expected, query
+        for limit in (1, 3, 50):
+            assert index.search(query, limit) == expected[:limit], (query, limit)
+    assert index.facets() == {
+        "category": dict(Counter(p.category for p in products.values())),
+        "price": dict(Counter(price_bucket(p.price) for p in products.values())),
+    }
+
+
+def test_normalize_folds_case_and_yo() -> None:
+    assert normalize("Зелёный ЧАЙ") == normalize("зеленый чай")
+    assert tokenize("Мёд, 12 шт.") == ["мед", "12", "шт"]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_search_matches_brute_force_after_edits(seed: int) -> None:
+    rng = random.Random(seed)
+    products = {pid: _random_product(rng, pid) for pid in range(1, 300)}
+    index = SearchIndex()
+    index.add_many(products.values())
+    _check(index, products)
+
+    next_id = len(products) + 1
+    for _ in range(200):
+        action = rng.random()
+        if action < 0.4:
+            p = _random_product(rng, next_id)
+            next_id += 1
+            products[p.id] = p
+            index.add(p)
+        elif action < 0.7 and products:
+            p = _random_product(rng, rng.choice(list(products)))
+            products[p.id] = p
+            index.update(p)
+        elif products:
+            pid = rng.choice(list(products))
+            del products[pid]
+            index.remove(pid)
+        if rng.random() < 0.1:
+            _check(index, products)
+    _check(index, products)
+    assert len(index) == len(products)
@@ -0,0 +1,98 @@
+"""
+Сервер корзин (server.py): снимки SharedCatalog против полных копий
+каталога после каждой правки, цена позиции фиксируется при добавлении,
+команды к чужим корзинам отклоняются, а корзины разорванного
+соединения удаляются.
+
+Запуск (из папки final_shop/): python -m pytest -q test_server.py
+"""
+
+import asyncio
+import dataclasses
+import random
+
+import pytest
+
+from catalog import Catalog
+from server import CartServer, SharedCatalog, request
+
+
+def _as_dict(snapshot) -> dict:
+    return {pid: dataclasses.asdict(p) for pid, p in snapshot.items()}
+
+
+def test_snapshots_match_full_copies() -> None:
+    rng = random.Random(1)
+    catalog = Catalog()
+    for i in range(100):
+        catalog.add(f"Товар {i}", "Тест", price=float(i), weight=1.0)
+    shared = SharedCatalog.from_catalog(catalog)
+    # Наивный copy-on-write: полная копия каталога после каждой правки
+    current = {p.id: dataclasses.asdict(p) for p in catalog.all()}
+    history = [(shared.snapshot(), dict(current))]
+    for _ in range(300):                   # слой правок вливается много раз
+        pid = rng.choice(list(current))
+        price = round(rng.uniform(1, 500), 2)
+        shared.update(pid, price=price)
+        current = {**current, pid: {**current[pid], "price": price}}
+        history.append((shared.snapshot(), dict(current)))
+
+    for snapshot, expected in history:
+        assert _as_dict(snapshot) == expected
+        assert [p.id for p in snapshot.values()] == list(expected)
+        assert len(snapshot) == len(expected)
+
+
+def test_update_rejects_bad_fields() -> None:
+    shared = SharedCatalog.from_catalog(Catalog.default())
+    before = shared.snapshot()
+    with pytest.raises(KeyError):
+        shared.update(10**6, price=1.0)
+    with pytest.raises(AttributeError):
+        shared.update(1, id=2)
+    with pytest.raises(ValueError):
+        shared.update(1, price=-1.0)
+    assert shared.snapshot() is before
+
+
+def test_cart_keeps_price_at_add_time() -> None:
+    server = CartServer(SharedCatalog.from_catalog(Catalog.default()))
+    price = server.catalog.snapshot()[1].price
+    cart = server.handle({"op": "open"})["cart"]
+    server.handle({"op": "add", "cart": cart, "product": 1, "qty": 2})
+    server.handle({"op": "admin_update", "product": 1,
+                   "fields": {"price": price + 100}})
+    assert server.handle({"op": "total", "cart": cart})["subtotal"] == price * 2
+
+
+def test_foreign_and_dropped_carts() -> None:
+    server = CartServer(SharedCatalog.from_catalog(Catalog.default()))
+
+    async def scenario() -> None:
+        tcp = await server.start(port=0)
+        port = tcp.sockets[0].getsockname()[1]
+        first = await asyncio.open_connection("127.0.0.1", port)
+        second = await asyncio.open_connection("127.0.0.1", port)
+
+        cart = (await request(*first, {"op": "open"}))["cart"]
+        for op in ({"op": "total", "cart": cart},
+                   {"op": "add", "cart": cart, "product": 1},
+                   {"op": "close", "cart": cart}):
+            assert (await request(*second, op))["ok"] is False
+        assert cart in server.carts
+
+        first[1].close()                   # ушёл, не закрыв корзину
+        await first[1].wait_closed()
+        for _ in range(100):
+            if not server.carts:
+                break
+            await asyncio.sleep(0.01)
+        assert server.carts == {}
+        assert server.carts_closed == 1
+
+        second[1].close()
+        await second[1].wait_closed()
+        tcp.close()
+        await tcp.wait_closed()
+
+    asyncio.run(scenario())
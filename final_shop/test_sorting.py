@@ -0,0 +1,68 @@
+"""
+Сортировки корзины (sorting.py): каждый алгоритм, включая «Авто», даёт
+тот же порядок ключей, что и sorted(); choose_algorithm выбирает
+вставки для почти отсортированных данных, Timsort без шагов, слияние
+для строк и быструю для чисел; оценка инверсий сходится с подсчётом.
+
+Запуск (из папки final_shop/): python -m pytest -q test_sorting.py
+"""
+
+import random
+
+import pytest
+
+from models import CartItem, Product
+from sorting import (ALGORITHMS, SORT_KEYS, _key_func, choose_algorithm,
+                     estimate_inversions, sort_cart)
+
+_CATEGORIES = ["Молоко", "мёд", "Хлеб", "чай", "Кофе", "сыр"]
+
+
+def _items(n: int, seed: int) -> list[CartItem]:
+    rng = random.Random(seed)
+    return [CartItem(Product(id=i, name=f"Товар {i}",
+                             category=rng.choice(_CATEGORIES),
+                             price=float(rng.randint(1, 50)),
+                             weight=round(rng.uniform(0.1, 5), 1)),
+                     qty=rng.randint(1, 3))
+            for i in range(1, n + 1)]
+
+
+def _inversions(keys: list) -> int:
+    return sum(keys[i] > keys[j]
+               for i in range(len(keys)) for j in range(i + 1, len(keys)))
+
+
+@pytest.mark.parametrize("algorithm", list(ALGORITHMS))
+@pytest.mark.parametrize("key", list(SORT_KEYS))
+@pytest.mark.parametrize("reverse", [False, True])
+def test_algorithms_match_sorted(algorithm: str, key: str, reverse: bool) -> None:
+    for n, seed in ((0, 0), (1, 1), (2, 2), (40, 3), (150, 4)):
+        items = _items(n, seed)
+        for steps in (False, True):
+            result, _ = sort_cart(list(items), algorithm, key, reverse, steps)
+            field = SORT_KEYS[key]
+            assert [_key_func(item, field) for item in result] == \
+                sorted((_key_func(item, field) for item in items), reverse=reverse)
+            assert sorted(item.product.id for item in result) == \
+                [item.product.id for item in items]
+
+
+def test_estimate_inversions() -> None:
+    keys = [random.Random(5).random() for _ in range(20)]
+    assert estimate_inversions(keys) == _inversions(keys)   # мало пар — точно
+    assert estimate_inversions(sorted(keys * 100)) == 0
+    n = 2000
+    assert estimate_inversions(list(range(n, 0, -1))) == \
+        pytest.approx(n * (n - 1) / 2, rel=0.05)
+
+
+def test_choose_algorithm() -> None:
+    items = _items(500, seed=6)
+    assert choose_algorithm(items, "price")[0] == "Timsort"
+    assert choose_algorithm(items, "price", steps=True)[0] == "Быстрая"
+    assert choose_algorithm(items, "category", steps=True)[0] == "Слиянием"
+    ordered, _ = sort_cart(items, "Timsort", "Цена")
+    ordered[0], ordered[1] = ordered[1], ordered[0]      # почти по порядку
+    assert choose_algorithm(ordered, "price", steps=True)[0] == "Вставками"
+    assert choose_algorithm(items[:1], "price", steps=True)[0] == "Вставками"
@@ -0,0 +1,80 @@
+"""
+Каталог в SQLite (storage.py) против каталога в памяти (catalog.py):
+LazyIds отдаёт те же id в том же порядке для каждой колонки и
+направления — при последовательной прокрутке, переходе в середину и
+после правок, а товары и корзина переживают повторное открытие базы.
+
+Запуск (из папки final_shop/): python -m pytest -q test_storage.py
+"""
+
+import random
+
+import pytest
+
+from catalog import SORT_COLUMNS, Catalog
+from models import CartItem
+from storage import LazyIds, SQLiteCatalog, SQLiteStorage
+
+_NAMES = ["Ёлка", "елка", "Яблоко", "яблоко", "Zebra", "apple", "Мёд", "мед"]
+
+
+def _fill(rng: random.Random, catalogs: list[Catalog], n: int) -> None:
+    for _ in range(n):
+        row = (f"{rng.choice(_NAMES)} {rng.randint(1, 3)}", rng.choice(_NAMES),
+               float(rng.randint(1, 20)), float(rng.randint(1, 5)))
+        for catalog in catalogs:
+            catalog.add(*row)
+
+
+def _assert_same_order(db: SQLiteCatalog, memory: Catalog,
+                       rng: random.Random) -> None:
+    assert db.size() == memory.size()
+    for column in SORT_COLUMNS:
+        for reverse in (False, True):
+            expected = list(memory.sorted_ids(column, reverse))
+            # Переход в середину до прокрутки с начала
+            jumps = LazyIds(db, column, reverse)
+            for i in rng.sample(range(len(expected)), 10):
+                assert jumps[i] == expected[i], (column, reverse, i)
+            assert list(db.sorted_ids(column, reverse)) == expected, (column, reverse)
+    ids = db.ids()
+    for pid in rng.sample(memory.ids(), 10):
+        assert ids.index(pid) == memory.ids().index(pid)
+
+
+@pytest.fixture
+def catalogs(tmp_path, monkeypatch):
+    monkeypatch.setattr(LazyIds, "PAGE", 7)        # много страниц на малых данных
+    db = SQLiteCatalog(SQLiteStorage(tmp_path / "shop.db"))
+    yield db, Catalog()
+    db.storage.close()
+
+
+def test_lazy_ids_match_memory_catalog(catalogs) -> None:
+    db, memory = catalogs
+    rng = random.Random(1)
+    _fill(rng, [db, memory], 120)
+    _assert_same_order(db, memory, rng)
+
+    for pid in rng.sample(memory.ids(), 15):
+        fields = {"price": float(rng.randint(1, 20)), "name": rng.choice(_NAMES)}
+        db.update(pid, **fields)
+        memory.update(pid, **fields)
+    for pid in rng.sample(memory.ids(), 15):
+        db.remove(pid)
+        memory.remove(pid)
+    _fill(rng, [db, memory], 20)
+    _assert_same_order(db, memory, rng)
+
+
+def test_products_and_cart_survive_reopen(catalogs, tmp_path) -> None:
+    db, memory = catalogs
+    _fill(random.Random(2), [db, memory], 30)
+    db.storage.save_cart([CartItem(db.get(3), 2), CartItem(db.get(1), 1)])
+    db.storage.close()
+
+    db = SQLiteCatalog(SQLiteStorage(tmp_path / "shop.db"))
+    assert db.all() == memory.all()
+    assert [(item.product.id, item.qty) for item in db.load_cart_items()] == \
+        [(3, 2), (1, 1)]
+    db.storage.close()
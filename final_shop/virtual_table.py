@@ -0,0 +1,247 @@
+"""
+Виртуализированная таблица на основе ttk.Treeview.
+
+Treeview хранит каждую строку как отдельный Tk-элемент, поэтому вставка
+десятков тысяч строк занимает секунды. VirtualTable держит в Treeview
+только видимые строки (пул «слотов») и при прокрутке переписывает их
+значения. Строки описываются последовательностью ключей (rows) и
+функцией row_values(key) → кортеж значений колонок.
+
+Обновления — по разнице: слот перерисовывается только если его ключ
+или значения изменились.
+"""
+from __future__ import annotations
+
+import tkinter as tk
+from tkinter import ttk
+from typing import Any, Callable, Sequence
+
+
+class VirtualTable(ttk.Frame):
+    """Таблица, материализующая только видимые строки."""
+
+    def __init__(
+        self,
+        parent: tk.Widget,
+        columns: dict[str, tuple[str, int]],
+        row_values: Callable[[Any], tuple],
+        height: int = 20,
+        on_heading: Callable[[str], None] | None = None,
+    ):
+        super().__init__(parent)
+        self._row_values = row_values
+        self._rows: Sequence[Any] = []
+        self._top = 0                       # индекс первой видимой строки
+        self._selected: Any = None          # ключ выбранной строки
+        self._selected_index = -1           # его последний известный индекс
+        # Что сейчас нарисовано в каждом слоте: (ключ, значения)
+        self._rendered: list[tuple[Any, tuple] | None] = []
+
+        self.tree = ttk.Treeview(self, columns=tuple(columns), show="headings",
+                                 selectmode="browse", height=height)
+        for col, (label, width) in columns.items():
+            if on_heading is not None:
+                self.tree.heading(col, text=label,
+                                  command=lambda c=col: on_heading(c))
+            else:
+                self.tree.heading(col, text=label)
+            self.tree.column(col, width=width, anchor="center")
+
+        self.vsb = ttk.Scrollbar(self, orient="vertical", command=self._on_scroll)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.vsb.pack(side="left", fill="y")
+
+        self._resize_pool(height)
+
+        self.tree.bind("<<TreeviewSelect>>", self._on_select)
+        self.tree.bind("<Configure>", self._on_configure)
+        self.tree.bind("<MouseWheel>", self._on_wheel)
+        self.tree.bind("<Button-4>", lambda e: self.scroll_by(-3))
+        self.tree.bind("<Button-5>", lambda e: self.scroll_by(3))
+        self.tree.bind("<Up>", lambda e: self._move_selection(-1))
+        self.tree.bind("<Down>", lambda e: self._move_selection(1))
+        self.tree.bind("<Prior>", lambda e: self.scroll_by(-self._page()))
+        self.tree.bind("<Next>", lambda e: self.scroll_by(self._page()))
+
+    # ------------------------------------------------------------------
+    # Публичный интерфейс
+    # ------------------------------------------------------------------
+
+    def set_rows(self, rows: Sequence[Any]) -> None:
+        """Задать новый порядок строк (список ключей) и перерисовать видимое."""
+        self._rows = rows
+        self._clamp_top()
+        self._render()
+
+    def rows(self) -> Sequence[Any]:
+        """Текущая последовательность ключей строк."""
+        return self._rows
+
+    def refresh(self) -> None:
+        """Перерисовать видимые строки (значения могли измениться)."""
+        self._clamp_top()
+        self._render()
+
+    def refresh_row(self, key: Any) -> None:
+        """Перерисовать одну строку, если она сейчас видна."""
+        for slot, rendered in enumerate(self._rendered):
+            if rendered is not None and rendered[0] == key:
+                self._render_slot(slot, key)
+                return
+
+    def clear_selection(self) -> None:
+        """Снять выделение (например, после удаления выбранной строки)."""
+        self._selected = None
+        self._selected_index = -1
+        self._sync_selection()
+
+    def selection(self) -> tuple[str, ...]:
+        """Ключ выбранной строки в виде кортежа строк (как у Treeview)."""
+        if self._selected is None:
+            return ()
+        return (str(self._selected),)
+
+    def see(self, key: Any) -> None:
+        """Прокрутить таблицу так, чтобы строка key была видна."""
+        try:
+            index = self._rows.index(key)
+        except ValueError:
+            return
+        if not self._top <= index < self._top + self._page():
+            self._top = index
+            self._clamp_top()
+            self._render()
+
+    def scroll_by(self, delta: int) -> str:
+        self._top += delta
+        self._clamp_top()
+        self._render()
+        return "break"
+
+    # ------------------------------------------------------------------
+    # Пул слотов
+    # ------------------------------------------------------------------
+
+    def _slot_iid(self, slot: int) -> str:
+        return f"slot{slot}"
+
+    def _page(self) -> int:
+        return len(self._rendered)
+
+    def _resize_pool(self, size: int) -> None:
+        size = max(1, size)
+        while len(self._rendered) < size:
+            self._rendered.append(None)
+        while len(self._rendered) > size:
+            slot = len(self._rendered) - 1
+            if self._rendered[slot] is not None:
+                self.tree.delete(self._slot_iid(slot))
+            self._rendered.pop()
+
+    def _clamp_top(self) -> None:
+        max_top = max(0, len(self._rows) - self._page())
+        self._top = min(max(0, self._top), max_top)
+
+    def _render(self) -> None:
+        for slot in range(self._page()):
+            index = self._top + slot
+            key = self._rows[index] if index < len(self._rows) else None
+            self._render_slot(slot, key)
+        self._sync_selection()
+        self._update_scrollbar()
+
+    def _render_slot(self, slot: int, key: Any) -> None:
+        iid = self._slot_iid(slot)
+        current = self._rendered[slot]
+        if key is None:
+            if current is not None:
+                self.tree.delete(iid)
+                self._rendered[slot] = None
+            return
+        values = self._row_values(key)
+        if current is None:
+            self.tree.insert("", slot, iid=iid, values=values)
+        elif current != (key, values):
+            self.tree.item(iid, values=values)
+        self._rendered[slot] = (key, values)
+
+    def _sync_selection(self) -> None:
+        for slot, rendered in enumerate(self._rendered):
+            if rendered is not None and rendered[0] == self._selected:
+                iid = self._slot_iid(slot)
+                if self.tree.selection() != (iid,):
+                    self.tree.selection_set(iid)
+                return
+        if self.tree.selection():
+            self.tree.selection_remove(*self.tree.selection())
+
+    def _update_scrollbar(self) -> None:
+        total = len(self._rows)
+        if total == 0:
+            self.vsb.set(0.0, 1.0)
+            return
+        first = self._top / total
+        last = min(1.0, (self._top + self._page()) / total)
+        self.vsb.set(first, last)
+
+    # ------------------------------------------------------------------
+    # Обработчики событий
+    # ------------------------------------------------------------------
+
+    def _on_scroll(self, action: str, *args) -> None:
+        if action == "moveto":
+            self._top = int(float(args[0]) * len(self._rows))
+            self._clamp_top()
+            self._render()
+        elif action == "scroll":
+            amount, what = int(args[0]), args[1]
+            step = self._page() if what == "pages" else 1
+            self.scroll_by(amount * step)
+
+    def _on_wheel(self, event: tk.Event) -> str:
+        return self.scroll_by(-3 if event.delta > 0 else 3)
+
+    def _on_configure(self, event: tk.Event) -> None:
+        # Сколько строк помещается в видимую область
+        style = ttk.Style(self)
+        row_height = int(style.lookup("Treeview", "rowheight") or 20)
+        rows = (event.height - row_height) // row_height
+        if rows != self._page() and rows > 0:
+            self._resize_pool(rows)
+            self.refresh()
+
+    def _on_select(self, _event: tk.Event) -> None:
+        sel = self.tree.selection()
+        if not sel:
+            return
+        slot = int(sel[0][len("slot"):])
+        rendered = self._rendered[slot]
+        if rendered is not None:
+            self._selected = rendered[0]
+            self._selected_index = self._top + slot
+
+    def _index_of_selected(self) -> int:
+        """Индекс выбранной строки; без поиска, если подсказка верна."""
+        hint = self._selected_index
+        if 0 <= hint < len(self._rows) and self._rows[hint] == self._selected:
+            return hint
+        try:
+            return self._rows.index(self._selected)
+        except ValueError:
+            return -1
+
+    def _move_selection(self, delta: int) -> str:
+        if not self._rows:
+            return "break"
+        index = self._index_of_selected()
+        index = self._top if index < 0 else index + delta
+        index = min(max(0, index), len(self._rows) - 1)
+        self._selected = self._rows[index]
+        self._selected_index = index
+        if index < self._top:
+            self._top = index
+        elif index >= self._top + self._page():
+            self._top = index - self._page() + 1
+        self._clamp_top()
+        self._render()
+        return "break"